@@ -0,0 +1,463 @@
+import heapq
+from array import array
+from collections import deque
+from time import perf_counter_ns
+
+from Classes.spawn_scheduler import BULLET, SUPER_BULLET
+from help_functions.const import (
+    SEGMENT_SIZE,
+    MOVE_INTERVAL,
+    AUTOPILOT_MAX_NODES,
+    AUTOPILOT_ESCAPE_NODES,
+    UP,
+    RIGHT,
+    DOWN,
+    LEFT,
+    OPPOSITE,
+)
+from help_functions.profiler import FrameProfiler
+
+# Column and row steps of the directions; rows count upwards like the y coordinate
+CELL_STEPS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+NEVER = -(1 << 62)  # Head count of a cell no segment has entered yet
+
+
+class Autopilot:
+    """
+    Steers the snake to the foods by itself, for soak tests and attract-mode demos. An Autopilot is a
+    controller for GameEngine.run: it is called with the state before every tick and returns the
+    direction to steer in, or None to keep going. It only decides on the ticks the snake moves on.
+
+    Paths are searched with A* on the wrapped grid of cells the snake moves on. A body cell counts as
+    free once the tail will have left it by the time the head arrives, and a cell is avoided while a
+    bullet or super bullet falling in its lane will be level with it. A path is kept between moves and
+    checked again every move; when a cell on it became unsafe, only the part from that cell on is searched
+    again. When no food can be reached safely, the snake chases its own tail, which keeps a way out open.
+
+    The searches of one move expand at most max_nodes cells together, so the time per move is bounded; a
+    food further away than that is approached along a partial path that is continued on later moves. The
+    time of every decision is recorded to the profiler as the "autopilot" phase, unless the profiler is set
+    to None.
+    """
+
+    def __init__(self, max_nodes=AUTOPILOT_MAX_NODES, profiler=None):
+        """
+        Initializes the autopilot. It attaches to a game on the first call and follows the engine to the
+        next game after a reset.
+
+        Args:
+            max_nodes (int): Most cells the searches of one decision expand together.
+            profiler (FrameProfiler, optional): The profiler the decisions are timed with, a new one if not
+                given. Set the profiler attribute to None to stop timing them, e.g. while the profiler of a
+                game is switched off.
+        """
+        self.max_nodes = max_nodes
+        self.profiler = profiler if profiler is not None else FrameProfiler()
+        self.state = None
+        # How often a move reused the path as it was, repaired it, planned a new one or fell back to
+        # chasing the tail or to any safe cell
+        self.counts = dict.fromkeys(
+            ("moves", "reused", "repaired", "planned", "tail", "escape", "stuck"), 0
+        )
+
+    def attach(self, state):
+        """
+        Starts following a game, recording which segment is the newest one on every cell of the body.
+
+        Args:
+            state (GameState): The state of the game.
+        """
+        snake = state.snake
+        self.state = state
+        self.columns = snake.width // SEGMENT_SIZE
+        self.rows = snake.height // SEGMENT_SIZE
+        # Head count of the newest segment on each cell: the segment is heads_added - last_visit[cell]
+        # segments behind the head
+        self.last_visit = array("q", [NEVER]) * (self.columns * self.rows)
+        self.seen_heads = snake.heads_added
+        for i, segment in enumerate(snake.segments):
+            cell = snake.occupancy.cell_index(segment)
+            if cell is not None and self.last_visit[cell] < self.seen_heads - i:
+                self.last_visit[cell] = self.seen_heads - i
+        self.path = deque()
+        self.expected = None
+        self.goals = None
+
+    def __call__(self, state):
+        """
+        Decides the action for the next tick.
+
+        Args:
+            state (GameState): The state before the tick.
+
+        Returns:
+            int: The direction to steer in, or None to keep going.
+        """
+        if state is not self.state:
+            self.attach(state)
+        snake = state.snake
+        heads = snake.heads_added
+        if heads != self.seen_heads:
+            occupancy = snake.occupancy
+            segments = snake.segments
+            for i in range(min(heads - self.seen_heads, len(segments))):
+                cell = occupancy.cell_index(segments[i])
+                if cell is not None:
+                    self.last_visit[cell] = heads - i
+            self.seen_heads = heads
+        if snake.move_counter != MOVE_INTERVAL - 1 or state.game_over:
+            return None
+        profiler = self.profiler
+        if profiler is None:
+            return self.decide(state)
+        start = perf_counter_ns()
+        direction = self.decide(state)
+        profiler.record("autopilot", start)
+        return direction
+
+    def stats(self):
+        """
+        Summarizes the decisions so far.
+
+        Returns:
+            dict: The number of moves decided, how they were decided, and the p50, p95 and p99 decision
+                times in nanoseconds under "time", which is None while the decisions are not timed.
+        """
+        profiler = self.profiler
+        time = profiler.percentiles("autopilot") if profiler is not None else None
+        return dict(self.counts, time=time)
+
+    def cell_of(self, position):
+        """
+        Converts a position in pixels to its (column, row).
+        """
+        return position[0] // SEGMENT_SIZE, position[1] // SEGMENT_SIZE
+
+    def neighbour(self, cell, direction):
+        """
+        Returns the cell one move away in a direction, through the wrap-around like Snake.move.
+        """
+        dc, dr = CELL_STEPS[direction]
+        return (cell % self.columns + dc) % self.columns + (
+            cell // self.columns + dr
+        ) % self.rows * self.columns
+
+    def prepare(self, state):
+        """
+        Gathers what the safety checks of one decision need: the snake's length and growth, and the
+        bullets and super bullets by lane.
+        """
+        snake = state.snake
+        self.counts_grid = snake.occupancy.counts
+        self.length = len(snake.segments)
+        self.growth = snake.growth_due
+        lanes = {}
+        objects = state.objects
+        n = objects.count
+        if n:
+            for x, y, speed, kind in zip(
+                objects.x[:n].tolist(),
+                objects.y[:n].tolist(),
+                objects.speed[:n].tolist(),
+                objects.kind[:n].tolist(),
+            ):
+                if kind == BULLET or kind == SUPER_BULLET:
+                    lanes.setdefault(int(x // SEGMENT_SIZE), []).append((y, speed))
+        self.lanes = lanes
+
+    def is_safe(self, cell, move, objects=True):
+        """
+        Checks whether the head can be on a cell after a number of moves without hitting the body or a
+        falling bullet.
+
+        Args:
+            cell (int): The cell index.
+            move (int): The move the head arrives with, 1 being the next one.
+            objects (bool): Whether to check for bullets, or only for the body.
+
+        Returns:
+            bool: True if the cell is safe then.
+        """
+        count = self.counts_grid[cell]
+        if count:
+            # The newest segment on the cell is gone once the tail passed it; the tail stays put while
+            # the snake grows. Segments a grow appended behind the tail were never entered by the head,
+            # and are stacked on one cell, so a cell holding those is as far behind as the last of them.
+            behind = min(self.seen_heads - self.last_visit[cell], self.length - count)
+            if move < self.length - behind + self.growth:
+                return False
+        lanes = self.lanes
+        if objects and lanes:
+            column = cell % self.columns
+            # Objects hit the head from its own lane and the one to its left, when they are within a
+            # segment of it vertically. The head stays on the cell for MOVE_INTERVAL ticks, and objects
+            # move before they are checked.
+            bottom = (cell // self.columns - 1) * SEGMENT_SIZE
+            top = bottom + 2 * SEGMENT_SIZE
+            first = (move - 1) * MOVE_INTERVAL + 1
+            last = move * MOVE_INTERVAL
+            for lane in (column, column - 1):
+                for y, speed in lanes.get(lane, ()):
+                    if y - speed * last <= top and y - speed * first >= bottom:
+                        return False
+        return True
+
+    def distance(self, cell, targets):
+        """
+        Estimates the moves from a cell to the nearest target through the wrap-around, never more than it
+        takes.
+
+        Args:
+            cell (int): The cell index.
+            targets (tuple): The (column, row, reach) of the targets; a target is reached from any cell
+                within reach columns and rows of it.
+
+        Returns:
+            int: The estimated number of moves.
+        """
+        columns, rows = self.columns, self.rows
+        column, row = cell % columns, cell // columns
+        best = None
+        for target_column, target_row, reach in targets:
+            dc = abs(column - target_column)
+            dr = abs(row - target_row)
+            estimate = max(min(dc, columns - dc) - reach, 0) + max(
+                min(dr, rows - dr) - reach, 0
+            )
+            if best is None or estimate < best:
+                best = estimate
+        return best
+
+    def search(self, start, direction, move, targets):
+        """
+        Searches for a short safe path from a cell to a target with A*, using distance() as the estimate.
+        The cells expanded are taken from the budget of the decision. If the budget runs out first, the
+        path leads to the cell found closest to a target instead, and is continued on a later move.
+
+        Args:
+            start (int): The cell the search starts from.
+            direction (int): The direction the snake entered the start cell with; it cannot turn back.
+            move (int): The move the snake is on the start cell after.
+            targets (tuple): The (column, row, reach) of the targets, see distance().
+
+        Returns:
+            list: The cells of the path after the start cell, or None if no target can be reached safely.
+        """
+        columns = self.columns
+        parents = {start: None}
+        best = start
+        best_distance = self.distance(start, targets)
+        frontier = [(best_distance + move, -move, start, direction)]
+        found = None
+        while frontier:
+            if self.budget <= 0:
+                found = best
+                break
+            _, move, cell, direction = heapq.heappop(frontier)
+            self.budget -= 1
+            move = 1 - move
+            for turn in range(4):
+                if turn == OPPOSITE[direction]:
+                    continue
+                following = self.neighbour(cell, turn)
+                if following in parents or not self.is_safe(following, move):
+                    continue
+                parents[following] = cell
+                column, row = following % columns, following // columns
+                if any(
+                    abs(column - target_column) <= reach
+                    and abs(row - target_row) <= reach
+                    for target_column, target_row, reach in targets
+                ):
+                    found = following
+                    break
+                distance = self.distance(following, targets)
+                if distance < best_distance:
+                    best, best_distance = following, distance
+                heapq.heappush(frontier, (distance + move, -move, following, turn))
+            if found is not None:
+                break
+        if found is None or found == start:
+            return None
+        path = []
+        while found != start:
+            path.append(found)
+            found = parents[found]
+        path.reverse()
+        return path
+
+    def food_targets(self, state):
+        """
+        Lists the foods as targets: the head eats a food from any of the eight cells around it.
+
+        Returns:
+            tuple: The (column, row, reach) of the foods, empty if there is no food on the board.
+        """
+        return tuple(
+            self.cell_of(food.position) + (1,)
+            for food in (state.food, state.super_food)
+            if food.position is not None
+        )
+
+    def decide(self, state):
+        """
+        Picks the direction of the next move: along the kept path if it is still safe, along a repaired
+        or new path to a food otherwise, and towards the tail or any safe cell if no food can be reached.
+
+        Args:
+            state (GameState): The state before the move.
+
+        Returns:
+            int: The direction to steer in, or None to keep going.
+        """
+        snake = state.snake
+        self.prepare(state)
+        self.budget = self.max_nodes
+        self.counts["moves"] += 1
+        head = snake.occupancy.cell_index(snake.segments[0])
+        direction = snake.direction
+        goals = self.food_targets(state)
+        path = self.path
+        if self.expected != head or goals != self.goals:
+            path.clear()
+        self.goals = goals
+
+        kind = "reused"
+        for move, cell in enumerate(path, 1):
+            if not self.is_safe(cell, move):
+                # Keep the safe part and search on from its end
+                kept = list(path)[: move - 1]
+                path.clear()
+                path.extend(kept)
+                kind = "repaired"
+                break
+        if not path or kind == "repaired":
+            found = None
+            if goals:
+                if path:
+                    end = path[-1]
+                    before = path[-2] if len(path) > 1 else head
+                    found = self.search(
+                        end,
+                        self.turn_between(before, end),
+                        len(path),
+                        goals,
+                    )
+                if found is None:
+                    path.clear()
+                    kind = "planned"
+                    found = self.search(head, direction, 0, goals)
+            if found is not None:
+                path.extend(found)
+                if not self.has_room(head, path):
+                    found = None
+            if found is None:
+                path.clear()
+                kind = "tail"
+                found = self.chase_tail(snake, head, direction)
+                if found is None:
+                    kind = "escape"
+                    found = self.escape(head, direction)
+                if found is None:
+                    self.counts["stuck"] += 1
+                    self.expected = None
+                    return None
+                # A fallback only decides this move; the next move looks for food again
+                path.append(found)
+                self.goals = None
+        self.counts[kind] += 1
+
+        following = path.popleft()
+        self.expected = following
+        return self.turn_between(head, following)
+
+    def has_room(self, head, path):
+        """
+        Checks that the snake is not trapped at the end of a path: it must have room for its length behind
+        the food, or at least AUTOPILOT_ESCAPE_NODES cells.
+
+        Args:
+            head (int): The cell of the head.
+            path (deque): The cells of the path.
+
+        Returns:
+            bool: True if there is enough room after the path.
+        """
+        before = path[-2] if len(path) > 1 else head
+        needed = min(self.length, AUTOPILOT_ESCAPE_NODES)
+        return (
+            self.room(path[-1], self.turn_between(before, path[-1]), len(path), needed)
+            >= needed
+        )
+
+    def turn_between(self, cell, following):
+        """
+        Returns the direction from a cell to a neighbouring one.
+        """
+        for direction in (UP, RIGHT, DOWN, LEFT):
+            if self.neighbour(cell, direction) == following:
+                return direction
+        raise ValueError(f"cells {cell} and {following} are not neighbours")
+
+    def chase_tail(self, snake, head, direction):
+        """
+        Searches for a safe path to the tail's cell.
+
+        Returns:
+            int: The first cell of the path, or None if the tail cannot be reached.
+        """
+        tail = snake.occupancy.cell_index(snake.segments[-1])
+        if tail is None or tail == head:
+            return None
+        found = self.search(
+            head, direction, 0, ((tail % self.columns, tail // self.columns, 0),)
+        )
+        return found[0] if found else None
+
+    def room(self, cell, direction, move, limit):
+        """
+        Counts the cells the snake can safely move on to from a cell, up to a limit.
+
+        Args:
+            cell (int): The cell the snake is on.
+            direction (int): The direction the snake entered the cell with.
+            move (int): The move the snake is on the cell after.
+            limit (int): Most cells to count.
+
+        Returns:
+            int: The number of cells counted.
+        """
+        seen = {cell}
+        frontier = deque(((cell, direction, move),))
+        while frontier and len(seen) < limit:
+            cell, direction, move = frontier.popleft()
+            for turn in range(4):
+                if turn == OPPOSITE[direction]:
+                    continue
+                following = self.neighbour(cell, turn)
+                if following not in seen and self.is_safe(following, move + 1):
+                    seen.add(following)
+                    frontier.append((following, turn, move + 1))
+        return len(seen)
+
+    def escape(self, head, direction):
+        """
+        Picks the safe neighbour of the head with the most safe room behind it. If every neighbour is in
+        the way of a bullet, one that is free of the body is picked, as a bullet only costs lives.
+
+        Returns:
+            int: The neighbour, or None if the body blocks every neighbour.
+        """
+        best = None
+        best_room = 0
+        for turn in range(4):
+            if turn == OPPOSITE[direction]:
+                continue
+            cell = self.neighbour(head, turn)
+            if self.is_safe(cell, 1):
+                room = self.room(cell, turn, 1, AUTOPILOT_ESCAPE_NODES)
+                if room > best_room:
+                    best, best_room = cell, room
+            elif best is None and self.is_safe(cell, 1, objects=False):
+                best = cell
+        return best
@@ -0,0 +1,442 @@
+import numpy as np
+
+from help_functions.const import (
+    WINDOW_WIDTH,
+    WINDOW_HEIGHT,
+    SEGMENT_SIZE,
+    FALLING_OBJ_SPEED,
+    MOVE_INTERVAL,
+    MAX_LIVES,
+    BULLET_GEN_BASE_CHANCE,
+    SUPER_BULLET_GEN_BASE_CHANCE,
+    HEART_GEN_CHANCE,
+    BULLET_DIFFICULTY_STEP,
+    SUPER_BULLET_DIFFICULTY_STEP,
+    DIFFICULTY_SCORE_STEP,
+    SUPER_FOOD_SPAWN_CHANCE,
+    SUPER_FOOD_RELOCATE_CHANCE,
+    MOVE_DICT,
+    UP,
+)
+
+COLUMNS = WINDOW_WIDTH // SEGMENT_SIZE
+ROWS = WINDOW_HEIGHT // SEGMENT_SIZE
+
+# Actions are direction codes from help_functions.const; the opposite of code d is (d + 2) % 4
+NO_ACTION = -1
+DX = np.array([dx // SEGMENT_SIZE for dx, _ in MOVE_DICT], dtype=np.int16)
+DY = np.array([dy // SEGMENT_SIZE for _, dy in MOVE_DICT], dtype=np.int16)
+
+# Falling object kinds and their speeds in pixels per tick
+BULLET, SUPER_BULLET, HEART = 0, 1, 2
+OBJECT_SPEEDS = np.array(
+    [FALLING_OBJ_SPEED, FALLING_OBJ_SPEED, 0.5 * FALLING_OBJ_SPEED], dtype=np.float32
+)
+SPAWN_Y = WINDOW_HEIGHT - FALLING_OBJ_SPEED + SEGMENT_SIZE // 2
+
+# Causes of death
+ALIVE, DIED_SELF, DIED_LIVES = 0, 1, 2
+
+# Random placement attempts before falling back to scanning the free cells
+PLACEMENT_ROUNDS = 8
+
+
+class BatchGameEngine:
+    """
+    Steps many independent games in lockstep. Every game's state is stored as struct-of-arrays so a tick is
+    a handful of NumPy operations over all games instead of a Python loop per game.
+
+    Positions are in grid cells: column 0 is the left edge and row 0 the bottom edge. Each snake body is a
+    ring buffer of cells with the head at head_ptr. Falling objects live in fixed slots per game.
+    """
+
+    def __init__(
+        self,
+        n_games,
+        seed=None,
+        max_objects=32,
+        bullet_gen_base_chance=BULLET_GEN_BASE_CHANCE,
+        super_bullet_gen_base_chance=SUPER_BULLET_GEN_BASE_CHANCE,
+        heart_gen_chance=HEART_GEN_CHANCE,
+        bullet_difficulty_step=BULLET_DIFFICULTY_STEP,
+        super_bullet_difficulty_step=SUPER_BULLET_DIFFICULTY_STEP,
+        difficulty_score_step=DIFFICULTY_SCORE_STEP,
+    ):
+        """
+        Initializes the engine and starts n_games new games.
+
+        Args:
+            n_games (int): The number of games simulated in lockstep.
+            seed (optional): Seed for the engine's random number generator.
+            max_objects (int): Falling object slots per game. Spawns are dropped while all slots are in use.
+            bullet_gen_base_chance (float): Chance per tick to spawn a bullet before any difficulty increase.
+            super_bullet_gen_base_chance (float): Chance per tick to spawn a super bullet before any difficulty increase.
+            heart_gen_chance (float): Chance per tick to spawn a heart.
+            bullet_difficulty_step (float): Increase of the bullet chance per difficulty level.
+            super_bullet_difficulty_step (float): Increase of the super bullet chance per difficulty level.
+            difficulty_score_step (int): Points needed to reach the next difficulty level.
+        """
+        self.n_games = n_games
+        self.max_objects = max_objects
+        # A body never covers more than the board plus a few pending growth segments
+        self.capacity = COLUMNS * ROWS + 64
+        self.bullet_gen_base_chance = bullet_gen_base_chance
+        self.super_bullet_gen_base_chance = super_bullet_gen_base_chance
+        self.heart_gen_chance = heart_gen_chance
+        self.bullet_difficulty_step = bullet_difficulty_step
+        self.super_bullet_difficulty_step = super_bullet_difficulty_step
+        self.difficulty_score_step = difficulty_score_step
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """
+        Starts n_games new games.
+
+        Args:
+            seed (optional): Seed for the engine's random number generator.
+        """
+        n, cap, m = self.n_games, self.capacity, self.max_objects
+        self.rng = np.random.default_rng(seed)
+
+        self.body_x = np.zeros((n, cap), dtype=np.int16)
+        self.body_y = np.zeros((n, cap), dtype=np.int16)
+        self.head_ptr = np.zeros(n, dtype=np.int64)
+        self.length = np.ones(n, dtype=np.int64)
+        self.occupancy = np.zeros((n, ROWS * COLUMNS), dtype=np.uint16)
+        self.direction = np.full(n, UP, dtype=np.int8)
+        self.move_counter = np.zeros(n, dtype=np.int8)
+        self.growth_due = np.zeros(n, dtype=np.int64)
+        self.lives = np.full(n, 3, dtype=np.int8)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.alive = np.ones(n, dtype=bool)
+        self.cause_of_death = np.zeros(n, dtype=np.int8)
+
+        self.food_x = np.full(n, -1, dtype=np.int16)
+        self.food_y = np.full(n, -1, dtype=np.int16)
+        self.super_food_x = np.full(n, -1, dtype=np.int16)
+        self.super_food_y = np.full(n, -1, dtype=np.int16)
+
+        self.obj_col = np.zeros((n, m), dtype=np.int16)
+        self.obj_y = np.zeros((n, m), dtype=np.float32)
+        self.obj_kind = np.zeros((n, m), dtype=np.int8)
+        self.obj_alive = np.zeros((n, m), dtype=bool)
+        self.obj_seq = np.zeros((n, m), dtype=np.int64)
+        self.next_seq = 0
+
+        games = np.arange(n)
+        self.body_x[:, 0] = self.rng.integers(0, COLUMNS, n)
+        self.body_y[:, 0] = self.rng.integers(0, ROWS, n)
+        self.occupancy[games, self.body_y[:, 0] * COLUMNS + self.body_x[:, 0]] = 1
+        self._place(games, self.food_x, self.food_y)
+        self._place(games, self.super_food_x, self.super_food_y)
+
+    @property
+    def head_x(self):
+        """The column of every snake's head."""
+        return self.body_x[np.arange(self.n_games), self.head_ptr]
+
+    @property
+    def head_y(self):
+        """The row of every snake's head."""
+        return self.body_y[np.arange(self.n_games), self.head_ptr]
+
+    def segments(self, game):
+        """
+        Returns the body of one game, head first, as a list of (column, row) cells.
+
+        Args:
+            game (int): The index of the game.
+
+        Returns:
+            list: The cells of the snake body.
+        """
+        slots = (self.head_ptr[game] + np.arange(self.length[game])) % self.capacity
+        return list(
+            zip(self.body_x[game, slots].tolist(), self.body_y[game, slots].tolist())
+        )
+
+    def step(self, actions=None):
+        """
+        Advances every running game by one tick. Finished games are left untouched.
+
+        Args:
+            actions (array, optional): One direction code per game, or NO_ACTION to keep going.
+
+        Returns:
+            array: A boolean mask of the games that are still running.
+        """
+        act = np.flatnonzero(self.alive)
+        if act.size == 0:
+            return self.alive
+
+        if actions is not None:
+            action = np.asarray(actions)[act]
+            turn = (action >= 0) & (action != (self.direction[act] + 2) % 4)
+            self.direction[act[turn]] = action[turn]
+
+        self.move_counter[act] += 1
+        moving = act[self.move_counter[act] >= MOVE_INTERVAL]
+        if moving.size:
+            self.move_counter[moving] = 0
+            self._move(moving)
+
+        self._eat(act)
+        self._update_objects()
+        self._spawn(act)
+        self.ticks[act] += 1
+        self._check_game_over(act)
+        return self.alive
+
+    def run(self, n_ticks, policy=None):
+        """
+        Runs all games for up to n_ticks ticks or until every game is over.
+
+        Args:
+            n_ticks (int): The maximum number of ticks to run.
+            policy (callable, optional): Called with the engine before every tick; its return value is
+                passed to step() as the actions.
+
+        Returns:
+            int: The number of ticks that were run.
+        """
+        for tick in range(n_ticks):
+            if not self.alive.any():
+                return tick
+            self.step(policy(self) if policy is not None else None)
+        return n_ticks
+
+    def spawn_chances(self, score):
+        """
+        Computes the spawn chances of bullets and super bullets for an array of scores.
+
+        Args:
+            score (array): The current scores.
+
+        Returns:
+            tuple: Arrays with the bullet and super bullet chances per tick.
+        """
+        step = self.difficulty_score_step
+        difficulty_factor = np.where(score >= step, 1 + (score - step) // step, 0)
+        return (
+            self.bullet_gen_base_chance
+            + difficulty_factor * self.bullet_difficulty_step,
+            self.super_bullet_gen_base_chance
+            + difficulty_factor * self.super_bullet_difficulty_step,
+        )
+
+    def _tail_slot(self, games):
+        return (self.head_ptr[games] + self.length[games] - 1) % self.capacity
+
+    def _move(self, games):
+        """
+        Moves the snakes of the given games one cell, wrapping around the board, and pops their tails unless
+        they are due to grow.
+        """
+        direction = self.direction[games]
+        head = self.head_ptr[games]
+        x = (self.body_x[games, head] + DX[direction]) % COLUMNS
+        y = (self.body_y[games, head] + DY[direction]) % ROWS
+        head = (head - 1) % self.capacity
+        self.head_ptr[games] = head
+        self.body_x[games, head] = x
+        self.body_y[games, head] = y
+        self.occupancy[games, y * COLUMNS + x] += 1
+        self.length[games] += 1
+
+        growing = self.growth_due[games] > 0
+        self.growth_due[games[growing]] -= 1
+        popping = games[~growing]
+        tail = self._tail_slot(popping)
+        self._release(popping, self.body_x[popping, tail], self.body_y[popping, tail])
+        self.length[popping] -= 1
+
+    def _grow(self, games, segments):
+        """
+        Mirrors Snake.grow: adds the growth to growth_due and appends that many copies of the cell behind
+        the tail (against the current direction).
+        """
+        self.growth_due[games] += segments
+        direction = self.direction[games]
+        tail = self._tail_slot(games)
+        x = self.body_x[games, tail] - DX[direction]
+        y = self.body_y[games, tail] - DY[direction]
+        on_board = (x >= 0) & (x < COLUMNS) & (y >= 0) & (y < ROWS)
+        for _ in range(segments):
+            slot = (self.head_ptr[games] + self.length[games]) % self.capacity
+            self.body_x[games, slot] = x
+            self.body_y[games, slot] = y
+            self.length[games] += 1
+        self.occupancy[games[on_board], y[on_board] * COLUMNS + x[on_board]] += segments
+
+    def _release(self, games, x, y):
+        on_board = (x >= 0) & (x < COLUMNS) & (y >= 0) & (y < ROWS)
+        self.occupancy[games[on_board], y[on_board] * COLUMNS + x[on_board]] -= 1
+
+    def _place(self, games, xs, ys):
+        """
+        Places a food of every given game on a random cell that is not covered by its snake, using the same
+        cell range as AbstractFood.generate_position. Games with a full board get no food (-1).
+        """
+        pending = games
+        for _ in range(PLACEMENT_ROUNDS):
+            x = self.rng.integers(0, COLUMNS, pending.size)
+            y = self.rng.integers(1, ROWS, pending.size)
+            free = self.occupancy[pending, y * COLUMNS + x] == 0
+            xs[pending[free]] = x[free]
+            ys[pending[free]] = y[free]
+            pending = pending[~free]
+            if pending.size == 0:
+                return
+        for game in pending:
+            cells = np.flatnonzero(self.occupancy[game, COLUMNS:] == 0)
+            if cells.size == 0:
+                xs[game] = ys[game] = -1
+            else:
+                cell = self.rng.choice(cells) + COLUMNS
+                xs[game], ys[game] = cell % COLUMNS, cell // COLUMNS
+
+    def _eat(self, games):
+        """
+        Mirrors the food handling of the game: food takes precedence over super food in the same tick.
+        """
+        head = self.head_ptr[games]
+        x = self.body_x[games, head]
+        y = self.body_y[games, head]
+
+        near_food = (
+            (self.food_x[games] >= 0)
+            & (np.abs(x - self.food_x[games]) <= 1)
+            & (np.abs(y - self.food_y[games]) <= 1)
+        )
+        ate = games[near_food]
+        if ate.size:
+            self._place(ate, self.food_x, self.food_y)
+            self._grow(ate, 1)
+            self.score[ate] += 1
+            respawn = ate[self.rng.random(ate.size) < SUPER_FOOD_SPAWN_CHANCE]
+            if respawn.size:
+                self._place(respawn, self.super_food_x, self.super_food_y)
+
+        rest = games[~near_food]
+        near_super_food = (
+            (self.super_food_x[rest] >= 0)
+            & (np.abs(x[~near_food] - self.super_food_x[rest]) <= 1)
+            & (np.abs(y[~near_food] - self.super_food_y[rest]) <= 1)
+        )
+        ate_super = rest[near_super_food]
+        if ate_super.size:
+            self.super_food_x[ate_super] = -1
+            self.super_food_y[ate_super] = -1
+            self._grow(ate_super, 5)
+            self.score[ate_super] += 5
+
+    def _update_objects(self):
+        """
+        Moves the falling objects of running games, applies the ones that hit a snake head and removes hit
+        and off-screen objects.
+        """
+        games, slots = np.nonzero(self.obj_alive & self.alive[:, None])
+        if games.size == 0:
+            return
+        y = self.obj_y[games, slots] - OBJECT_SPEEDS[self.obj_kind[games, slots]]
+        self.obj_y[games, slots] = y
+
+        # FallingObjects.hits compares the head corner with the object centre, which on the grid
+        # means the object is in the head's column or the one to its left.
+        head = self.head_ptr[games]
+        column_offset = self.body_x[games, head] - self.obj_col[games, slots]
+        hit = ((column_offset == 0) | (column_offset == 1)) & (
+            np.abs(self.body_y[games, head] * SEGMENT_SIZE - y) <= SEGMENT_SIZE
+        )
+        if hit.any():
+            self._apply_hits(games[hit], slots[hit])
+        gone = hit | (y < 0)
+        self.obj_alive[games[gone], slots[gone]] = False
+
+    def _apply_hits(self, games, slots):
+        kinds = self.obj_kind[games, slots]
+        n = self.n_games
+        bullets = np.bincount(games[kinds == BULLET], minlength=n)
+        super_bullets = np.bincount(games[kinds == SUPER_BULLET], minlength=n)
+        hearts = np.bincount(games[kinds == HEART], minlength=n)
+
+        # With a single kind of hit the order does not matter
+        hit_games = np.unique(games)
+        simple = (hearts[hit_games] == 0) | (
+            bullets[hit_games] + super_bullets[hit_games] == 0
+        )
+        mixed = hit_games[~simple]
+        hit_games = hit_games[simple]
+        damage = bullets[hit_games] + 3 * super_bullets[hit_games]
+        lives = np.maximum(self.lives[hit_games].astype(np.int64) - damage, 0)
+        lives = np.where(
+            lives < MAX_LIVES,
+            np.minimum(lives + hearts[hit_games], MAX_LIVES),
+            lives,
+        )
+        self.lives[hit_games] = lives
+
+        # Mixed hits are applied in spawn order, like the object list of the game
+        for game in mixed:
+            game_slots = slots[games == game]
+            lives = int(self.lives[game])
+            for slot in game_slots[np.argsort(self.obj_seq[game, game_slots])]:
+                kind = self.obj_kind[game, slot]
+                if kind == HEART:
+                    if lives < MAX_LIVES:
+                        lives += 1
+                else:
+                    lives = max(lives - (3 if kind == SUPER_BULLET else 1), 0)
+            self.lives[game] = lives
+
+    def _spawn(self, games):
+        """
+        Rolls the spawn chances of bullets, super bullets and hearts for the given games and relocates the
+        super food at random.
+        """
+        bullet_gen_chance, super_bullet_gen_chance = self.spawn_chances(
+            self.score[games]
+        )
+        roll = self.rng.random((games.size, 4))
+        chances = (bullet_gen_chance, super_bullet_gen_chance, self.heart_gen_chance)
+        for kind, chance in zip((BULLET, SUPER_BULLET, HEART), chances):
+            spawning = games[roll[:, kind] < chance]
+            if spawning.size == 0:
+                continue
+            slot = np.argmin(self.obj_alive[spawning], axis=1)
+            free = ~self.obj_alive[spawning, slot]
+            spawning, slot = spawning[free], slot[free]
+            self.obj_alive[spawning, slot] = True
+            self.obj_col[spawning, slot] = self.rng.integers(0, COLUMNS, spawning.size)
+            self.obj_y[spawning, slot] = SPAWN_Y
+            self.obj_kind[spawning, slot] = kind
+            self.obj_seq[spawning, slot] = self.next_seq + np.arange(spawning.size)
+            self.next_seq += spawning.size
+
+        relocating = games[roll[:, 3] < SUPER_FOOD_RELOCATE_CHANCE]
+        if relocating.size:
+            self._place(relocating, self.super_food_x, self.super_food_y)
+
+    def _check_game_over(self, games):
+        """
+        Ends the games whose snake ran into its own body (the tail does not count) or ran out of lives.
+        """
+        head = self.head_ptr[games]
+        x = self.body_x[games, head]
+        y = self.body_y[games, head]
+        tail = self._tail_slot(games)
+        head_is_tail = (
+            (self.length[games] > 1)
+            & (self.body_x[games, tail] == x)
+            & (self.body_y[games, tail] == y)
+        )
+        collides_with_self = (
+            self.occupancy[games, y * COLUMNS + x].astype(np.int64) - 1 - head_is_tail
+            > 0
+        )
+        out_of_lives = self.lives[games] <= 0
+
+        self.cause_of_death[games[out_of_lives]] = DIED_LIVES
+        self.cause_of_death[games[collides_with_self]] = DIED_SELF
+        self.alive[games[collides_with_self | out_of_lives]] = False
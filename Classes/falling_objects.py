@@ -1,83 +1,302 @@
 from help_functions.const import (
     FALLING_OBJ_SPEED,
-    WINDOW_WIDTH,
-    WINDOW_HEIGHT,
+    BOARD_WIDTH,
+    BOARD_HEIGHT,
     SEGMENT_SIZE,
 )
+from help_functions.image import assets
+import numpy as np
 import pyglet
-import random
+
+# Falling objects use the kind codes of their spawn events: BULLET, SUPER_BULLET and HEART
+OBJECT_KINDS = 3
+OBJECT_IMAGES = (
+    "pictures/bullet.png",
+    "pictures/super_bullet.png",
+    "pictures/heart.png",
+)
+# Hearts fall at half the speed of bullets
+OBJECT_SPEEDS = np.array(
+    [FALLING_OBJ_SPEED, FALLING_OBJ_SPEED, 0.5 * FALLING_OBJ_SPEED], dtype=np.float64
+)
+QUAD_INDICES = (0, 1, 2, 0, 2, 3)
+# Up to this many objects are moved one by one, which is faster than the fixed cost of a few NumPy calls
+SCALAR_LIMIT = 8
 
 
-class FallingObject:
+class FallingObjects:
     """
-    Represents an object that falls from the top of the screen.
+    Holds all bullets, super bullets and hearts falling from the top of the board as parallel arrays
+    of their x, y, previous y, speed and kind. Moving, hit testing and removing objects are each one
+    NumPy operation over all objects instead of a method call per object.
+
+    A handful of objects, as in a normal game, are moved in a plain loop instead, as NumPy calls cost
+    more than they save on so few. Objects are kept in the order they spawned, so hits are reported in
+    spawn order. They are drawn with one vertex list per kind, whose positions are written in bulk every
+    frame.
+
+    The arrays replace the per-column lanes the objects used to be kept in. The broad phase of the hit
+    test is the row band of the head instead of its columns: one comparison over all y coordinates finds
+    the few objects level with the head, and only their x coordinates are looked at. Keeping a count of
+    objects per column up to date on every removal costs more than the hit tests it would skip.
     """
 
-    def __init__(self, image_path):
+    def __init__(self, width=BOARD_WIDTH, height=BOARD_HEIGHT, capacity=64):
         """
-        Initializes a FallingObject instance with a given image path.
+        Initializes an empty set of objects. Nothing is loaded until the objects are drawn, so they
+        can be simulated without a window.
 
         Args:
-            image_path: The path to the image file for this object.
-        """
-        self.image = pyglet.image.load(image_path)
-        self.sprite = pyglet.sprite.Sprite(
-            self.image,
-            x=random.randint(0, WINDOW_WIDTH // SEGMENT_SIZE - 1) * SEGMENT_SIZE
-            + SEGMENT_SIZE // 2,
-            y=WINDOW_HEIGHT - FALLING_OBJ_SPEED + SEGMENT_SIZE // 2,
-        )
+            width (int): Width of the board in pixels.
+            height (int): Height of the board in pixels.
+            capacity (int): Number of objects the arrays hold before they have to grow.
+        """
+        self.width = width
+        self.height = height
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.previous_y = np.zeros(capacity, dtype=np.float64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.batch = None
+
+    def __len__(self):
+        return self.count
 
-    def move(self):
+    def spawn(self, kind, rng):
         """
-        Moves the object down by the size of one segment.
+        Adds an object at a random column at the top of the board.
+
+        Args:
+            kind (int): The kind of object.
+            rng: The random number generator used to pick the column.
         """
-        self.sprite.y -= FALLING_OBJ_SPEED
+        x = (
+            rng.randint(0, self.width // SEGMENT_SIZE - 1) * SEGMENT_SIZE
+            + SEGMENT_SIZE // 2
+        )
+        self.append(kind, x, self.height - FALLING_OBJ_SPEED + SEGMENT_SIZE // 2)
 
-    def draw(self):
+    def append(self, kind, x, y):
         """
-        Draws the object on the screen.
+        Adds an object at a given position, doubling the arrays when they are full.
+
+        Args:
+            kind (int): The kind of object.
+            x: The x coordinate in pixels.
+            y: The y coordinate in pixels.
         """
-        self.sprite.draw()
+        i = self.count
+        if i == len(self.x):
+            for name in ("x", "y", "previous_y", "speed", "kind"):
+                array = getattr(self, name)
+                grown = np.zeros(2 * len(array), dtype=array.dtype)
+                grown[:i] = array
+                setattr(self, name, grown)
+        self.x[i] = x
+        self.y[i] = self.previous_y[i] = y
+        self.speed[i] = OBJECT_SPEEDS[kind]
+        self.kind[i] = kind
+        self.count = i + 1
 
-    def is_off_screen(self):
+    def hits(self, head_x, head_y):
         """
-        Checks if the object has fallen off the screen.
+        Checks which objects collide with the snake's head: the head's corner is within a segment of
+        the object's center on both axes.
+
+        Args:
+            head_x: The x coordinate of the head in pixels.
+            head_y: The y coordinate of the head in pixels.
 
         Returns:
-            A boolean indicating whether the object is off screen.
+            ndarray: A boolean mask over the objects.
+        """
+        n = self.count
+        return (np.abs(self.x[:n] - head_x) <= SEGMENT_SIZE) & (
+            np.abs(self.y[:n] - head_y) <= SEGMENT_SIZE
+        )
+
+    def advance(self, snake):
         """
-        return self.sprite.y < 0
+        Moves every object and removes the ones that hit the snake's head or fell off the board.
 
+        Args:
+            snake (Snake): The snake.
 
-class Bullet(FallingObject):
-    """
-    Represents a bullet falling from the top of the screen.
-    """
+        Returns:
+            list: The kinds of the objects that hit the snake, in the order they spawned.
+        """
+        n = self.count
+        if n == 0:
+            return []
+        if n <= SCALAR_LIMIT:
+            return self.advance_one_by_one(snake)
+        y = self.y[:n]
+        self.previous_y[:n] = y
+        y -= self.speed[:n]
+        head_x, head_y = snake.segments[0]
+        # Few objects are ever level with the head, so the x coordinates are only looked at if one is
+        near = np.abs(y - head_y) <= SEGMENT_SIZE
+        if near.any():
+            hit = near & (np.abs(self.x[:n] - head_x) <= SEGMENT_SIZE)
+            gone = hit | (y < 0)
+        elif y.min() < 0:
+            hit = None
+            gone = y < 0
+        else:
+            return []
+        hits = self.kind[:n][hit].tolist() if hit is not None else []
+        keep = ~gone
+        kept = n - int(np.count_nonzero(gone))
+        for array in (self.x, self.y, self.previous_y, self.speed, self.kind):
+            array[:kept] = array[:n][keep]
+        self.count = kept
+        return hits
 
-    def __init__(self):
-        super().__init__("pictures/bullet.png")
+    def advance_one_by_one(self, snake):
+        """
+        Does what advance does, one object at a time. Gives the same results as the NumPy path.
 
+        Args:
+            snake (Snake): The snake.
 
-class Heart(FallingObject):
-    """
-    Represents a heart falling from the top of the screen.
-    """
+        Returns:
+            list: The kinds of the objects that hit the snake, in the order they spawned.
+        """
+        x, y, previous_y, speed, kind = (
+            self.x,
+            self.y,
+            self.previous_y,
+            self.speed,
+            self.kind,
+        )
+        head_x, head_y = snake.segments[0]
+        hits = []
+        kept = 0
+        for i in range(self.count):
+            old_y = y.item(i)
+            new_y = old_y - speed.item(i)
+            if (
+                -SEGMENT_SIZE <= new_y - head_y <= SEGMENT_SIZE
+                and -SEGMENT_SIZE <= x.item(i) - head_x <= SEGMENT_SIZE
+            ):
+                hits.append(kind.item(i))
+                continue
+            if new_y < 0:
+                continue
+            if kept != i:
+                x[kept] = x[i]
+                speed[kept] = speed[i]
+                kind[kept] = kind[i]
+            y[kept] = new_y
+            previous_y[kept] = old_y
+            kept += 1
+        self.count = kept
+        return hits
 
-    def __init__(self):
-        super().__init__("pictures/heart.png")
+    def load_images(self):
+        """
+        Sets up the batch the objects are drawn with. Called on the first draw; the image and sprite group
+        of a kind are loaded when the first object of that kind is drawn.
+        """
+        self.batch = pyglet.graphics.Batch()
+        self.program = pyglet.sprite.get_default_shader()
+        self.images = [None] * OBJECT_KINDS
+        self.groups = [None] * OBJECT_KINDS
+        self.vertex_lists = [None] * OBJECT_KINDS
+        self.drawn = [0] * OBJECT_KINDS
 
-    def move(self):
+    def reserve_quads(self, kind, count):
         """
-        Moves the object down by the size of one segment.
+        Makes sure the vertex list of a kind has at least count quads, recreating it at the next power of
+        two when it is too small. New quads are hidden by a scale of zero.
+
+        Args:
+            kind (int): The kind of object.
+            count (int): The number of quads needed.
+
+        Returns:
+            VertexList: The vertex list of the kind.
         """
-        self.sprite.y -= 0.5 * FALLING_OBJ_SPEED
+        vertex_list = self.vertex_lists[kind]
+        if vertex_list is not None and vertex_list.count >= 4 * count:
+            return vertex_list
+        if vertex_list is not None:
+            vertex_list.delete()
+        else:
+            image = self.images[kind] = assets.get_image(OBJECT_IMAGES[kind])
+            # Kinds whose images share an atlas texture get equal groups and are drawn in one call
+            self.groups[kind] = pyglet.sprite.SpriteGroup(
+                image,
+                pyglet.gl.GL_SRC_ALPHA,
+                pyglet.gl.GL_ONE_MINUS_SRC_ALPHA,
+                self.program,
+            )
+        quads = 16
+        while quads < count:
+            quads *= 2
+        image = self.images[kind]
+        x1, y1 = -image.anchor_x, -image.anchor_y
+        x2, y2 = x1 + image.width, y1 + image.height
+        indices = [4 * quad + index for quad in range(quads) for index in QUAD_INDICES]
+        vertex_list = self.program.vertex_list_indexed(
+            4 * quads,
+            pyglet.gl.GL_TRIANGLES,
+            indices,
+            self.batch,
+            self.groups[kind],
+            position=("f", (x1, y1, 0, x2, y1, 0, x2, y2, 0, x1, y2, 0) * quads),
+            colors=("Bn", (255, 255, 255, 255) * 4 * quads),
+            translate=("f", (0, 0, 0) * 4 * quads),
+            scale=("f", (0, 0) * 4 * quads),
+            rotation=("f", (0,) * 4 * quads),
+            tex_coords=("f", tuple(image.tex_coords) * quads),
+        )
+        self.vertex_lists[kind] = vertex_list
+        self.drawn[kind] = 0
+        return vertex_list
 
+    def draw(self, alpha=1.0, viewport=None):
+        """
+        Draws the objects on the screen. The interpolated positions of all objects in view are written
+        to the vertex lists in bulk and the batch is drawn.
 
-class SuperBullet(FallingObject):
-    """
-    Represents a super bullet falling from the top of the screen.
-    """
+        Args:
+            alpha (float): How far to interpolate between the previous and the current positions.
+            viewport (tuple, optional): The left, bottom, right and top of the visible part of the board.
+                Objects outside it are not drawn. By default all objects are drawn.
+        """
+        if self.batch is None:
+            self.load_images()
+        n = self.count
+        x = self.x[:n]
+        previous_y = self.previous_y[:n]
+        y = previous_y + (self.y[:n] - previous_y) * alpha
+        kind = self.kind[:n]
+        if viewport is not None:
+            left, bottom, right, top = viewport
+            visible = (
+                (x >= left - SEGMENT_SIZE)
+                & (x <= right + SEGMENT_SIZE)
+                & (y >= bottom - SEGMENT_SIZE)
+                & (y <= top + SEGMENT_SIZE)
+            )
+            x, y, kind = x[visible], y[visible], kind[visible]
 
-    def __init__(self):
-        super().__init__("pictures/super_bullet.png")
+        for k in range(OBJECT_KINDS):
+            selected = kind == k
+            count = int(np.count_nonzero(selected))
+            if count == 0 and self.drawn[k] == 0:
+                continue
+            vertex_list = self.reserve_quads(k, count)
+            translate = np.ctypeslib.as_array(vertex_list.translate).reshape(-1, 4, 3)
+            translate[:count, :, 0] = x[selected][:, None]
+            translate[:count, :, 1] = y[selected][:, None]
+            if count != self.drawn[k]:
+                # Show the quads in use and hide the rest
+                scale = np.ctypeslib.as_array(vertex_list.scale).reshape(-1, 8)
+                scale[:count] = 1
+                scale[count:] = 0
+                self.drawn[k] = count
+        self.batch.draw()
@@ -1,7 +1,6 @@
-import random
 import pyglet
 from abc import ABC, abstractmethod
-from help_functions.const import WINDOW_WIDTH, SEGMENT_SIZE, WINDOW_HEIGHT
+from help_functions.const import SEGMENT_SIZE
 from help_functions.image import load_image
 
 
@@ -10,14 +9,18 @@ class AbstractFood(ABC):
     Abstract base class for all types of food.
     """
 
-    def __init__(self, snake):
+    image_path = None
+
+    def __init__(self, snake, rng):
         """
-        Initialize an AbstractFood instance.
+        Initialize an AbstractFood instance. The sprite is only created when the food is drawn.
 
         Args:
             snake: The snake instance that the food interacts with.
+            rng (random.Random): The random number generator of the game, used to place the food.
         """
         self.snake = snake
+        self.rng = rng
         self.position = self.generate_position()
         self.sprite = None
 
@@ -27,26 +30,17 @@ class AbstractFood(ABC):
         The position aligns with the snake's movement.
 
         Returns:
-            A tuple (x, y) representing the new position of the food.
+            A tuple (x, y) representing the new position of the food, or None if the snake fills the board.
         """
-        while True:
-            x = (
-                random.randint(0, (WINDOW_WIDTH - SEGMENT_SIZE) // SEGMENT_SIZE)
-                * SEGMENT_SIZE
-            )
-            y = (
-                random.randint(1, (WINDOW_HEIGHT - SEGMENT_SIZE) // SEGMENT_SIZE)
-                * SEGMENT_SIZE
-            )
-
-            if (x, y) not in self.snake.segments:
-                return x, y
+        return self.snake.occupancy.sample_free(self.rng)
 
     def draw(self):
         """
         Draw the food on the screen at its current position.
         """
-        if self.position is not None and self.sprite:
+        if self.position is not None:
+            if self.sprite is None:
+                self.sprite = pyglet.sprite.Sprite(load_image(self.image_path))
             self.sprite.x, self.sprite.y = (
                 self.position[0] + SEGMENT_SIZE // 2,
                 self.position[1] + SEGMENT_SIZE // 2,
@@ -66,9 +60,7 @@ class Food(AbstractFood):
     Represents normal food.
     """
 
-    def __init__(self, snake):
-        super().__init__(snake)
-        self.sprite = pyglet.sprite.Sprite(load_image("pictures/food.png"))
+    image_path = "pictures/food.png"
 
     def eat(self):
         super().eat()
@@ -79,9 +71,7 @@ class SuperFood(AbstractFood):
     Represents super food.
     """
 
-    def __init__(self, snake):
-        super().__init__(snake)
-        self.sprite = pyglet.sprite.Sprite(load_image("pictures/super_food.png"))
+    image_path = "pictures/super_food.png"
 
     def eat(self):
         """
@@ -0,0 +1,286 @@
+import random
+from time import perf_counter_ns
+
+from Classes.snake import Snake
+from Classes.food import Food, SuperFood
+from Classes.falling_objects import FallingObjects
+from Classes.spawn_scheduler import (
+    SpawnScheduler,
+    BULLET,
+    SUPER_BULLET,
+    HEART,
+    SUPER_FOOD_RELOCATION,
+)
+from help_functions.const import (
+    BULLET_GEN_BASE_CHANCE,
+    SUPER_BULLET_GEN_BASE_CHANCE,
+    HEART_GEN_CHANCE,
+    BULLET_DIFFICULTY_STEP,
+    SUPER_BULLET_DIFFICULTY_STEP,
+    DIFFICULTY_SCORE_STEP,
+    SUPER_FOOD_SPAWN_CHANCE,
+    SUPER_FOOD_RELOCATE_CHANCE,
+    MAX_LIVES,
+    BOARD_WIDTH,
+    BOARD_HEIGHT,
+)
+
+
+class GameState:
+    """
+    Holds everything that makes up one running game: the snake, the foods, the falling objects, the
+    spawn scheduler and the random number generator all random decisions are drawn from.
+    """
+
+    def __init__(self, seed, width=BOARD_WIDTH, height=BOARD_HEIGHT, compact=False):
+        """
+        Creates a fresh game.
+
+        Args:
+            seed (int): Seed of the game's random number generator, which makes the game reproducible.
+            width (int): Width of the board in pixels.
+            height (int): Height of the board in pixels.
+            compact (bool): Whether the snake stores its body as direction codes, see Snake.
+        """
+        self.seed = seed
+        self.rng = rng = random.Random(seed)
+        self.width = width
+        self.height = height
+        self.snake = Snake(rng, width, height, compact)
+        self.food = Food(self.snake, rng)
+        self.super_food = SuperFood(self.snake, rng)
+        self.objects = FallingObjects(width, height)
+        self.spawner = SpawnScheduler(rng)
+        # The score the spawn chances were last set for
+        self.spawn_score = None
+        self.tick = 0
+        self.foods_eaten = 0
+        self.super_foods_eaten = 0
+        self.game_over = False
+        self.cause_of_death = None
+
+
+class GameEngine:
+    """
+    Window-free simulation of the game rules. The engine advances the game one tick at a time and never
+    touches pyglet, so it can run as fast as the CPU allows.
+    """
+
+    def __init__(
+        self,
+        seed=None,
+        bullet_gen_base_chance=BULLET_GEN_BASE_CHANCE,
+        super_bullet_gen_base_chance=SUPER_BULLET_GEN_BASE_CHANCE,
+        heart_gen_chance=HEART_GEN_CHANCE,
+        bullet_difficulty_step=BULLET_DIFFICULTY_STEP,
+        super_bullet_difficulty_step=SUPER_BULLET_DIFFICULTY_STEP,
+        difficulty_score_step=DIFFICULTY_SCORE_STEP,
+        profiler=None,
+        width=BOARD_WIDTH,
+        height=BOARD_HEIGHT,
+        compact=False,
+        recorder=None,
+    ):
+        """
+        Initializes the engine and starts a new game.
+
+        Args:
+            seed (int, optional): Seed for the game's random number generator, a random 64-bit seed if not
+                given.
+            bullet_gen_base_chance (float): Chance per tick to spawn a bullet before any difficulty increase.
+            super_bullet_gen_base_chance (float): Chance per tick to spawn a super bullet before any difficulty increase.
+            heart_gen_chance (float): Chance per tick to spawn a heart.
+            bullet_difficulty_step (float): Increase of the bullet chance per difficulty level.
+            super_bullet_difficulty_step (float): Increase of the super bullet chance per difficulty level.
+            difficulty_score_step (int): Points needed to reach the next difficulty level.
+            profiler (FrameProfiler, optional): Times the phases of every tick while set.
+            width (int): Width of the board in pixels, a multiple of SEGMENT_SIZE.
+            height (int): Height of the board in pixels, a multiple of SEGMENT_SIZE.
+            compact (bool): Whether the snake stores its body as direction codes, for very long snakes.
+            recorder (ReplayRecorder, optional): Records the actions and the end of the game while set.
+        """
+        self.bullet_gen_base_chance = bullet_gen_base_chance
+        self.super_bullet_gen_base_chance = super_bullet_gen_base_chance
+        self.heart_gen_chance = heart_gen_chance
+        self.bullet_difficulty_step = bullet_difficulty_step
+        self.super_bullet_difficulty_step = super_bullet_difficulty_step
+        self.difficulty_score_step = difficulty_score_step
+        self.profiler = profiler
+        self.width = width
+        self.height = height
+        self.compact = compact
+        self.recorder = recorder
+        self.state = None
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """
+        Starts a new game.
+
+        Args:
+            seed (int, optional): Seed for the new game's random number generator, a random 64-bit seed
+                if not given. The seed is kept in the state, so the game can be replayed.
+
+        Returns:
+            GameState: The state of the new game.
+        """
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.state = GameState(seed, self.width, self.height, self.compact)
+        return self.state
+
+    def settings(self):
+        """
+        Returns the engine arguments that shape a game besides its seed, e.g. to store them with a replay.
+
+        Returns:
+            dict: Keyword arguments for GameEngine.
+        """
+        return {
+            "bullet_gen_base_chance": self.bullet_gen_base_chance,
+            "super_bullet_gen_base_chance": self.super_bullet_gen_base_chance,
+            "heart_gen_chance": self.heart_gen_chance,
+            "bullet_difficulty_step": self.bullet_difficulty_step,
+            "super_bullet_difficulty_step": self.super_bullet_difficulty_step,
+            "difficulty_score_step": self.difficulty_score_step,
+            "width": self.width,
+            "height": self.height,
+            "compact": self.compact,
+        }
+
+    def spawn_chances(self, score):
+        """
+        Computes the spawn chances of bullets and super bullets for a given score.
+
+        Args:
+            score (int): The current score.
+
+        Returns:
+            tuple: The bullet and super bullet chances per tick.
+        """
+        bullet_gen_chance = self.bullet_gen_base_chance
+        super_bullet_gen_chance = self.super_bullet_gen_base_chance
+
+        if score >= self.difficulty_score_step:
+            difficulty_factor = 1 + (
+                (score - self.difficulty_score_step) // self.difficulty_score_step
+            )
+            bullet_gen_chance += difficulty_factor * self.bullet_difficulty_step
+            super_bullet_gen_chance += (
+                difficulty_factor * self.super_bullet_difficulty_step
+            )
+        return bullet_gen_chance, super_bullet_gen_chance
+
+    def step(self, action=None):
+        """
+        Advances the game by one tick. Moves the snake, checks for collision events, generates falling
+        objects, and detects the end of the game.
+
+        Args:
+            action (optional): A direction to steer the snake in before moving, or None to keep going.
+
+        Returns:
+            GameState: The state after the tick.
+        """
+        state = self.state
+        if state.game_over:
+            return state
+
+        snake = state.snake
+        food = state.food
+        super_food = state.super_food
+        rng = state.rng
+        profiler = self.profiler
+        if profiler is not None:
+            start = perf_counter_ns()
+
+        if action is not None:
+            if self.recorder is not None:
+                self.recorder.record(state.tick, action)
+            snake.change_direction(action)
+
+        snake.move()
+        if profiler is not None:
+            start = profiler.record("snake.move", start)
+
+        if snake.collides_with_food(food):
+            food.eat()
+            state.foods_eaten += 1
+            snake.grow(1)
+            snake.score += 1
+            if rng.random() < SUPER_FOOD_SPAWN_CHANCE:
+                super_food.position = super_food.generate_position()
+
+        elif snake.collides_with_food(super_food):
+            super_food.eat()
+            state.super_foods_eaten += 1
+            snake.grow(5)
+            snake.score += 5
+        if profiler is not None:
+            start = profiler.record("food", start)
+
+        objects = state.objects
+        if objects:
+            for kind in objects.advance(snake):
+                # Bullets decrease a life, hearts increase it
+                if kind == BULLET:
+                    snake.lose_life()
+                elif kind == HEART:
+                    if snake.lives < MAX_LIVES:
+                        snake.lives += 1
+                elif kind == SUPER_BULLET:
+                    for _ in range(3):  # Lose life 3 times
+                        snake.lose_life()
+        if profiler is not None:
+            start = profiler.record("objects", start)
+
+        spawner = state.spawner
+        if snake.score != state.spawn_score:
+            # Only kinds whose chance changed, i.e. on a new difficulty level, are redrawn
+            state.spawn_score = snake.score
+            spawner.set_chances(
+                self.spawn_chances(snake.score)
+                + (self.heart_gen_chance, SUPER_FOOD_RELOCATE_CHANCE),
+                state.tick,
+            )
+
+        # Generate Bullets, Super Bullets, and Hearts and relocate the super food when they are due
+        for kind in spawner.pop_due(state.tick):
+            if kind == SUPER_FOOD_RELOCATION:
+                super_food.position = super_food.generate_position()
+            else:
+                objects.spawn(kind, rng)
+        if profiler is not None:
+            profiler.record("spawn", start)
+
+        state.tick += 1
+
+        if snake.collides_with_self():
+            state.game_over = True
+            state.cause_of_death = "self"
+        elif snake.lives <= 0:
+            state.game_over = True
+            state.cause_of_death = "lives"
+        if state.game_over and self.recorder is not None:
+            self.recorder.finish(state.tick, snake.score)
+        return state
+
+    def run(self, n_ticks, controller=None):
+        """
+        Runs the game for up to n_ticks ticks or until it is over.
+
+        Args:
+            n_ticks (int): The maximum number of ticks to run.
+            controller (callable, optional): Called with the state before every tick; its return value is
+                passed to step() as the action.
+
+        Returns:
+            int: The number of ticks that were run.
+        """
+        state = self.state
+        step = self.step
+        ticks = 0
+        while ticks < n_ticks and not state.game_over:
+            step(controller(state) if controller is not None else None)
+            ticks += 1
+        return ticks
@@ -1,5 +1,6 @@
 import pyglet
-from help_functions.const import WINDOW_WIDTH, WINDOW_HEIGHT
+from help_functions.const import WINDOW_WIDTH, WINDOW_HEIGHT, MAX_LIVES
+from help_functions.image import assets
 
 
 class Lifes:
@@ -11,16 +12,26 @@ class Lifes:
             snake (Snake): The Snake object to which the lives correspond.
         """
         self.snake = snake
-        self.heart_image = pyglet.image.load(
-            "pictures/heart.png"
-        )  # Replace with the path to your heart image
+        self.heart_image = assets.get_image("pictures/heart.png")
+        self.batch = pyglet.graphics.Batch()
+        self.heart_sprites = [
+            pyglet.sprite.Sprite(
+                self.heart_image,
+                x=WINDOW_WIDTH - 20 * (i + 1),
+                y=WINDOW_HEIGHT - 20,
+                batch=self.batch,
+            )
+            for i in range(MAX_LIVES)
+        ]
+        self.shown_lives = None
 
     def draw(self):
         """
-        Draws the remaining lives on the screen as heart images.
+        Draws the remaining lives on the screen as heart images. The heart sprites are created once and only
+        shown or hidden when the number of lives changes.
         """
-        for i in range(self.snake.lives):
-            heart_sprite = pyglet.sprite.Sprite(
-                self.heart_image, x=WINDOW_WIDTH - 20 * (i + 1), y=WINDOW_HEIGHT - 20
-            )
-            heart_sprite.draw()
+        if self.snake.lives != self.shown_lives:
+            self.shown_lives = self.snake.lives
+            for i, heart_sprite in enumerate(self.heart_sprites):
+                heart_sprite.visible = i < self.snake.lives
+        self.batch.draw()
@@ -0,0 +1,126 @@
+from array import array
+
+from help_functions.const import WINDOW_WIDTH, WINDOW_HEIGHT, SEGMENT_SIZE
+
+
+class OccupancyGrid:
+    """
+    Counts how many snake segments cover each cell of the board, so that checking whether a cell is
+    occupied is a single array lookup. Positions are given in pixels, like the snake segments. Positions
+    off the board (e.g. segments appended behind the tail while growing) are not tracked.
+
+    The grid also keeps the free cells in an array with a map from cell to array slot. Cells are
+    swap-removed when they become occupied and appended when they become free again, so a uniformly
+    random free cell can be drawn in constant time.
+    """
+
+    def __init__(self, width=WINDOW_WIDTH, height=WINDOW_HEIGHT, min_sample_row=1):
+        """
+        Creates an empty grid.
+
+        Args:
+            width (int): Width of the board in pixels.
+            height (int): Height of the board in pixels.
+            min_sample_row (int): Rows below this one are never sampled, as food does not spawn on them.
+        """
+        self.columns = width // SEGMENT_SIZE
+        self.rows = height // SEGMENT_SIZE
+        self.min_sample_row = min_sample_row
+        self.counts = array("H", bytes(2 * self.columns * self.rows))
+        first = min_sample_row * self.columns
+        self.free_cells = array("l", range(first, self.columns * self.rows))
+        self.free_slots = array("l", [-1] * first + list(range(len(self.free_cells))))
+
+    def cell_index(self, position):
+        """
+        Converts a position to the index of its cell.
+
+        Args:
+            position: A tuple (x, y) in pixels.
+
+        Returns:
+            int: The cell index, or None if the position is off the board.
+        """
+        column = position[0] // SEGMENT_SIZE
+        row = position[1] // SEGMENT_SIZE
+        if 0 <= column < self.columns and 0 <= row < self.rows:
+            return row * self.columns + column
+        return None
+
+    def add(self, position):
+        """
+        Marks one more segment on the cell of the position.
+
+        Args:
+            position: A tuple (x, y) in pixels.
+        """
+        index = self.cell_index(position)
+        if index is not None:
+            self.counts[index] += 1
+            slot = self.free_slots[index]
+            if slot >= 0:  # The cell was free, swap-remove it from the free cells
+                last = self.free_cells.pop()
+                if last != index:
+                    self.free_cells[slot] = last
+                    self.free_slots[last] = slot
+                self.free_slots[index] = -1
+
+    def remove(self, position):
+        """
+        Removes one segment from the cell of the position.
+
+        Args:
+            position: A tuple (x, y) in pixels.
+        """
+        index = self.cell_index(position)
+        if index is not None:
+            self.counts[index] -= 1
+            if self.counts[index] == 0 and index >= self.min_sample_row * self.columns:
+                self.free_slots[index] = len(self.free_cells)
+                self.free_cells.append(index)
+
+    def count(self, position):
+        """
+        Returns the number of segments covering the cell of the position.
+
+        Args:
+            position: A tuple (x, y) in pixels.
+
+        Returns:
+            int: The number of segments on the cell (0 for positions off the board).
+        """
+        column = position[0] // SEGMENT_SIZE
+        row = position[1] // SEGMENT_SIZE
+        if 0 <= column < self.columns and 0 <= row < self.rows:
+            return self.counts[row * self.columns + column]
+        return 0
+
+    def is_free(self, position):
+        """
+        Checks if no segment covers the cell of the position.
+
+        Args:
+            position: A tuple (x, y) in pixels.
+
+        Returns:
+            bool: True if the cell is free, False otherwise.
+        """
+        return self.count(position) == 0
+
+    def sample_free(self, rng):
+        """
+        Draws a uniformly random free cell.
+
+        Args:
+            rng: The random number generator to draw from.
+
+        Returns:
+            A tuple (x, y) in pixels of the lower left corner of the cell, or None if no cell is free.
+        """
+        if not self.free_cells:
+            return None
+        index = self.free_cells[rng.randrange(len(self.free_cells))]
+        return (
+            index % self.columns * SEGMENT_SIZE,
+            index // self.columns * SEGMENT_SIZE,
+        )
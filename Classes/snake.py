@@ -3,20 +3,37 @@ from help_functions.const import (
     SEGMENT_SIZE,
     WINDOW_HEIGHT,
     WINDOW_WIDTH,
-    DOWN_RIGHT,
-    DOWN_LEFT,
-    UP_LEFT,
-    UP_RIGHT,
+    BOARD_WIDTH,
+    BOARD_HEIGHT,
+    RENDER_CHUNK_CELLS,
     MOVE_DICT,
+    MOVE_INTERVAL,
     ROTATIONS,
-    CURVES,
     UP,
     LEFT,
     DOWN,
     RIGHT,
+    OPPOSITE,
+    HEAD,
+    TAIL,
+    direction_from_delta,
+    CURVE_TABLE,
+    SEGMENT_TABLE,
+)
+from help_functions.image import assets
+from help_functions.quad_pool import QuadPool
+from Classes.occupancy_grid import OccupancyGrid
+from Classes.snake_body import SnakeBody
+from collections import deque
+from itertools import chain
+
+# Images indexed by segment kind (HEAD, MIDDLE, CURVE, TAIL)
+SEGMENT_IMAGES = (
+    "pictures/snake_head.png",
+    "pictures/snake_middle.png",
+    "pictures/snake_up_right.png",
+    "pictures/snake_tail.png",
 )
-from help_functions.image import load_image
-import random
 
 
 class Snake:
@@ -25,23 +42,87 @@ class Snake:
     and collide with food, itself, walls, bullets, and other falling objects.
     """
 
-    def __init__(self):
-        self.segments = [
-            (
-                random.randint(0, WINDOW_WIDTH // SEGMENT_SIZE - 1) * SEGMENT_SIZE,
-                random.randint(0, WINDOW_HEIGHT // SEGMENT_SIZE - 1) * SEGMENT_SIZE,
-            )
-        ]
+    def __init__(self, rng, width=BOARD_WIDTH, height=BOARD_HEIGHT, compact=False):
+        """
+        Initializes the snake at a random position. No images are loaded until the snake is drawn,
+        so the snake can be simulated without a window.
+
+        Args:
+            rng (random.Random): The random number generator of the game, used to place the snake.
+            width (int): Width of the board in pixels.
+            height (int): Height of the board in pixels.
+            compact (bool): Whether to store the segments in a SnakeBody of direction codes instead of a
+                deque of positions, for very long snakes. A compact snake grows from its tail as it moves,
+                see grow.
+        """
+        self.width = width
+        self.height = height
+        self.compact = compact
+        self.direction_from_delta = direction_from_delta(width, height)
+        head = (
+            rng.randint(0, width // SEGMENT_SIZE - 1) * SEGMENT_SIZE,
+            rng.randint(0, height // SEGMENT_SIZE - 1) * SEGMENT_SIZE,
+        )
+        if compact:
+            self.segments = SnakeBody(head, width, height)
+        else:
+            self.segments = deque([head])
+        self.occupancy = OccupancyGrid(width, height)
+        self.occupancy.add(self.segments[0])
+        self.previous_head = self.segments[0]
         self.direction = UP
         self.lives = 3
-        self.head_image = load_image("pictures/snake_head.png")
-        self.middle_image = load_image("pictures/snake_middle.png")
-        self.tail_image = load_image("pictures/snake_tail.png")
-        self.middle_right_up_image = load_image("pictures/snake_up_right.png")
-        self.head_sprite = pyglet.sprite.Sprite(self.head_image)
+        self.batch = None
         self.score = 0
         self.move_counter = 0
         self.growth_due = 0
+        # Counters of body changes, so the renderer only has to look at the segments that changed
+        self.heads_added = 0
+        self.tail_changes = 0
+
+    def load_images(self):
+        """
+        Loads the snake images and sets up the batches the snake is drawn with. Called on the first draw.
+        """
+        # Every image in its four rotations, indexed by segment kind (HEAD, MIDDLE, CURVE, TAIL) and
+        # quarter turns clockwise, so segments are drawn as unrotated quads
+        self.segment_regions = tuple(
+            tuple(assets.get_rotated_image(path, 90 * turns) for turns in range(4))
+            for path in SEGMENT_IMAGES
+        )
+        # A board that fits the window is drawn with one batch. A larger board is split into chunks of
+        # RENDER_CHUNK_CELLS cells with a batch each, so only the chunks in view are drawn.
+        self.batch = pyglet.graphics.Batch()
+        self.batches = {(0, 0): self.batch}
+        if self.width <= WINDOW_WIDTH and self.height <= WINDOW_HEIGHT:
+            self.chunk_size = None
+        else:
+            self.chunk_size = RENDER_CHUNK_CELLS * SEGMENT_SIZE
+        # Same layering as drawing one by one: head first, then the tail, then the middle segments
+        head_group = pyglet.graphics.Group(order=0)
+        tail_group = pyglet.graphics.Group(order=1)
+        middle_group = pyglet.graphics.Group(order=2)
+        # Layers indexed by segment kind
+        self.segment_groups = (head_group, middle_group, middle_group, tail_group)
+        # Region and layer of a middle segment, indexed by [incoming][outgoing] like SEGMENT_TABLE
+        self.middle_states = tuple(
+            tuple(
+                (
+                    self.segment_regions[kind][rotation % 360 // 90],
+                    self.segment_groups[kind],
+                )
+                for kind, rotation in row
+            )
+            for row in SEGMENT_TABLE
+        )
+        self.program = pyglet.sprite.get_default_shader()
+        # One pool of quads per chunk, layer and atlas texture, created when first needed
+        self.quad_pools = {}
+        # One [pool, quad, drawn state] entry per segment, aligned with self.segments
+        self.segment_quads = deque()
+        self.drawn_heads = self.heads_added
+        self.drawn_tail_changes = self.tail_changes
+        self.drawn_direction = None
 
     def move(self):
         """
@@ -49,27 +130,30 @@ class Snake:
         If the snake is not due to grow, the last segment is removed after moving.
         """
         self.move_counter += 1
-        if self.move_counter < 4:  # Only move the snake once every 4 frames
+        if self.move_counter < MOVE_INTERVAL:  # Only move the snake once every 4 frames
             return
         self.move_counter = 0
 
-        x, y = self.segments[0]
+        x, y = self.previous_head = self.segments[0]
         dx, dy = MOVE_DICT[self.direction]
         x += dx
         y += dy
         if x < 0:
-            x = WINDOW_WIDTH - SEGMENT_SIZE
-        elif x >= WINDOW_WIDTH:
+            x = self.width - SEGMENT_SIZE
+        elif x >= self.width:
             x = 0
         if y < 0:
-            y = WINDOW_HEIGHT - SEGMENT_SIZE
-        elif y >= WINDOW_HEIGHT:
+            y = self.height - SEGMENT_SIZE
+        elif y >= self.height:
             y = 0
-        self.segments.insert(0, (x, y))
+        self.segments.appendleft((x, y))
+        self.occupancy.add((x, y))
+        self.heads_added += 1
         if self.growth_due > 0:  # Check if the snake is due to grow
             self.growth_due -= 1  # If so, decrement growth_due
-        else:
-            self.segments.pop()  # If not, remove the last segment
+        else:  # If not, remove the last segment
+            self.occupancy.remove(self.segments.pop())
+            self.tail_changes += 1
 
     def get_direction(self, segment1, segment2):
         """
@@ -80,23 +164,16 @@ class Snake:
             segment2: The destination segment (a tuple of x and y coordinates)
 
         Returns:
-            The direction from segment1 to segment2 as a string ('UP', 'DOWN', 'LEFT', 'RIGHT').
-        """
-        x1, y1 = segment1
-        x2, y2 = segment2
-        if abs(x1 - x2) == WINDOW_WIDTH - SEGMENT_SIZE:  # If segments at opposite edges
-            if x1 < x2:
-                return LEFT
-            else:
-                return RIGHT
-        elif x1 < x2:
-            return RIGHT
-        elif x1 > x2:
-            return LEFT
-        elif y1 < y2:
-            return UP
-        else:
-            return DOWN
+            The direction code from segment1 to segment2 (UP, RIGHT, DOWN or LEFT).
+        """
+        direction = self.direction_from_delta.get(
+            (segment2[0] - segment1[0], segment2[1] - segment1[1])
+        )
+        if direction is None:  # Not neighbours, fall back to the dominant axis
+            if segment1[0] != segment2[0]:
+                return RIGHT if segment1[0] < segment2[0] else LEFT
+            return UP if segment1[1] < segment2[1] else DOWN
+        return direction
 
     def lose_life(self):
         """
@@ -110,102 +187,274 @@ class Snake:
         Changes the direction of the snake if the new direction is not the opposite of the current direction.
 
         Args:
-            new_direction: The new direction for the snake as a string ('UP', 'DOWN', 'LEFT', 'RIGHT').
+            new_direction: The new direction code for the snake (UP, RIGHT, DOWN or LEFT).
         """
-        if new_direction in [UP, DOWN, LEFT, RIGHT]:
-            if new_direction == UP and self.direction != DOWN:
-                self.direction = UP
-            elif new_direction == DOWN and self.direction != UP:
-                self.direction = DOWN
-            elif new_direction == LEFT and self.direction != RIGHT:
-                self.direction = LEFT
-            elif new_direction == RIGHT and self.direction != LEFT:
-                self.direction = RIGHT
+        if (
+            new_direction in (UP, RIGHT, DOWN, LEFT)
+            and new_direction != OPPOSITE[self.direction]
+        ):
+            self.direction = new_direction
 
-    def get_curve(self, i):
+    def get_curve(self, i, segments=None):
         """
         Calculates the curve direction between three consecutive segments.
 
         Args:
             i: The index of the middle segment in the segments list.
+            segments (optional): The segments to use instead of the snake's own.
 
         Returns:
-            The curve direction as a string ('UP_RIGHT', 'UP_LEFT', 'DOWN_RIGHT', 'DOWN_LEFT') or None if no curve.
-        """
-        prev_direction = self.get_direction(self.segments[i - 1], self.segments[i])
-        next_direction = self.get_direction(self.segments[i], self.segments[i + 1])
-        if prev_direction == UP and next_direction == RIGHT:
-            return UP_RIGHT
-        elif prev_direction == UP and next_direction == LEFT:
-            return UP_LEFT
-        elif prev_direction == DOWN and next_direction == RIGHT:
-            return DOWN_RIGHT
-        elif prev_direction == DOWN and next_direction == LEFT:
-            return DOWN_LEFT
-        elif prev_direction == RIGHT and next_direction == DOWN:
-            return UP_LEFT
-        elif prev_direction == RIGHT and next_direction == UP:
-            return DOWN_LEFT
-        elif prev_direction == LEFT and next_direction == UP:
-            return DOWN_RIGHT
-        elif prev_direction == LEFT and next_direction == DOWN:
-            return UP_RIGHT
-        else:
-            return None
+            The curve code (UP_RIGHT, DOWN_RIGHT, DOWN_LEFT or UP_LEFT) or None if no curve.
+        """
+        if segments is None:
+            segments = self.segments
+        prev_direction = self.get_direction(segments[i - 1], segments[i])
+        next_direction = self.get_direction(segments[i], segments[i + 1])
+        return CURVE_TABLE[prev_direction][next_direction]
 
-    def draw(self):
+    def get_render_state(self, i, segments):
         """
-        Draws the snake on the screen. The head, body, and tail of the snake are drawn separately, and the body includes curves if the snake turns.
+        Calculates how the segment at index i is drawn.
+
+        Args:
+            i: The index of the segment.
+            segments: The segments, or an indexable copy of them.
+
+        Returns:
+            tuple: The pre-rotated region, layer group, x and y of the segment's quad.
         """
-        self.head_sprite.rotation = ROTATIONS.get(self.direction, None)
-        self.head_sprite.x, self.head_sprite.y = (
-            self.segments[0][0] + SEGMENT_SIZE // 2,
-            self.segments[0][1] + SEGMENT_SIZE // 2,
-        )
-        self.head_sprite.draw()
-        if len(self.segments) > 1:
-            tail_direction = self.get_direction(self.segments[-2], self.segments[-1])
-            tail_sprite = pyglet.sprite.Sprite(self.tail_image)
-            tail_sprite.rotation = ROTATIONS.get(tail_direction, None)
-            tail_sprite.x, tail_sprite.y = (
-                self.segments[-1][0] + SEGMENT_SIZE // 2,
-                self.segments[-1][1] + SEGMENT_SIZE // 2,
-            )
-            tail_sprite.draw()
-        for i in range(1, len(self.segments) - 1):
-            segment = self.segments[i]
-            curve = self.get_curve(i)
-            if curve:
-                middle_image = self.middle_right_up_image
-                rotation = CURVES.get(curve, None)
-            else:
-                middle_image = self.middle_image
-                middle_direction = self.get_direction(
-                    self.segments[i - 1], self.segments[i + 1]
+        segment = segments[i]
+        if i == 0:
+            kind, rotation = HEAD, ROTATIONS[self.direction]
+        elif i == len(segments) - 1:
+            kind = TAIL
+            rotation = ROTATIONS[self.get_direction(segments[-2], segment)]
+        else:
+            previous = segments[i - 1]
+            following = segments[i + 1]
+            table = self.direction_from_delta
+            incoming = table.get((segment[0] - previous[0], segment[1] - previous[1]))
+            outgoing = table.get((following[0] - segment[0], following[1] - segment[1]))
+            if (
+                incoming is not None
+                and outgoing is not None
+                and outgoing != OPPOSITE[incoming]
+            ):
+                # Neighbours that don't double back, the common case: one lookup gives the region
+                # and the layer
+                region, group = self.middle_states[incoming][outgoing]
+                return (
+                    region,
+                    group,
+                    segment[0] + SEGMENT_SIZE // 2,
+                    segment[1] + SEGMENT_SIZE // 2,
                 )
-                rotation = ROTATIONS.get(middle_direction, None)
-            middle_sprite = pyglet.sprite.Sprite(middle_image)
-            middle_sprite.rotation = rotation
-            middle_sprite.x, middle_sprite.y = (
-                segment[0] + SEGMENT_SIZE // 2,
-                segment[1] + SEGMENT_SIZE // 2,
+            incoming = self.get_direction(previous, segment)
+            outgoing = self.get_direction(segment, following)
+            kind, rotation = SEGMENT_TABLE[incoming][outgoing]
+            if outgoing == OPPOSITE[incoming]:  # Doubles back right after a grow
+                rotation = ROTATIONS[self.get_direction(previous, following)]
+        return (
+            self.segment_regions[kind][rotation % 360 // 90],
+            self.segment_groups[kind],
+            segment[0] + SEGMENT_SIZE // 2,
+            segment[1] + SEGMENT_SIZE // 2,
+        )
+
+    def sync_quads(self):
+        """
+        Brings the pooled segment quads in line with the segments. Every quad stays with its segment and
+        caches the render state it was last drawn with. Only the segments around the new heads and the
+        changed tail are recomputed, so the cost depends on what changed since the last draw, not on the
+        length of the snake.
+        """
+        new_heads = self.heads_added - self.drawn_heads
+        tail_changes = self.tail_changes - self.drawn_tail_changes
+        if (
+            not new_heads
+            and not tail_changes
+            and self.direction == self.drawn_direction
+        ):
+            return
+        self.drawn_heads = self.heads_added
+        self.drawn_tail_changes = self.tail_changes
+        self.drawn_direction = self.direction
+
+        segments = self.segments
+        quads = self.segment_quads
+        length = len(segments)
+        new_heads = min(new_heads, length)
+        for _ in range(new_heads):
+            quads.appendleft([None, None, None])
+        while len(quads) > length:
+            pool, quad, _ = quads.pop()
+            pool.release(quad)
+        first_new = len(quads)
+        while len(quads) < length:
+            quads.append([None, None, None])
+
+        # The new heads and the old head, which became a neck or curve
+        head_end = min(new_heads + 2, length)
+        # The segments whose neighbours changed at the tail end, and any new quads
+        tail_start = first_new
+        if tail_changes:
+            tail_start = min(tail_start, length - tail_changes - 2)
+        for i in chain(range(head_end), range(max(tail_start, head_end), length)):
+            self.update_quad(quads[i], self.get_render_state(i, segments))
+
+    def update_quad(self, entry, state):
+        """
+        Updates the quad of a segment to a new render state, touching only the attributes that changed.
+        The quad moves to another pool if the segment changed chunk, layer or atlas texture.
+
+        Args:
+            entry: The [pool, quad, drawn state] entry of the segment.
+            state: The new render state from get_render_state.
+        """
+        drawn = entry[2]
+        if state == drawn:
+            return
+        region, group, x, y = state
+        pool = self.quad_pool(region, group, x, y)
+        if pool is not entry[0]:
+            if entry[0] is not None:
+                entry[0].release(entry[1])
+            entry[0] = pool
+            entry[1] = pool.acquire(region, x, y)
+        else:
+            if drawn[0] is not region:
+                pool.set_region(entry[1], region)
+            if drawn[2] != x or drawn[3] != y:
+                pool.set_position(entry[1], x, y)
+        entry[2] = state
+
+    def quad_pool(self, region, group, x, y):
+        """
+        Returns the pool of quads a region is drawn from at a position, creating it if needed.
+
+        Args:
+            region (TextureRegion): The region to draw.
+            group (Group): The layer to draw it in.
+            x: The x coordinate in pixels.
+            y: The y coordinate in pixels.
+
+        Returns:
+            QuadPool: The pool of the chunk, layer and atlas texture.
+        """
+        batch = self.chunk_batch(x, y)
+        key = (batch, group, region.id)
+        pool = self.quad_pools.get(key)
+        if pool is None:
+            sprite_group = pyglet.sprite.SpriteGroup(
+                region,
+                pyglet.gl.GL_SRC_ALPHA,
+                pyglet.gl.GL_ONE_MINUS_SRC_ALPHA,
+                self.program,
+                group,
             )
-            middle_sprite.draw()
+            pool = self.quad_pools[key] = QuadPool(batch, sprite_group)
+        return pool
+
+    def chunk_batch(self, x, y):
+        """
+        Returns the batch of the chunk a position is in, creating it if needed.
+
+        Args:
+            x: The x coordinate in pixels.
+            y: The y coordinate in pixels.
+
+        Returns:
+            Batch: The batch of the chunk.
+        """
+        if self.chunk_size is None:
+            return self.batch
+        key = (int(x // self.chunk_size), int(y // self.chunk_size))
+        batch = self.batches.get(key)
+        if batch is None:
+            batch = self.batches[key] = pyglet.graphics.Batch()
+        return batch
+
+    def interpolated_head(self, alpha=1.0):
+        """
+        Calculates where the head is drawn between its previous and current position. The head moves
+        once every MOVE_INTERVAL ticks, so it is interpolated over the ticks since its last move.
+
+        Args:
+            alpha (float): How far the time is between the last tick and the next one, from 0 to 1.
+
+        Returns:
+            tuple: The x and y coordinates in pixels.
+        """
+        x, y = self.segments[0]
+        previous_x, previous_y = self.previous_head
+        # Positions more than one segment apart are a wrap-around, which is not interpolated
+        if abs(x - previous_x) <= SEGMENT_SIZE and abs(y - previous_y) <= SEGMENT_SIZE:
+            progress = min((self.move_counter + alpha) / MOVE_INTERVAL, 1.0)
+            x = previous_x + (x - previous_x) * progress
+            y = previous_y + (y - previous_y) * progress
+        return x, y
+
+    def draw(self, alpha=1.0, viewport=None):
+        """
+        Draws the snake on the screen. The head, body, and tail of the snake are pooled quads of pre-rotated
+        images in the batches of the board chunks they are in, and the body includes curves if the snake
+        turns.
+
+        Args:
+            alpha (float): How far the time is between the last tick and the next one, from 0 to 1.
+            viewport (tuple, optional): The left, bottom, right and top of the visible part of the board in
+                pixels. Only the chunks overlapping it are drawn. The whole snake is drawn if not given.
+        """
+        if self.batch is None:
+            self.load_images()
+        self.sync_quads()
+        x, y = self.interpolated_head(alpha)
+        pool, quad, _ = self.segment_quads[0]
+        pool.set_position(quad, x + SEGMENT_SIZE // 2, y + SEGMENT_SIZE // 2)
+
+        if viewport is None or self.chunk_size is None:
+            for batch in self.batches.values():
+                batch.draw()
+            return
+        # One segment of margin, as the head is drawn between two cells
+        left, bottom, right, top = viewport
+        size = self.chunk_size
+        for column in range(
+            int((left - SEGMENT_SIZE) // size), int((right + SEGMENT_SIZE) // size) + 1
+        ):
+            for row in range(
+                int((bottom - SEGMENT_SIZE) // size),
+                int((top + SEGMENT_SIZE) // size) + 1,
+            ):
+                batch = self.batches.get((column, row))
+                if batch is not None:
+                    batch.draw()
 
     def grow(self, segments):
         """
-        Increases the length of the snake by a specified number of segments.
+        Increases the length of the snake by a specified number of segments. The segments are added behind
+        the tail at once, and the snake also keeps its tail for as many moves, so it ends up 2 * segments
+        longer, as it always has.
+
+        A compact snake only holds segments on the board, so instead of adding segments behind its tail it
+        keeps its tail for all 2 * segments moves. It ends up as long as the other snake, but gets there one
+        segment per move.
 
         Args:
             segments: The number of segments to add to the snake.
         """
 
+        if self.compact:
+            self.growth_due += 2 * segments
+            return
         self.growth_due += segments
         dx, dy = MOVE_DICT[self.direction]
         last_segment = self.segments[-1]
         for _ in range(segments):
             new_segment = (last_segment[0] - dx, last_segment[1] - dy)
             self.segments.append(new_segment)
+            self.occupancy.add(new_segment)
+        self.tail_changes += segments
 
     def collides_with_food(self, food):
         """
@@ -228,12 +477,20 @@ class Snake:
 
     def collides_with_self(self):
         """
-        Checks if the snake's head collides with its body.
+        Checks if the snake's head collides with its body. The tail does not count, as it moves
+        out of the way in the same step.
 
         Returns:
             True if the snake's head collides with its body, False otherwise.
         """
-        return self.segments[0] in self.segments[1:-1]
+        segments = self.segments
+        if len(segments) < 3:
+            return False
+        head = segments[0]
+        others = self.occupancy.count(head) - 1
+        if segments[-1] == head:
+            others -= 1
+        return others > 0
 
     def collides_with_wall(self):
         """
@@ -244,7 +501,7 @@ class Snake:
         """
 
         x, y = self.segments[0]
-        return x < 0 or x >= WINDOW_WIDTH or y < 0 or y >= WINDOW_HEIGHT
+        return x < 0 or x >= self.width or y < 0 or y >= self.height
 
     def collides_with_bullet(self, bullet):
         """
@@ -257,24 +514,8 @@ class Snake:
             True if the snake's head collides with the bullet, False otherwise.
         """
         head_x, head_y = self.segments[0]
-        bullet_x, bullet_y = bullet.sprite.x, bullet.sprite.y
+        bullet_x, bullet_y = bullet.x, bullet.y
         return (
             abs(head_x - bullet_x) <= SEGMENT_SIZE / 2
             and abs(head_y - bullet_y) <= SEGMENT_SIZE / 2
         )
-
-    def collides_with_object(self, obj):
-        """
-        Checks if the snake's head collides with a given object.
-
-        Args:
-            obj: The object to check for collision with.
-
-        Returns:
-            True if the snake's head collides with the object, False otherwise.
-        """
-        head_x, head_y = self.segments[0]
-        obj_x, obj_y = obj.sprite.x, obj.sprite.y
-        return (
-            abs(head_x - obj_x) <= SEGMENT_SIZE and abs(head_y - obj_y) <= SEGMENT_SIZE
-        )
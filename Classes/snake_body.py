@@ -0,0 +1,153 @@
+from help_functions.const import (
+    BOARD_WIDTH,
+    BOARD_HEIGHT,
+    MOVE_DICT,
+    direction_from_delta,
+)
+
+
+class SnakeBody:
+    """
+    Compact body of a very long snake. Instead of one (x, y) tuple per segment, only the head and tail
+    positions are stored, plus the direction of every step between neighbouring segments as a 2-bit code,
+    four to a byte, in a ring buffer. A segment takes a quarter of a byte instead of a tuple of two ints.
+
+    Supports the part of the deque interface the snake uses: len(), indexing, iteration from the head,
+    appendleft() of a new head next to the current one and pop() of the tail. Positions are decoded by
+    walking the codes from the head, the tail or the last looked up segment, whichever is closest, so
+    looking up the segments one after another costs one step each.
+    """
+
+    def __init__(self, head, width=BOARD_WIDTH, height=BOARD_HEIGHT, capacity=64):
+        """
+        Creates a body of a single segment.
+
+        Args:
+            head: A tuple (x, y) in pixels, the only segment.
+            width (int): Width of the board in pixels.
+            height (int): Height of the board in pixels.
+            capacity (int): Number of steps the ring buffer holds before it has to grow.
+        """
+        self.width = width
+        self.height = height
+        self.direction_from_delta = direction_from_delta(width, height)
+        self.head = self.tail = tuple(head)
+        self.codes = bytearray((capacity + 3) // 4)
+        self.capacity = 4 * len(self.codes)
+        # The steps are kept oldest (at the tail) first, starting at slot start of the ring
+        self.start = 0
+        self.steps = 0
+        # The (index, position) of the last looked up segment
+        self.cursor = None
+
+    def __len__(self):
+        return self.steps + 1
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + self.codes.__sizeof__()
+
+    def get_code(self, step):
+        """
+        Returns the direction code of a step.
+
+        Args:
+            step (int): The index of the step, 0 being the one next to the tail.
+
+        Returns:
+            int: The direction code.
+        """
+        slot = (self.start + step) % self.capacity
+        return self.codes[slot >> 2] >> ((slot & 3) << 1) & 3
+
+    def appendleft(self, position):
+        """
+        Adds a new head next to the current one.
+
+        Args:
+            position: A tuple (x, y) in pixels, a neighbour of the head through the wrap-around or not.
+
+        Raises:
+            ValueError: If the position is not a neighbour of the head.
+        """
+        x, y = position
+        head_x, head_y = self.head
+        code = self.direction_from_delta.get((x - head_x, y - head_y))
+        if code is None or x == head_x and y == head_y:
+            raise ValueError(f"{position} is not next to the head {self.head}")
+        capacity = self.capacity
+        if self.steps == capacity:
+            # Unroll the ring into a buffer twice the size
+            codes = bytearray(2 * len(self.codes))
+            for step in range(self.steps):
+                codes[step >> 2] |= self.get_code(step) << ((step & 3) << 1)
+            self.codes = codes
+            self.start = 0
+            capacity = self.capacity = 4 * len(codes)
+        slot = (self.start + self.steps) % capacity
+        shift = (slot & 3) << 1
+        codes = self.codes
+        codes[slot >> 2] = codes[slot >> 2] & ~(3 << shift) | code << shift
+        self.steps += 1
+        self.head = (x, y)
+        if self.cursor is not None:
+            self.cursor = (self.cursor[0] + 1, self.cursor[1])
+
+    def pop(self):
+        """
+        Removes the tail.
+
+        Returns:
+            tuple: The position of the removed tail.
+
+        Raises:
+            IndexError: If the body has a single segment.
+        """
+        if self.steps == 0:
+            raise IndexError("pop from a snake body of one segment")
+        tail = self.tail
+        start = self.start
+        dx, dy = MOVE_DICT[self.codes[start >> 2] >> ((start & 3) << 1) & 3]
+        self.tail = ((tail[0] + dx) % self.width, (tail[1] + dy) % self.height)
+        self.start = (start + 1) % self.capacity
+        self.steps -= 1
+        if self.cursor is not None and self.cursor[0] > self.steps:
+            self.cursor = None
+        return tail
+
+    def __getitem__(self, index):
+        steps = self.steps
+        if index < 0:
+            index += steps + 1
+        if not 0 <= index <= steps:
+            raise IndexError("snake body index out of range")
+        if index == 0:
+            return self.head
+        if index == steps:
+            return self.tail
+
+        # Walk from the closest known segment
+        start, (x, y) = 0, self.head
+        if steps - index < index:
+            start, (x, y) = steps, self.tail
+        cursor = self.cursor
+        if cursor is not None and abs(cursor[0] - index) < abs(start - index):
+            start, (x, y) = cursor
+        width, height = self.width, self.height
+        # Segment i is one step of code steps - i away from segment i - 1
+        for i in range(start + 1, index + 1):
+            dx, dy = MOVE_DICT[self.get_code(steps - i)]
+            x, y = (x - dx) % width, (y - dy) % height
+        for i in range(start, index, -1):
+            dx, dy = MOVE_DICT[self.get_code(steps - i)]
+            x, y = (x + dx) % width, (y + dy) % height
+        self.cursor = (index, (x, y))
+        return x, y
+
+    def __iter__(self):
+        x, y = self.head
+        yield x, y
+        width, height = self.width, self.height
+        for step in range(self.steps - 1, -1, -1):
+            dx, dy = MOVE_DICT[self.get_code(step)]
+            x, y = (x - dx) % width, (y - dy) % height
+            yield x, y
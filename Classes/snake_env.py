@@ -0,0 +1,289 @@
+import random
+
+import numpy as np
+
+from Classes.batch_engine import NO_ACTION
+from Classes.game_engine import GameEngine
+from help_functions.const import SEGMENT_SIZE, MOVE_INTERVAL, BOARD_WIDTH, BOARD_HEIGHT
+
+# Channels of an observation, each a grid of rows x columns with row 0 at the bottom of the board. The
+# falling object channels are ordered like the object kinds, so kind k is on channel BULLETS + k.
+BODY, HEAD, FOOD, SUPER_FOOD, BULLETS, SUPER_BULLETS, HEARTS = range(7)
+CHANNELS = 7
+
+
+class SnakeEnv:
+    """
+    Reinforcement learning environment around GameEngine, with the reset/step interface of Gym.
+
+    Actions are direction codes, or NO_ACTION to keep going. An observation is a uint8 array of shape
+    (CHANNELS, rows, columns) marking the cells of the body, the head, the foods and the falling objects.
+    It is written in place into one preallocated buffer, and only the cells that changed are touched each
+    step; step() and reset() return the buffer itself, so copy it to keep an observation.
+    """
+
+    def __init__(
+        self,
+        ticks_per_step=MOVE_INTERVAL,
+        max_ticks=None,
+        life_reward=1.0,
+        death_reward=-10.0,
+        observation=None,
+        **engine_args,
+    ):
+        """
+        Creates the environment. Call reset() before the first step.
+
+        Args:
+            ticks_per_step (int): Engine ticks per step. By default a step is one move of the snake.
+            max_ticks (int, optional): Ticks after which a game is cut off, unlimited if not given.
+            life_reward (float): Reward per life gained, and minus the reward per life lost.
+            death_reward (float): Reward for the step the game is lost on.
+            observation (ndarray, optional): The buffer to write the observations to, e.g. a slice of a
+                VecEnv's buffer. Allocated if not given.
+            **engine_args: Arguments of the GameEngine, e.g. the spawn chances or the board size.
+        """
+        self.engine = GameEngine(**engine_args)
+        self.ticks_per_step = ticks_per_step
+        self.max_ticks = max_ticks
+        self.life_reward = life_reward
+        self.death_reward = death_reward
+        self.columns = self.engine.width // SEGMENT_SIZE
+        self.rows = self.engine.height // SEGMENT_SIZE
+        shape = (CHANNELS, self.rows, self.columns)
+        if observation is None:
+            observation = np.zeros(shape, dtype=np.uint8)
+        elif observation.shape != shape or observation.dtype != np.uint8:
+            raise ValueError(f"the observation buffer must be a uint8 array of {shape}")
+        self.observation = observation
+        # Views of the buffer with the cells of every channel flattened, indexed like the OccupancyGrid
+        self.cells = observation.reshape(CHANNELS, self.rows * self.columns)
+        self.flat = observation.reshape(-1)
+        self.object_indices = np.zeros(0, dtype=np.intp)
+
+    @property
+    def state(self):
+        """The GameState of the current game."""
+        return self.engine.state
+
+    def cell_index(self, position):
+        """
+        Converts a position to the index of its cell.
+
+        Args:
+            position: A tuple (x, y) in pixels, or None.
+
+        Returns:
+            int: The cell index, or None if the position is None or off the board.
+        """
+        if position is None:
+            return None
+        return self.engine.state.snake.occupancy.cell_index(position)
+
+    def reset(self, seed=None):
+        """
+        Starts a new game and builds its observation from scratch.
+
+        Args:
+            seed (int, optional): Seed of the game, a random 64-bit seed if not given.
+
+        Returns:
+            ndarray: The observation buffer.
+        """
+        state = self.engine.reset(seed)
+        snake = state.snake
+        self.observation.fill(0)
+        counts = snake.occupancy.counts
+        body = self.cells[BODY]
+        for segment in snake.segments:
+            index = self.cell_index(segment)
+            if index is not None:
+                body[index] = counts[index] > 0
+        self.head = self.cell_index(snake.segments[0])
+        self.cells[HEAD, self.head] = 1
+        self.food = self.super_food = None
+        self.update_foods()
+        self.object_indices = np.zeros(0, dtype=np.intp)
+        self.update_objects()
+        self.score = snake.score
+        self.lives = snake.lives
+        return self.observation
+
+    def tick(self, action):
+        """
+        Advances the game by one tick and updates the body and head cells that changed.
+
+        Args:
+            action: The direction code to steer in, or None to keep going.
+        """
+        state = self.engine.state
+        snake = state.snake
+        segments = snake.segments
+        tail = segments[-1]
+        heads_added = snake.heads_added
+        tail_changes = snake.tail_changes
+        self.engine.step(action)
+        if snake.heads_added == heads_added and snake.tail_changes == tail_changes:
+            return
+
+        # The cells that can have gained or lost a segment: the new head, the old tail and the segments
+        # a grow appended behind the tail
+        counts = snake.occupancy.counts
+        body = self.cells[BODY]
+        changed = [segments[0], tail]
+        grown = min(snake.tail_changes - tail_changes, len(segments))
+        changed.extend(segments[-i] for i in range(1, grown + 1))
+        for segment in changed:
+            index = self.cell_index(segment)
+            if index is not None:
+                body[index] = counts[index] > 0
+        head = self.cell_index(segments[0])
+        if head != self.head:
+            self.cells[HEAD, self.head] = 0
+            self.cells[HEAD, head] = 1
+            self.head = head
+
+    def update_foods(self):
+        """
+        Moves the food cells to the current positions of the foods.
+        """
+        state = self.engine.state
+        for channel, attribute, food in (
+            (FOOD, "food", state.food),
+            (SUPER_FOOD, "super_food", state.super_food),
+        ):
+            index = self.cell_index(food.position)
+            previous = getattr(self, attribute)
+            if index != previous:
+                if previous is not None:
+                    self.cells[channel, previous] = 0
+                if index is not None:
+                    self.cells[channel, index] = 1
+                setattr(self, attribute, index)
+
+    def update_objects(self):
+        """
+        Clears the falling object cells of the last step and marks the current ones.
+        """
+        objects = self.engine.state.objects
+        n = objects.count
+        self.flat[self.object_indices] = 0
+        columns = (objects.x[:n] // SEGMENT_SIZE).astype(np.intp)
+        rows = (objects.y[:n] // SEGMENT_SIZE).astype(np.intp)
+        # Objects spawn just above the top row
+        on_board = rows < self.rows
+        size = self.rows * self.columns
+        self.object_indices = (
+            (BULLETS + objects.kind[:n][on_board].astype(np.intp)) * size
+            + rows[on_board] * self.columns
+            + columns[on_board]
+        )
+        self.flat[self.object_indices] = 1
+
+    def step(self, action):
+        """
+        Advances the game by ticks_per_step ticks, steering in the given direction on the first one.
+
+        Args:
+            action (int): A direction code, or NO_ACTION to keep going.
+
+        Returns:
+            tuple: The observation buffer, the reward, whether the game is done, and an info dict with the
+                score, lives, tick, cause of death and whether the game was cut off at max_ticks.
+        """
+        state = self.engine.state
+        snake = state.snake
+        action = None if action is None or action == NO_ACTION else int(action)
+        for _ in range(self.ticks_per_step):
+            self.tick(action)
+            action = None
+            if state.game_over:
+                break
+        self.update_foods()
+        self.update_objects()
+
+        reward = (snake.score - self.score) + self.life_reward * (
+            snake.lives - self.lives
+        )
+        self.score = snake.score
+        self.lives = snake.lives
+        truncated = (
+            not state.game_over
+            and self.max_ticks is not None
+            and state.tick >= self.max_ticks
+        )
+        if state.game_over:
+            reward += self.death_reward
+        info = {
+            "score": snake.score,
+            "lives": snake.lives,
+            "tick": state.tick,
+            "cause_of_death": state.cause_of_death,
+            "truncated": truncated,
+        }
+        return self.observation, reward, state.game_over or truncated, info
+
+
+class VecEnv:
+    """
+    Runs several SnakeEnvs side by side. The observations of all of them are slices of one preallocated
+    buffer of shape (n_envs, CHANNELS, rows, columns), and games that are done are reset right away, so a
+    step always returns the observations of running games.
+    """
+
+    def __init__(self, n_envs, seed=None, **env_args):
+        """
+        Creates the environments. Call reset() before the first step.
+
+        Args:
+            n_envs (int): The number of environments.
+            seed (int, optional): Seed of the generator the seeds of all games are drawn from, so a run of
+                the environments is reproducible.
+            **env_args: Arguments of every SnakeEnv and its GameEngine.
+        """
+        env_args.pop("observation", None)
+        rows = env_args.get("height", BOARD_HEIGHT) // SEGMENT_SIZE
+        columns = env_args.get("width", BOARD_WIDTH) // SEGMENT_SIZE
+        self.observations = np.zeros((n_envs, CHANNELS, rows, columns), dtype=np.uint8)
+        self.envs = [
+            SnakeEnv(observation=self.observations[i], **env_args)
+            for i in range(n_envs)
+        ]
+        self.rewards = np.zeros(n_envs, dtype=np.float32)
+        self.dones = np.zeros(n_envs, dtype=bool)
+        self.seeds = random.Random(seed)
+
+    def __len__(self):
+        return len(self.envs)
+
+    def reset(self):
+        """
+        Starts a new game in every environment.
+
+        Returns:
+            ndarray: The observation buffer.
+        """
+        for env in self.envs:
+            env.reset(self.seeds.getrandbits(64))
+        return self.observations
+
+    def step(self, actions):
+        """
+        Steps every environment and resets the ones whose game is done.
+
+        Args:
+            actions: One direction code or NO_ACTION per environment.
+
+        Returns:
+            tuple: The observation buffer, the rewards, the done flags and the list of info dicts. The
+                info of a game that was reset holds the score and cause of death it ended with.
+        """
+        rewards = self.rewards
+        dones = self.dones
+        infos = []
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            _, rewards[i], dones[i], info = env.step(action)
+            if dones[i]:
+                env.reset(self.seeds.getrandbits(64))
+            infos.append(info)
+        return self.observations, rewards, dones, infos
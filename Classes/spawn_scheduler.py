@@ -0,0 +1,101 @@
+import heapq
+from math import log, log1p
+
+# Kinds of spawn events, in the order events due on the same tick are handled
+BULLET, SUPER_BULLET, HEART, SUPER_FOOD_RELOCATION = range(4)
+SPAWN_KINDS = 4
+
+
+class SpawnScheduler:
+    """
+    Decides on which ticks things spawn. Instead of rolling a chance for every kind on every tick, the
+    tick of the next spawn of each kind is drawn once from the geometric distribution of the waiting
+    time, and the due ticks are kept in a priority queue. A tick without a due event costs a single
+    comparison. Because the waiting time is memoryless, redrawing it whenever a chance changes gives the
+    same spawn statistics as the per-tick rolls.
+
+    Events can also be scheduled on given ticks, e.g. to script waves of bullets in a test.
+    """
+
+    def __init__(self, rng):
+        """
+        Initializes a scheduler without any events. Nothing spawns until set_chances is called.
+
+        Args:
+            rng (random.Random): The random number generator waiting times are drawn from.
+        """
+        self.rng = rng
+        self.heap = []
+        self.chances = [0.0] * SPAWN_KINDS
+        # Bumped on every redraw, so events drawn with an old chance are skipped when popped
+        self.generations = [0] * SPAWN_KINDS
+
+    def set_chances(self, chances, tick):
+        """
+        Sets the chance per tick of every kind and redraws the next spawn of the kinds whose chance
+        changed.
+
+        Args:
+            chances (tuple): The chance per tick of each kind, indexed by kind.
+            tick (int): The current tick, the first one the new chances apply to.
+        """
+        for kind, chance in enumerate(chances):
+            if chance != self.chances[kind]:
+                self.chances[kind] = chance
+                self._draw(kind, tick)
+
+    def _draw(self, kind, tick):
+        """
+        Draws the next spawn of a kind from the geometric distribution of its chance.
+
+        Args:
+            kind (int): The kind of event.
+            tick (int): The first tick the event may be due on.
+        """
+        self.generations[kind] += 1
+        chance = self.chances[kind]
+        if chance <= 0:
+            return
+        if chance >= 1:
+            wait = 0
+        else:
+            # Number of failed rolls before the first success, 1 - random() is never 0
+            wait = int(log(1.0 - self.rng.random()) / log1p(-chance))
+        heapq.heappush(self.heap, (tick + wait, kind, self.generations[kind]))
+
+    def schedule(self, kind, tick, count=1, interval=1):
+        """
+        Schedules extra events on given ticks, independent of the chances.
+
+        Args:
+            kind (int): The kind of event.
+            tick (int): The tick of the first event.
+            count (int): The number of events.
+            interval (int): The number of ticks between the events.
+        """
+        for i in range(count):
+            heapq.heappush(self.heap, (tick + i * interval, kind, None))
+
+    def pop_due(self, tick):
+        """
+        Removes the events due on or before a tick and draws the next spawn of their kinds.
+
+        Args:
+            tick (int): The current tick.
+
+        Returns:
+            list: The kinds of the due events, in the order they should be handled.
+        """
+        heap = self.heap
+        if not heap or heap[0][0] > tick:
+            return ()
+        due = []
+        generations = self.generations
+        while heap and heap[0][0] <= tick:
+            _, kind, generation = heapq.heappop(heap)
+            if generation is None:
+                due.append(kind)
+            elif generation == generations[kind]:
+                due.append(kind)
+                self._draw(kind, tick + 1)
+        return due
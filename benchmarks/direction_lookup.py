@@ -0,0 +1,157 @@
+"""
+Micro-benchmark of resolving how one middle snake segment is drawn with Snake.get_render_state: the
+string if/elif chains the snake used before against the direction code lookup tables in
+help_functions.const. Both run through the Snake method, so the call and tuple building overhead
+around the lookup is included. Each variant is timed several times and the median is reported,
+with the spread between the fastest and the slowest run, so a difference smaller than the spread
+should not be read as a speedup.
+
+Run from the repository root with: python -m benchmarks.direction_lookup
+"""
+
+import random
+import statistics
+import timeit
+
+from Classes.snake import Snake
+from help_functions.const import (
+    WINDOW_WIDTH,
+    SEGMENT_SIZE,
+    MOVE_DICT,
+)
+
+# The string constants and dictionaries of the if/elif implementation
+LEGACY_ROTATIONS = {"right": -90, "left": 90, "up": 180, "down": 0}
+LEGACY_CURVES = {"up_right": 0, "down_right": 270, "up_left": 90, "down_left": 180}
+
+
+def legacy_direction(segment1, segment2):
+    x1, y1 = segment1
+    x2, y2 = segment2
+    if abs(x1 - x2) == WINDOW_WIDTH - SEGMENT_SIZE:
+        if x1 < x2:
+            return "left"
+        else:
+            return "right"
+    elif x1 < x2:
+        return "right"
+    elif x1 > x2:
+        return "left"
+    elif y1 < y2:
+        return "up"
+    else:
+        return "down"
+
+
+def legacy_curve(previous, segment, following):
+    prev_direction = legacy_direction(previous, segment)
+    next_direction = legacy_direction(segment, following)
+    if prev_direction == "up" and next_direction == "right":
+        return "up_right"
+    elif prev_direction == "up" and next_direction == "left":
+        return "up_left"
+    elif prev_direction == "down" and next_direction == "right":
+        return "down_right"
+    elif prev_direction == "down" and next_direction == "left":
+        return "down_left"
+    elif prev_direction == "right" and next_direction == "down":
+        return "up_left"
+    elif prev_direction == "right" and next_direction == "up":
+        return "down_left"
+    elif prev_direction == "left" and next_direction == "up":
+        return "down_right"
+    elif prev_direction == "left" and next_direction == "down":
+        return "up_right"
+    else:
+        return None
+
+
+def legacy_segment(previous, segment, following):
+    curve = legacy_curve(previous, segment, following)
+    if curve:
+        return "curve", LEGACY_CURVES.get(curve, None)
+    return "middle", LEGACY_ROTATIONS.get(legacy_direction(previous, following), None)
+
+
+class LegacySnake(Snake):
+    """
+    A snake that resolves its segments with the if/elif chains, like the snake before the tables.
+    """
+
+    def get_render_state(self, i, segments):
+        segment = segments[i]
+        if i == 0:
+            image, group = self.head_image, self.head_group
+            rotation = LEGACY_ROTATIONS.get(self.legacy_direction, None)
+        elif i == len(segments) - 1:
+            image, group = self.tail_image, self.tail_group
+            rotation = LEGACY_ROTATIONS.get(
+                legacy_direction(segments[-2], segment), None
+            )
+        else:
+            group = self.middle_group
+            kind, rotation = legacy_segment(segments[i - 1], segment, segments[i + 1])
+            image = self.middle_right_up_image if kind == "curve" else self.middle_image
+        return (
+            image,
+            rotation,
+            group,
+            segment[0] + SEGMENT_SIZE // 2,
+            segment[1] + SEGMENT_SIZE // 2,
+        )
+
+
+def make_snake(cls):
+    """
+    Creates a snake whose images and groups are placeholders, so its segments can be resolved without
+    a window.
+    """
+    snake = cls(random.Random(0))
+    snake.legacy_direction = "up"
+    snake.head_image = snake.middle_image = snake.middle_right_up_image = None
+    snake.tail_image = snake.head_group = snake.middle_group = snake.tail_group = None
+    snake.segment_regions = ((None,) * 4,) * 4
+    snake.segment_groups = (None,) * 4
+    snake.middle_states = (((None, None),) * 4,) * 4
+    return snake
+
+
+def random_body(length, seed=0):
+    """
+    Builds a random walk of segments (without wrap-around) to resolve.
+    """
+    rng = random.Random(seed)
+    body = [(0, 0)]
+    direction = 0
+    for _ in range(length - 1):
+        if rng.random() < 0.3:
+            direction = (direction + rng.choice((1, 3))) % 4
+        dx, dy = MOVE_DICT[direction]
+        body.append((body[-1][0] - dx, body[-1][1] - dy))
+    return body
+
+
+def main(length=10_000, repeat=15):
+    body = random_body(length)
+    middle = range(1, length - 1)
+
+    for name, cls in (
+        ("if/elif chains", LegacySnake),
+        ("tables", Snake),
+    ):
+        resolve = make_snake(cls).get_render_state
+
+        def run():
+            for i in middle:
+                resolve(i, body)
+
+        times = timeit.repeat(run, number=1, repeat=repeat)
+        median = statistics.median(times) / len(middle) * 1e9
+        spread = (max(times) - min(times)) / len(middle) * 1e9
+        print(
+            f"{name:>15}: {median:8.1f} ns per segment (median, spread {spread:.1f} ns)"
+        )
+
+
+if __name__ == "__main__":
+    main()
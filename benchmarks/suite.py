@@ -0,0 +1,501 @@
+"""
+Benchmark suite of the hot paths of the game: moving the snake, the collision checks, placing food,
+drawing the snake and the falling objects, a full engine tick and planning a move of the autopilot,
+swept over snake lengths, falling object counts and board fill ratios. Runs headless; drawing is
+benchmarked in a hidden EGL window and skipped if no OpenGL context can be created. Images whose files
+are missing are drawn as plain squares.
+
+Run from the repository root with:
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --baseline results.json
+
+With --baseline, every case is compared against the stored results and cases whose median got slower
+by more than --threshold are flagged as regressions; the exit status is then 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from collections import deque
+from time import perf_counter_ns
+
+import pyglet
+
+# Must be set before any window is created
+pyglet.options["headless"] = True
+
+from Classes.autopilot import Autopilot
+from Classes.falling_objects import FallingObjects, OBJECT_IMAGES
+from Classes.food import Food
+from Classes.game_engine import GameEngine
+from Classes.spawn_scheduler import BULLET, SUPER_BULLET, HEART
+from Classes.occupancy_grid import OccupancyGrid
+from Classes.snake import Snake
+from Classes.snake_body import SnakeBody
+from help_functions.camera import Camera
+from help_functions.image import assets
+from help_functions.const import (
+    WINDOW_WIDTH,
+    WINDOW_HEIGHT,
+    SEGMENT_SIZE,
+    MOVE_INTERVAL,
+    UP,
+)
+
+COLUMNS = WINDOW_WIDTH // SEGMENT_SIZE
+ROWS = WINDOW_HEIGHT // SEGMENT_SIZE
+
+SNAKE_LENGTHS = (10, 100, 1000, 10_000)
+OBJECT_COUNTS = (0, 10, 100, 1000, 5000)
+FILL_RATIOS = (0.1, 0.5, 0.9, 0.99)
+
+LONG_SNAKE_LENGTHS = (10_000, 1_000_000)  # Moved on a board of 1000x1000 cells
+
+QUICK_SNAKE_LENGTHS = (10, 1000)
+QUICK_LONG_SNAKE_LENGTHS = (10_000,)
+QUICK_OBJECT_COUNTS = (0, 1000)
+QUICK_FILL_RATIOS = (0.5, 0.99)
+
+BATCH_TIME_NS = 2_000_000  # Calibrated duration of one timed batch
+DEFAULT_THRESHOLD = 0.10  # Relative slowdown of the median that counts as a regression
+
+
+def serpentine(length, columns=COLUMNS, rows=ROWS):
+    """
+    Builds snake segments, head first, that walk the board in a serpentine from the top row down and
+    start over at the top once the board is full, so every length up to the number of cells covers
+    distinct cells.
+
+    Args:
+        length (int): The number of segments.
+        columns (int): The number of columns of the board.
+        rows (int): The number of rows of the board.
+
+    Returns:
+        list: The segments as (x, y) tuples in pixels.
+    """
+    cells = []
+    for row in range(rows - 1, -1, -1):
+        if len(cells) >= length:
+            break
+        order = (
+            range(columns) if (rows - 1 - row) % 2 == 0 else range(columns - 1, -1, -1)
+        )
+        cells.extend((column * SEGMENT_SIZE, row * SEGMENT_SIZE) for column in order)
+    return [cells[i % len(cells)] for i in range(length)]
+
+
+def make_snake(length, seed=0, cells=None, compact=False):
+    """
+    Creates a snake with the given number of segments laid out by serpentine().
+
+    Args:
+        length (int): The number of segments.
+        seed (int): Seed of the snake's random number generator.
+        cells (int, optional): Columns and rows of a square board, the window's board if not given.
+        compact (bool): Whether the snake stores its body as direction codes.
+
+    Returns:
+        Snake: The snake, heading up and out of the board's top row.
+    """
+    if cells is None:
+        snake = Snake(random.Random(seed), compact=compact)
+        segments = serpentine(length)
+    else:
+        size = cells * SEGMENT_SIZE
+        snake = Snake(random.Random(seed), size, size, compact)
+        segments = serpentine(length, cells, cells)
+    if compact:
+        snake.segments = SnakeBody(segments[-1], snake.width, snake.height)
+        for segment in reversed(segments[:-1]):
+            snake.segments.appendleft(segment)
+    else:
+        snake.segments = deque(segments)
+    snake.occupancy = OccupancyGrid(snake.width, snake.height)
+    for segment in snake.segments:
+        snake.occupancy.add(segment)
+    snake.direction = UP
+    return snake
+
+
+def make_objects(count, seed=0):
+    """
+    Creates falling objects spread over the whole height of the board.
+
+    Args:
+        count (int): The number of objects.
+        seed (int): Seed of the random number generator placing them.
+
+    Returns:
+        FallingObjects: The objects.
+    """
+    rng = random.Random(seed)
+    kinds = (BULLET, BULLET, BULLET, HEART, SUPER_BULLET)
+    objects = FallingObjects()
+    for _ in range(count):
+        objects.spawn(rng.choice(kinds), rng)
+        objects.y[objects.count - 1] = objects.previous_y[objects.count - 1] = (
+            rng.uniform(0, WINDOW_HEIGHT)
+        )
+    return objects
+
+
+def measure(run, setup=None, repeat=30):
+    """
+    Times a callable. The number of calls per batch is calibrated so a batch takes about
+    BATCH_TIME_NS, then repeat batches are timed, each after calling setup.
+
+    Args:
+        run (callable): The code to time.
+        setup (callable, optional): Prepares the state for a batch, not timed.
+        repeat (int): The number of timed batches.
+
+    Returns:
+        dict: The median, p95 and minimum time per call in nanoseconds, the calls per second at the
+            median, and the number of calls per batch.
+    """
+    number = 1
+    while True:
+        if setup is not None:
+            setup()
+        start = perf_counter_ns()
+        for _ in range(number):
+            run()
+        elapsed = perf_counter_ns() - start
+        if elapsed >= BATCH_TIME_NS or number >= 1 << 20:
+            break
+        number *= 2
+
+    per_call = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = perf_counter_ns()
+        for _ in range(number):
+            run()
+        per_call.append((perf_counter_ns() - start) / number)
+    per_call.sort()
+    median = statistics.median(per_call)
+    return {
+        "median_ns": median,
+        "p95_ns": per_call[(len(per_call) - 1) * 95 // 100],
+        "min_ns": per_call[0],
+        "ops_per_s": 1e9 / median if median else None,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def bench_move(length, cells=None, compact=False):
+    """Times Snake.move with a snake of the given length."""
+    snake = make_snake(length, cells=cells, compact=compact)
+
+    def run():
+        # Every call moves a whole segment instead of only counting towards the next move
+        snake.move_counter = MOVE_INTERVAL - 1
+        snake.move()
+
+    return measure(run)
+
+
+def bench_collides_with_self(length):
+    """Times Snake.collides_with_self with a snake of the given length."""
+    snake = make_snake(length)
+    return measure(snake.collides_with_self)
+
+
+def bench_object_hits(length, count):
+    """Times checking the head of a snake of the given length against count falling objects."""
+    snake = make_snake(length)
+    objects = make_objects(count)
+    head_x, head_y = snake.segments[0]
+    return measure(lambda: objects.hits(head_x, head_y))
+
+
+def bench_generate_position(fill_ratio):
+    """Times AbstractFood.generate_position with the given share of the board covered by the snake."""
+    snake = make_snake(max(1, round(fill_ratio * COLUMNS * ROWS)))
+    food = Food(snake, random.Random(0))
+    return measure(food.generate_position)
+
+
+def bench_draw(length, cells=None):
+    """Times moving and drawing a snake of the given length, the incremental path of every frame."""
+    snake = make_snake(length, cells=cells)
+    camera = Camera(WINDOW_WIDTH, WINDOW_HEIGHT, snake.width, snake.height)
+    snake.draw()
+
+    def run():
+        snake.move_counter = MOVE_INTERVAL - 1
+        snake.move()
+        camera.follow(*snake.segments[0])
+        snake.draw(viewport=camera.viewport)
+
+    return measure(run)
+
+
+def placeholder_assets(paths):
+    """
+    Puts a plain square into the image cache for every given image file that is missing, so drawing can
+    still be timed without it.
+
+    Args:
+        paths (tuple): Paths of the image files a case loads.
+    """
+    for path in paths:
+        if not os.path.exists(path) and (path, False) not in assets.regions:
+            pattern = pyglet.image.SolidColorImagePattern((255, 0, 255, 255))
+            image = pattern.create_image(SEGMENT_SIZE, SEGMENT_SIZE)
+            assets.regions[(path, False)] = assets.add_to_atlas(image)
+
+
+def bench_draw_objects(count):
+    """Times drawing count falling objects, which writes all their positions to the GPU every frame."""
+    placeholder_assets(OBJECT_IMAGES)
+    objects = make_objects(count)
+    objects.draw()
+    return measure(lambda: objects.draw(0.5))
+
+
+def bench_tick(count):
+    """Times a full GameEngine.step with count falling objects on the board."""
+    engine = GameEngine(seed=0)
+
+    def setup():
+        # A short straight snake never runs into itself, and enough lives keep the game going
+        state = engine.reset(0)
+        snake = state.snake
+        snake.segments = deque((0, y * SEGMENT_SIZE) for y in range(9, -1, -1))
+        snake.occupancy = OccupancyGrid()
+        for segment in snake.segments:
+            snake.occupancy.add(segment)
+        snake.direction = UP
+        snake.lives = 10**9
+        state.objects = make_objects(count)
+
+    result = measure(engine.step, setup)
+    # Every batch replays the same seeded game, so checking the last one covers them all
+    if engine.state.game_over:
+        raise RuntimeError("the game ended during the engine.step benchmark")
+    return result
+
+
+def bench_autopilot(length, count):
+    """Times planning a move of the Autopilot from scratch, with count falling objects on the board."""
+    state = GameEngine(seed=0).state
+    state.snake = make_snake(length)
+    state.objects = make_objects(count)
+    pilot = Autopilot()
+    pilot.attach(state)
+
+    def run():
+        # Dropping the kept path makes every call search a new one
+        pilot.path.clear()
+        pilot.decide(state)
+
+    return measure(run)
+
+
+def create_gl_context():
+    """
+    Creates a hidden window so the drawing benchmarks have an OpenGL context.
+
+    Returns:
+        str: Why no context could be created, or None if it was.
+    """
+    try:
+        pyglet.window.Window(WINDOW_WIDTH, WINDOW_HEIGHT, visible=False)
+    except Exception as error:  # No display, no EGL, no GPU driver, ...
+        return f"{type(error).__name__}: {error}"
+    return None
+
+
+def cases(quick=False):
+    """
+    Lists the benchmark cases.
+
+    Args:
+        quick (bool): Whether to use the smaller sweeps.
+
+    Returns:
+        list: (name, needs OpenGL, callable) tuples.
+    """
+    lengths = QUICK_SNAKE_LENGTHS if quick else SNAKE_LENGTHS
+    counts = QUICK_OBJECT_COUNTS if quick else OBJECT_COUNTS
+    fill_ratios = QUICK_FILL_RATIOS if quick else FILL_RATIOS
+
+    listed = []
+    for length in lengths:
+        listed.append(
+            (f"snake.move[length={length}]", False, lambda n=length: bench_move(n))
+        )
+    for length in QUICK_LONG_SNAKE_LENGTHS if quick else LONG_SNAKE_LENGTHS:
+        for compact in (False, True):
+            body = ",compact" if compact else ""
+            listed.append(
+                (
+                    f"snake.move[board=1000x1000{body},length={length}]",
+                    False,
+                    lambda n=length, c=compact: bench_move(n, 1000, c),
+                )
+            )
+    for length in lengths:
+        listed.append(
+            (
+                f"snake.collides_with_self[length={length}]",
+                False,
+                lambda n=length: bench_collides_with_self(n),
+            )
+        )
+    for count in counts:
+        listed.append(
+            (
+                f"objects.hits[length=100,objects={count}]",
+                False,
+                lambda c=count: bench_object_hits(100, c),
+            )
+        )
+    for fill_ratio in fill_ratios:
+        listed.append(
+            (
+                f"food.generate_position[fill={fill_ratio}]",
+                False,
+                lambda f=fill_ratio: bench_generate_position(f),
+            )
+        )
+    for length in lengths:
+        listed.append(
+            (f"snake.draw[length={length}]", True, lambda n=length: bench_draw(n))
+        )
+    for length in lengths:
+        listed.append(
+            (
+                f"snake.draw[board=1000x1000,length={length}]",
+                True,
+                lambda n=length: bench_draw(n, 1000),
+            )
+        )
+    for count in counts:
+        listed.append(
+            (
+                f"objects.draw[objects={count}]",
+                True,
+                lambda c=count: bench_draw_objects(c),
+            )
+        )
+    for count in counts:
+        listed.append(
+            (f"engine.step[objects={count}]", False, lambda c=count: bench_tick(c))
+        )
+    for count in counts:
+        listed.append(
+            (
+                f"autopilot.plan[length=100,objects={count}]",
+                False,
+                lambda c=count: bench_autopilot(100, c),
+            )
+        )
+    return listed
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares results against a baseline.
+
+    Args:
+        results (dict): The current results, keyed by case name.
+        baseline (dict): The baseline results, keyed by case name.
+        threshold (float): Relative slowdown of the median that counts as a regression.
+
+    Returns:
+        list: The names of the cases that regressed.
+    """
+    regressions = []
+    print(f"\n{'case':<55}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None or "median_ns" not in result or "median_ns" not in before:
+            continue
+        change = result["median_ns"] / before["median_ns"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<55}{before['median_ns']:>10.0f}ns{result['median_ns']:>10.0f}ns"
+            f"{change:>+9.1%}{flag}"
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument(
+        "--baseline", help="compare against the results in this JSON file"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="relative slowdown that counts as a regression (default: %(default)s)",
+    )
+    parser.add_argument("--quick", action="store_true", help="run smaller sweeps")
+    parser.add_argument(
+        "--filter", default="", help="only run cases containing this text"
+    )
+    args = parser.parse_args(argv)
+
+    gl_error = None
+    listed = [case for case in cases(args.quick) if args.filter in case[0]]
+    if any(needs_gl for _, needs_gl, _ in listed):
+        gl_error = create_gl_context()
+
+    results = {}
+    for name, needs_gl, bench in listed:
+        if needs_gl and gl_error is not None:
+            results[name] = {"skipped": gl_error}
+            print(f"{name:<55} skipped ({gl_error})")
+            continue
+        results[name] = result = bench()
+        print(
+            f"{name:<55}{result['median_ns']:>12.0f} ns"
+            f"{result['p95_ns']:>12.0f} ns p95{result['ops_per_s']:>14,.0f} /s"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "meta": {
+                        "python": platform.python_version(),
+                        "implementation": platform.python_implementation(),
+                        "machine": platform.machine(),
+                        "pyglet": pyglet.version,
+                        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    },
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+        print(f"\nNo regressions above {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+from pyglet.math import Mat4, Vec3
+
+from help_functions.const import SEGMENT_SIZE
+
+
+class Camera:
+    """
+    Shows the part of the board around a point, usually the snake's head, when the board is larger than
+    the window. The camera stays inside the board, so on a board the size of the window it never moves.
+    """
+
+    def __init__(self, view_width, view_height, board_width, board_height):
+        """
+        Initializes the camera at the bottom left corner of the board.
+
+        Args:
+            view_width (int): Width of the visible area in pixels.
+            view_height (int): Height of the visible area in pixels.
+            board_width (int): Width of the board in pixels.
+            board_height (int): Height of the board in pixels.
+        """
+        self.view_width = view_width
+        self.view_height = view_height
+        self.board_width = board_width
+        self.board_height = board_height
+        self.x = 0
+        self.y = 0
+        self.previous_view = None
+
+    def follow(self, x, y):
+        """
+        Centers the camera on a position, as far as the board edges allow.
+
+        Args:
+            x: The x coordinate in pixels.
+            y: The y coordinate in pixels.
+        """
+        x += SEGMENT_SIZE // 2 - self.view_width // 2
+        y += SEGMENT_SIZE // 2 - self.view_height // 2
+        self.x = round(max(0, min(x, self.board_width - self.view_width)))
+        self.y = round(max(0, min(y, self.board_height - self.view_height)))
+
+    @property
+    def viewport(self):
+        """The left, bottom, right and top of the visible part of the board in pixels."""
+        return (self.x, self.y, self.x + self.view_width, self.y + self.view_height)
+
+    def is_visible(self, x, y, margin=SEGMENT_SIZE):
+        """
+        Checks if a position is in view.
+
+        Args:
+            x: The x coordinate in pixels.
+            y: The y coordinate in pixels.
+            margin (int): How far outside the view a position still counts as visible, so that sprites
+                overlapping the edge are drawn.
+
+        Returns:
+            bool: True if the position is in view, False otherwise.
+        """
+        return (
+            self.x - margin <= x <= self.x + self.view_width + margin
+            and self.y - margin <= y <= self.y + self.view_height + margin
+        )
+
+    def begin(self, window):
+        """
+        Makes the window draw the board as seen by the camera until end is called.
+
+        Args:
+            window (Window): The window drawn to.
+        """
+        self.previous_view = window.view
+        window.view = self.previous_view @ Mat4.from_translation(
+            Vec3(-self.x, -self.y, 0)
+        )
+
+    def end(self, window):
+        """
+        Restores the view of the window, e.g. to draw labels on top of the board.
+
+        Args:
+            window (Window): The window drawn to.
+        """
+        window.view = self.previous_view
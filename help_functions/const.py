@@ -3,40 +3,136 @@
 WINDOW_WIDTH = 400
 WINDOW_HEIGHT = 600
 
+# Size of the board in pixels. A board larger than the window is drawn through a camera following the
+# snake's head.
+BOARD_WIDTH = WINDOW_WIDTH
+BOARD_HEIGHT = WINDOW_HEIGHT
+RENDER_CHUNK_CELLS = (
+    16  # Side of the squares of cells drawn with one batch on a large board
+)
+
 SEGMENT_SIZE = 20  # The size of each snake segment
 SEGMENT_SPEED = SEGMENT_SIZE
 FALLING_OBJ_SPEED = SEGMENT_SIZE / 4
 
-# Directions as string constants
-UP = "up"
-DOWN = "down"
-LEFT = "left"
-RIGHT = "right"
-UP_RIGHT = "up_right"
-DOWN_RIGHT = "down_right"
-UP_LEFT = "up_left"
-DOWN_LEFT = "down_left"
-
-# Dictionary mapping directions to rotations in degrees
-ROTATIONS = {
-    RIGHT: -90,
-    LEFT: 90,
-    UP: 180,
-    DOWN: 0,
-}
-
-# Dictionary mapping curve directions to rotations in degrees
-CURVES = {
-    UP_RIGHT: 0,
-    DOWN_RIGHT: 270,
-    UP_LEFT: 90,
-    DOWN_LEFT: 180,
-}
-
-# Dictionary mapping directions to movement in terms of (x, y) coordinates
-MOVE_DICT = {
-    UP: (0, SEGMENT_SPEED),
-    DOWN: (0, -SEGMENT_SPEED),
-    LEFT: (-SEGMENT_SPEED, 0),
-    RIGHT: (SEGMENT_SPEED, 0),
-}
+TICK_RATE = 90  # Simulation ticks per second
+MOVE_INTERVAL = 4  # The snake moves once every MOVE_INTERVAL ticks
+MAX_CATCH_UP_TICKS = 10  # Most simulation ticks run in one frame to catch up
+MAX_LIVES = 5
+
+# Spawn chances per tick and how they scale with the score
+BULLET_GEN_BASE_CHANCE = 0.004
+SUPER_BULLET_GEN_BASE_CHANCE = 0.00025
+HEART_GEN_CHANCE = 0.0005
+BULLET_DIFFICULTY_STEP = 0.0015
+SUPER_BULLET_DIFFICULTY_STEP = 0.0003
+DIFFICULTY_SCORE_STEP = 7  # Points needed to reach the next difficulty level
+SUPER_FOOD_SPAWN_CHANCE = 0.05  # Chance to respawn the super food on eating food
+SUPER_FOOD_RELOCATE_CHANCE = 1 / 1001  # Chance per tick to relocate the super food
+
+# High scores: the full history, one score per line, and the index holding the best of them
+HIGH_SCORES_FILE = "highscores.txt"
+HIGH_SCORES_INDEX_FILE = "highscores.idx"
+HIGH_SCORE_COUNT = 3  # Number of high scores kept and shown
+HIGH_SCORE_QUEUE_SIZE = 64  # Most scores waiting to be written
+
+# Replays: one file per game with its seed, settings and the actions of the player
+REPLAY_DIR = "replays"
+
+# Autopilot
+AUTOPILOT_MAX_NODES = 1024  # Most cells the path searches of one autopilot move expand
+AUTOPILOT_ESCAPE_NODES = 64  # Most cells counted per neighbour when no path is safe
+ATTRACT_MODE = False  # Whether the autopilot plays a demo game behind the start screen, which never idles
+
+# Bot tournaments
+TOURNAMENT_MAX_TICKS = 100_000  # Ticks after which a tournament game is cut off
+TOURNAMENT_PROGRESS_INTERVAL = 1.0  # Seconds between progress reports
+
+# Difficulty curve analyzer
+DIFFICULTY_MODEL_GAMES = 10_000  # Games sampled per schedule
+DIFFICULTY_BLOCK_TICKS = 1024  # Ticks sampled at once
+DIFFICULTY_CALIBRATION_GAMES = 200  # Full games played to calibrate a player model
+
+# Frame profiler
+PROFILER_SAMPLES = 600  # Recent durations kept per phase for the percentiles
+PROFILER_EVENTS = 20000  # Recent events kept for the trace
+PROFILER_TRACE_FILE = "profile_trace.json"
+PROFILER_OVERLAY_INTERVAL = 0.5  # Seconds between refreshes of the on-screen overlay
+
+# Directions as integer codes, clockwise so that the opposite of direction d is (d + 2) % 4
+UP, RIGHT, DOWN, LEFT = range(4)
+OPPOSITE = (DOWN, LEFT, UP, RIGHT)
+
+# Curves as integer codes
+UP_RIGHT, DOWN_RIGHT, DOWN_LEFT, UP_LEFT = range(4)
+
+# Kinds of snake segment images
+HEAD, MIDDLE, CURVE, TAIL = range(4)
+
+# Rotations in degrees, indexed by direction code
+ROTATIONS = (180, -90, 0, 90)
+
+# Rotations in degrees of the curve image, indexed by curve code
+CURVES = (0, 270, 180, 90)
+
+# Movement in terms of (x, y) coordinates, indexed by direction code
+MOVE_DICT = (
+    (0, SEGMENT_SPEED),
+    (SEGMENT_SPEED, 0),
+    (0, -SEGMENT_SPEED),
+    (-SEGMENT_SPEED, 0),
+)
+
+
+def direction_from_delta(width, height):
+    """
+    Builds the table of the direction from one segment to the next, keyed by the (dx, dy) between them.
+    Segments on opposite edges of the board are neighbours through the wrap-around. Equal segments
+    (several segments added by one grow) count as DOWN.
+
+    Args:
+        width (int): Width of the board in pixels.
+        height (int): Height of the board in pixels.
+
+    Returns:
+        dict: The direction codes, keyed by (dx, dy).
+    """
+    return {
+        (0, SEGMENT_SIZE): UP,
+        (SEGMENT_SIZE, 0): RIGHT,
+        (0, -SEGMENT_SIZE): DOWN,
+        (-SEGMENT_SIZE, 0): LEFT,
+        (0, -(height - SEGMENT_SIZE)): UP,
+        (-(width - SEGMENT_SIZE), 0): RIGHT,
+        (0, height - SEGMENT_SIZE): DOWN,
+        (width - SEGMENT_SIZE, 0): LEFT,
+        (0, 0): DOWN,
+    }
+
+
+# Direction table of a board the size of the window
+DIRECTION_FROM_DELTA = direction_from_delta(WINDOW_WIDTH, WINDOW_HEIGHT)
+
+# Curve between the incoming and outgoing direction of a middle segment, or None if it is straight,
+# indexed by [incoming][outgoing]
+CURVE_TABLE = (
+    (None, UP_RIGHT, None, UP_LEFT),
+    (DOWN_LEFT, None, UP_LEFT, None),
+    (None, DOWN_RIGHT, None, DOWN_LEFT),
+    (DOWN_RIGHT, None, UP_RIGHT, None),
+)
+
+# Image kind and rotation of a middle segment, indexed by [incoming][outgoing]. A segment that
+# doubles back on itself (only possible right after a grow) is drawn straight down, which is what
+# its neighbours give when they are on the same cell; Snake orients the other cases itself.
+SEGMENT_TABLE = tuple(
+    tuple(
+        (
+            (MIDDLE, ROTATIONS[DOWN if outgoing == OPPOSITE[incoming] else incoming])
+            if CURVE_TABLE[incoming][outgoing] is None
+            else (CURVE, CURVES[CURVE_TABLE[incoming][outgoing]])
+        )
+        for outgoing in range(4)
+    )
+    for incoming in range(4)
+)
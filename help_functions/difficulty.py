@@ -0,0 +1,255 @@
+"""
+Difficulty curve analyzer: estimates how long games last and how they end under a difficulty schedule
+without playing them, so many schedules can be compared in seconds.
+
+The analyzer samples a simplified model of a game for thousands of games at once with NumPy. The player
+eats foods and super foods at steady rates, and the points raise the spawn chances of the schedule. Every falling object lands in
+the head's lane with a fixed chance, the exposure, and it arrives after the time it takes to fall to a
+random row. The snake runs into itself at a score drawn for every game, as the longer it is the harder
+it gets to steer around itself. The rates, exposures and scores of a controller are calibrated from full
+games it plays, and estimates can be validated against full games under the schedule being analyzed.
+
+Run from the repository root with:
+
+    python -m help_functions.difficulty --save-model model.json
+    python -m help_functions.difficulty --model model.json --bullet-step 0.001 0.0015 0.002 --score-step 5 7 10
+    python -m help_functions.difficulty --model model.json --validate 500 --plot curves.png
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import time
+
+import numpy as np
+
+from help_functions import tournament
+from help_functions.const import (
+    BULLET_GEN_BASE_CHANCE,
+    SUPER_BULLET_GEN_BASE_CHANCE,
+    HEART_GEN_CHANCE,
+    BULLET_DIFFICULTY_STEP,
+    SUPER_BULLET_DIFFICULTY_STEP,
+    DIFFICULTY_SCORE_STEP,
+    DIFFICULTY_MODEL_GAMES,
+    DIFFICULTY_CALIBRATION_GAMES,
+    TOURNAMENT_MAX_TICKS,
+)
+from help_functions.difficulty_model import (
+    CAUSES,
+    DifficultySchedule,
+    PlayerModel,
+    calibrate,
+    play_full_games,
+)
+from help_functions.difficulty_simulation import simulate
+from help_functions.difficulty_stats import summarize, ks_distance
+
+
+def format_table(rows):
+    """
+    Formats summaries as a table, one line per summary.
+
+    Args:
+        rows (list): (label, summary) pairs.
+
+    Returns:
+        str: The table.
+    """
+    survival_ticks = sorted({t for _, summary in rows for t in summary["survival"]})
+    header = (
+        f"{'schedule':<52}{'mean':>7}{'p10':>5}{'p50':>5}{'p90':>5}"
+        f"{'ticks p10':>10}{'p50':>7}{'p90':>7}"
+        + "".join(f"{f'S({t})':>9}" for t in survival_ticks)
+        + "".join(f"{cause:>8}" for cause in CAUSES)
+    )
+    lines = [header, "-" * len(header)]
+    for label, summary in rows:
+        lines.append(
+            f"{label:<52}{summary['mean_score']:7.1f}"
+            + "".join(f"{p:5.0f}" for p in summary["score_percentiles"])
+            + f"{summary['ticks_percentiles'][0]:10.0f}"
+            + "".join(f"{p:7.0f}" for p in summary["ticks_percentiles"][1:])
+            + "".join(f"{summary['survival'][t]:9.3f}" for t in survival_ticks)
+            + "".join(f"{summary['causes'][cause]:8.3f}" for cause in CAUSES)
+        )
+    return "\n".join(lines)
+
+
+def plot_curves(curves, path):
+    """
+    Plots the survival curves and the score distributions of sampled or played games. Needs matplotlib.
+
+    Args:
+        curves (list): (label, ticks, scores) tuples, one curve per entry.
+        path (str): The image file to write.
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    figure, (survival_axis, score_axis) = plt.subplots(1, 2, figsize=(14, 5))
+    for label, ticks, scores in curves:
+        ordered = np.sort(ticks)
+        survival_axis.step(
+            ordered, 1 - np.arange(1, ordered.size + 1) / ordered.size, label=label
+        )
+        ordered = np.sort(scores)
+        score_axis.step(
+            ordered, np.arange(1, ordered.size + 1) / ordered.size, label=label
+        )
+    survival_axis.set(xlabel="ticks", ylabel="share of games still running")
+    score_axis.set(xlabel="score", ylabel="share of games with at most this score")
+    survival_axis.legend(fontsize="small")
+    figure.tight_layout()
+    figure.savefig(path)
+    plt.close(figure)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    schedule_group = parser.add_argument_group(
+        "schedules", "every combination of the given values is analyzed"
+    )
+    for name, default in (
+        ("bullet-chance", BULLET_GEN_BASE_CHANCE),
+        ("super-bullet-chance", SUPER_BULLET_GEN_BASE_CHANCE),
+        ("bullet-step", BULLET_DIFFICULTY_STEP),
+        ("super-bullet-step", SUPER_BULLET_DIFFICULTY_STEP),
+        ("heart-chance", HEART_GEN_CHANCE),
+    ):
+        schedule_group.add_argument(
+            f"--{name}", type=float, nargs="+", default=[default]
+        )
+    schedule_group.add_argument(
+        "--score-step", type=int, nargs="+", default=[DIFFICULTY_SCORE_STEP]
+    )
+    parser.add_argument("--model", help="load the player model from this JSON file")
+    parser.add_argument(
+        "--save-model", help="save the calibrated player model to this JSON file"
+    )
+    parser.add_argument(
+        "--controller",
+        default="none",
+        help='module:attribute of the controller factory to calibrate and validate with, or "none"',
+    )
+    parser.add_argument(
+        "--calibration-games", type=int, default=DIFFICULTY_CALIBRATION_GAMES
+    )
+    parser.add_argument(
+        "--games",
+        type=int,
+        default=DIFFICULTY_MODEL_GAMES,
+        help="sampled games per schedule",
+    )
+    parser.add_argument(
+        "--validate",
+        type=int,
+        default=0,
+        metavar="GAMES",
+        help="also play this many full games per schedule and compare",
+    )
+    parser.add_argument("--max-ticks", type=int, default=TOURNAMENT_MAX_TICKS)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the summaries to this JSON file")
+    parser.add_argument(
+        "--plot", help="plot the curves to this image file (needs matplotlib)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.plot:
+        try:
+            import matplotlib  # noqa: F401
+        except ImportError:
+            parser.error(
+                "--plot needs matplotlib, install it with pip install matplotlib"
+            )
+    try:
+        controller = tournament.load_controller(args.controller)
+    except (ImportError, AttributeError, ValueError) as error:
+        parser.error(f"cannot load the controller: {error}")
+
+    if args.model:
+        with open(args.model) as f:
+            model = PlayerModel.from_dict(json.load(f))
+    else:
+        start = time.perf_counter()
+        model = calibrate(
+            controller,
+            args.calibration_games,
+            max_ticks=args.max_ticks,
+            processes=args.processes,
+            first_seed=args.seed,
+        )
+        print(
+            f"calibrated on {args.calibration_games} games in "
+            f"{time.perf_counter() - start:.1f} s: {model.to_dict()}",
+            file=sys.stderr,
+        )
+    if args.save_model:
+        with open(args.save_model, "w") as f:
+            json.dump(model.to_dict(), f, indent=2)
+
+    schedules = [
+        DifficultySchedule(*values)
+        for values in itertools.product(
+            args.bullet_chance,
+            args.super_bullet_chance,
+            args.bullet_step,
+            args.super_bullet_step,
+            args.score_step,
+            args.heart_chance,
+        )
+    ]
+    rows = []
+    distances = []
+    curves = []
+    report = []
+    start = time.perf_counter()
+    for schedule in schedules:
+        sampled = simulate(schedule, model, args.games, args.max_ticks, args.seed)
+        summary = summarize(*sampled, args.max_ticks)
+        rows.append((str(schedule), summary))
+        curves.append((f"{schedule} (model)", *sampled[:2]))
+        entry = {"schedule": vars(schedule), "model": summary}
+        if args.validate:
+            # Validation games use other seeds than the calibration games
+            played = play_full_games(
+                schedule,
+                args.validate,
+                controller,
+                args.max_ticks,
+                args.processes,
+                args.seed + args.calibration_games,
+            )
+            entry["played"] = summarize(*played, args.max_ticks)
+            entry["ks_ticks"] = ks_distance(sampled[0], played[0])
+            entry["ks_score"] = ks_distance(sampled[1], played[1])
+            rows.append(("  played", entry["played"]))
+            curves.append((f"{schedule} (played)", *played[:2]))
+            distances.append(
+                f"{schedule}: KS distance of the model to the played games "
+                f"{entry['ks_ticks']:.3f} in ticks, {entry['ks_score']:.3f} in score"
+            )
+        report.append(entry)
+    elapsed = time.perf_counter() - start
+
+    print(format_table(rows))
+    for line in distances:
+        print(line)
+    print(f"{len(schedules)} schedules analyzed in {elapsed:.2f} s", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"player_model": model.to_dict(), "schedules": report}, f, indent=2
+            )
+    if args.plot:
+        plot_curves(curves, args.plot)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+"""
+The difficulty schedules the analyzer compares and the player model it samples, calibrated from full games
+played in a tournament. See help_functions.difficulty.
+"""
+
+import itertools
+
+import numpy as np
+
+from Classes.falling_objects import FallingObjects, OBJECT_KINDS
+from Classes.spawn_scheduler import BULLET, SUPER_BULLET, HEART
+from help_functions import tournament
+from help_functions.const import (
+    BULLET_GEN_BASE_CHANCE,
+    SUPER_BULLET_GEN_BASE_CHANCE,
+    HEART_GEN_CHANCE,
+    BULLET_DIFFICULTY_STEP,
+    SUPER_BULLET_DIFFICULTY_STEP,
+    DIFFICULTY_SCORE_STEP,
+    BOARD_WIDTH,
+    BOARD_HEIGHT,
+    DIFFICULTY_CALIBRATION_GAMES,
+    TOURNAMENT_MAX_TICKS,
+)
+
+LIVES, SELF, TIMEOUT = "lives", "self", tournament.TIMEOUT
+CAUSES = (LIVES, SELF, TIMEOUT)
+
+
+class DifficultySchedule:
+    """
+    A difficulty schedule: the spawn chances per tick at the start, and how much the bullet and super
+    bullet chances rise with every difficulty level, which is reached every score_step points. This is
+    the schedule GameEngine.spawn_chances follows.
+    """
+
+    def __init__(
+        self,
+        bullet_base=BULLET_GEN_BASE_CHANCE,
+        super_bullet_base=SUPER_BULLET_GEN_BASE_CHANCE,
+        bullet_step=BULLET_DIFFICULTY_STEP,
+        super_bullet_step=SUPER_BULLET_DIFFICULTY_STEP,
+        score_step=DIFFICULTY_SCORE_STEP,
+        heart_chance=HEART_GEN_CHANCE,
+    ):
+        """
+        Initializes a schedule, by default the one the game is played with.
+
+        Args:
+            bullet_base (float): Chance per tick to spawn a bullet before any difficulty increase.
+            super_bullet_base (float): Chance per tick to spawn a super bullet before any difficulty increase.
+            bullet_step (float): Increase of the bullet chance per difficulty level.
+            super_bullet_step (float): Increase of the super bullet chance per difficulty level.
+            score_step (int): Points needed to reach the next difficulty level.
+            heart_chance (float): Chance per tick to spawn a heart.
+        """
+        self.bullet_base = bullet_base
+        self.super_bullet_base = super_bullet_base
+        self.bullet_step = bullet_step
+        self.super_bullet_step = super_bullet_step
+        self.score_step = score_step
+        self.heart_chance = heart_chance
+
+    def __str__(self):
+        return (
+            f"bullet {self.bullet_base:g}+{self.bullet_step:g}, "
+            f"super {self.super_bullet_base:g}+{self.super_bullet_step:g}, "
+            f"every {self.score_step}"
+        )
+
+    def chances(self, scores):
+        """
+        Computes the bullet and super bullet chances per tick for scores.
+
+        Args:
+            scores (ndarray): The scores.
+
+        Returns:
+            tuple: Arrays of the bullet and super bullet chances.
+        """
+        level = scores // self.score_step
+        return (
+            self.bullet_base + level * self.bullet_step,
+            self.super_bullet_base + level * self.super_bullet_step,
+        )
+
+    def engine_args(self):
+        """
+        Returns the GameEngine arguments that play a game with this schedule.
+
+        Returns:
+            dict: Keyword arguments for GameEngine.
+        """
+        return {
+            "bullet_gen_base_chance": self.bullet_base,
+            "super_bullet_gen_base_chance": self.super_bullet_base,
+            "bullet_difficulty_step": self.bullet_step,
+            "super_bullet_difficulty_step": self.super_bullet_step,
+            "difficulty_score_step": self.score_step,
+            "heart_gen_chance": self.heart_chance,
+        }
+
+
+class PlayerModel:
+    """
+    How a controller plays, reduced to what the analyzer samples: the foods it eats per tick, the
+    share of bullets and super bullets and of hearts that hit its head, and the distribution of the score
+    it runs into itself at.
+    """
+
+    def __init__(
+        self,
+        foods_per_tick,
+        super_foods_per_tick,
+        bullet_exposure,
+        heart_exposure,
+        self_death_scores=(),
+        self_death_chances=(),
+    ):
+        """
+        Initializes a player model.
+
+        Args:
+            foods_per_tick (float): Mean foods eaten per tick.
+            super_foods_per_tick (float): Mean super foods eaten per tick.
+            bullet_exposure (float): Share of the bullets and super bullets that hit the head.
+            heart_exposure (float): Share of the hearts that hit the head.
+            self_death_scores (list): The scores the snake can run into itself at, in increasing order.
+            self_death_chances (list): The chance of every score in self_death_scores. What the chances
+                leave to 1 is the chance that the snake never runs into itself.
+        """
+        self.foods_per_tick = foods_per_tick
+        self.super_foods_per_tick = super_foods_per_tick
+        self.bullet_exposure = bullet_exposure
+        self.heart_exposure = heart_exposure
+        self.self_death_scores = list(self_death_scores)
+        self.self_death_chances = list(self_death_chances)
+
+    def self_death_thresholds(self, games, rng):
+        """
+        Draws the score every game runs into itself at.
+
+        Args:
+            games (int): The number of games.
+            rng (Generator): The NumPy generator to draw with.
+
+        Returns:
+            ndarray: The scores, infinite for games that never run into themselves.
+        """
+        scores = np.append(np.asarray(self.self_death_scores, dtype=float), np.inf)
+        cumulative = np.cumsum(self.self_death_chances)
+        return scores[np.searchsorted(cumulative, rng.random(games), side="right")]
+
+    def to_dict(self):
+        """
+        Returns the model as a dict, e.g. to save it as JSON.
+        """
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, values):
+        """
+        Creates a model from a dict written by to_dict.
+        """
+        return cls(**values)
+
+
+class CountingObjects(FallingObjects):
+    """
+    Falling objects that count how many of every kind spawned and hit the head, to measure the exposure
+    of a controller. The game plays exactly as with plain FallingObjects.
+    """
+
+    def __init__(self, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+        super().__init__(width, height)
+        self.spawned = [0] * OBJECT_KINDS
+        self.hit = [0] * OBJECT_KINDS
+
+    def spawn(self, kind, rng):
+        self.spawned[kind] += 1
+        super().spawn(kind, rng)
+
+    def advance(self, snake):
+        hits = super().advance(snake)
+        for kind in hits:
+            self.hit[kind] += 1
+        return hits
+
+
+def play_counted_game(seed):
+    """
+    Plays one game in a tournament worker, counting the falling objects.
+
+    Args:
+        seed (int): The seed of the game.
+
+    Returns:
+        dict: The result of tournament.play_game, plus the foods and super foods eaten and the objects
+            of every kind that spawned, that hit the head and that were still falling when the game
+            ended.
+    """
+    engine = tournament.worker_engine
+    objects = CountingObjects(engine.width, engine.height)
+    result = tournament.play_game(seed, objects)
+    falling = np.bincount(objects.kind[: objects.count], minlength=OBJECT_KINDS)
+    state = engine.state
+    result.update(
+        foods=state.foods_eaten,
+        super_foods=state.super_foods_eaten,
+        spawned=objects.spawned,
+        hit=objects.hit,
+        falling=falling.tolist(),
+    )
+    return result
+
+
+def calibrate(
+    controller=None,
+    games=DIFFICULTY_CALIBRATION_GAMES,
+    engine_args=None,
+    max_ticks=TOURNAMENT_MAX_TICKS,
+    processes=None,
+    first_seed=0,
+):
+    """
+    Measures the player model of a controller from full games. The scores it runs into itself at are
+    estimated with Kaplan-Meier: a game lost to bullets or cut off at a score only tells that the snake
+    had not run into itself up to that score.
+
+    Args:
+        controller (callable, optional): Creates the controller of a game, see tournament.play_games.
+            Games are played without a controller if not given.
+        games (int): The number of games to play.
+        engine_args (dict, optional): Keyword arguments of the GameEngine.
+        max_ticks (int): Ticks after which a game is cut off.
+        processes (int, optional): Number of worker processes, one per CPU core if not given.
+        first_seed (int): The games use consecutive seeds from this one on.
+
+    Returns:
+        PlayerModel: The measured model.
+    """
+    ticks = foods = super_foods = 0
+    endings = []
+    spawned = np.zeros(OBJECT_KINDS, dtype=np.int64)
+    hit = np.zeros(OBJECT_KINDS, dtype=np.int64)
+    for result in tournament.play_games(
+        range(first_seed, first_seed + games),
+        controller,
+        engine_args,
+        max_ticks,
+        processes,
+        game=play_counted_game,
+    ):
+        ticks += result["ticks"]
+        foods += result["foods"]
+        super_foods += result["super_foods"]
+        endings.append((result["score"], result["cause_of_death"] == SELF))
+        # Objects still falling at the end never had the chance to hit
+        spawned += np.subtract(result["spawned"], result["falling"])
+        hit += result["hit"]
+    bullets = spawned[BULLET] + spawned[SUPER_BULLET]
+
+    self_death_scores = []
+    self_death_chances = []
+    surviving = 1.0  # Chance not to have run into itself yet
+    at_risk = len(endings)
+    for end_score, group in itertools.groupby(sorted(endings), key=lambda e: e[0]):
+        group = [is_self for _, is_self in group]
+        deaths = sum(group)
+        if deaths:
+            self_death_scores.append(end_score)
+            self_death_chances.append(surviving * deaths / at_risk)
+            surviving *= 1 - deaths / at_risk
+        at_risk -= len(group)
+    return PlayerModel(
+        foods_per_tick=foods / ticks,
+        super_foods_per_tick=super_foods / ticks,
+        bullet_exposure=(
+            float((hit[BULLET] + hit[SUPER_BULLET]) / bullets) if bullets else 0.0
+        ),
+        heart_exposure=float(hit[HEART] / spawned[HEART]) if spawned[HEART] else 0.0,
+        self_death_scores=self_death_scores,
+        self_death_chances=self_death_chances,
+    )
+
+
+def play_full_games(
+    schedule,
+    games,
+    controller=None,
+    max_ticks=TOURNAMENT_MAX_TICKS,
+    processes=None,
+    first_seed=0,
+    engine_args=None,
+):
+    """
+    Plays full games under a schedule to validate the estimates of the model against.
+
+    Args:
+        schedule (DifficultySchedule): The difficulty schedule.
+        games (int): The number of games to play.
+        controller (callable, optional): Creates the controller of a game, see tournament.play_games.
+        max_ticks (int): Ticks after which a game is cut off.
+        processes (int, optional): Number of worker processes, one per CPU core if not given.
+        first_seed (int): The games use consecutive seeds from this one on.
+        engine_args (dict, optional): Further keyword arguments of the GameEngine, e.g. the board size.
+
+    Returns:
+        tuple: Arrays of the ticks every game lasted, its score and the index of its cause of death in
+            CAUSES, like simulate.
+    """
+    results = list(
+        tournament.play_games(
+            range(first_seed, first_seed + games),
+            controller,
+            dict(engine_args or {}, **schedule.engine_args()),
+            max_ticks,
+            processes,
+        )
+    )
+    return (
+        np.array([result["ticks"] for result in results]),
+        np.array([result["score"] for result in results]),
+        np.array([CAUSES.index(result["cause_of_death"]) for result in results]),
+    )
@@ -0,0 +1,304 @@
+"""
+Sampler of the simplified game the difficulty analyzer estimates schedules with. See
+help_functions.difficulty.
+
+Games are advanced a block of ticks at a time, and only the few ticks something happens on are drawn:
+the foods and the hits every running game gets in a block are drawn at once and placed on random ticks
+of the block. Spawns that miss the head do not change the game, so they are not drawn at all.
+"""
+
+from operator import itemgetter
+
+import numpy as np
+
+from Classes.falling_objects import OBJECT_SPEEDS
+from Classes.spawn_scheduler import BULLET, SUPER_BULLET, HEART
+from help_functions.const import (
+    BOARD_HEIGHT,
+    SEGMENT_SIZE,
+    FALLING_OBJ_SPEED,
+    MAX_LIVES,
+    DIFFICULTY_MODEL_GAMES,
+    DIFFICULTY_BLOCK_TICKS,
+    TOURNAMENT_MAX_TICKS,
+)
+from help_functions.difficulty_model import CAUSES, LIVES, SELF, TIMEOUT
+
+# Points of a food and of a super food, as GameEngine.step scores them
+FOOD_POINTS = np.array([1, 5], dtype=np.int64)
+# Lives taken by a bullet, a super bullet and a heart, indexed by kind
+LIVES_LOST = np.array([1, 3, -1], dtype=np.int64)
+
+
+class BlockFoods:
+    """
+    The foods and super foods the running games eat in one block of ticks. They are kept sorted by the
+    key game * length + tick, together with the points scored in the block before every one of them.
+    """
+
+    def __init__(self, rng, model, games, length):
+        """
+        Draws the foods of a block.
+
+        Args:
+            rng (Generator): The NumPy generator to draw with.
+            model (PlayerModel): The player model.
+            games (int): The number of running games.
+            length (int): The number of ticks in the block.
+        """
+        self.length = length
+        local = np.arange(games)
+        foods = rng.binomial(length, model.foods_per_tick, games)
+        super_foods = rng.binomial(length, model.super_foods_per_tick, games)
+        self.eaten = foods + super_foods
+        keys = np.repeat(local * length, self.eaten) + rng.integers(
+            0, length, self.eaten.sum()
+        )
+        kinds = np.repeat(
+            np.tile([0, 1], games), np.stack((foods, super_foods), 1).ravel()
+        )
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.cumulative = np.r_[0, np.cumsum(FOOD_POINTS[kinds[order]])]
+        # Index of the first food of every game
+        self.first = np.searchsorted(self.keys, local * length)
+        self.points = foods * FOOD_POINTS[0] + super_foods * FOOD_POINTS[1]
+
+    def points_until(self, game, tick):
+        """
+        Returns the points games scored in the block up to and including a tick.
+
+        Args:
+            game (ndarray): The games.
+            tick (ndarray): The tick of the block for every game.
+
+        Returns:
+            ndarray: The points.
+        """
+        eaten = np.searchsorted(self.keys, game * self.length + tick, "right")
+        return self.cumulative[eaten] - self.cumulative[self.first[game]]
+
+    def food_over(self, margins):
+        """
+        Finds the first food after which every game has scored more than a margin in the block.
+
+        Args:
+            margins (ndarray): The points every game can score.
+
+        Returns:
+            tuple: The index of the food of every game, and whether it is eaten in the block.
+        """
+        food = (
+            np.searchsorted(
+                self.cumulative, self.cumulative[self.first] + margins, side="right"
+            )
+            - 1
+        )
+        return food, food < self.first + self.eaten
+
+
+class GameSampler:
+    """
+    Samples the games of simulate. Keeps the score and lives of the running games, the hits on their way
+    to the head and the results of the games that are over.
+
+    A hit lands when its object has fallen to the head's row, which is drawn uniformly. Lives follow the
+    landed hits, capped at MAX_LIVES. A game that reached the score it runs into itself at ends on the tick
+    it would have eaten its next food.
+    """
+
+    def __init__(self, schedule, model, games, max_ticks, seed, height):
+        """
+        Initializes the games.
+
+        Args:
+            schedule (DifficultySchedule): The difficulty schedule.
+            model (PlayerModel): The player model.
+            games (int): The number of games to sample.
+            max_ticks (int): Ticks after which a game is cut off.
+            seed (int, optional): Seed of the sampling.
+            height (int): Height of the board in pixels, which sets how long objects fall.
+        """
+        self.schedule = schedule
+        self.model = model
+        self.rng = np.random.default_rng(seed)
+        self.rows = height // SEGMENT_SIZE
+        spawn_y = height - FALLING_OBJ_SPEED + SEGMENT_SIZE // 2
+        # Ticks an object takes to fall to a row, by kind and row
+        self.delays = np.ceil(
+            (spawn_y - np.arange(self.rows) * SEGMENT_SIZE)[None, :]
+            / OBJECT_SPEEDS[:, None]
+        ).astype(np.int64)
+        self.thresholds = model.self_death_thresholds(games, self.rng)
+
+        self.ticks = np.full(games, max_ticks, dtype=np.int64)
+        self.scores = np.zeros(games, dtype=np.int64)
+        self.causes = np.full(games, CAUSES.index(TIMEOUT), dtype=np.int8)
+        # The running games, and their score and lives at the start of the block
+        self.running = np.arange(games)
+        self.score = np.zeros(games, dtype=np.int64)
+        self.lives = np.full(games, 3, dtype=np.int64)
+        # (game, tick it lands on, lives it takes) of every hit on its way
+        self.pending = []
+
+    def hit_chances(self, scores):
+        """
+        Computes the chances per tick that a bullet, a super bullet and a heart hit the head.
+
+        Args:
+            scores (ndarray): The scores.
+
+        Returns:
+            tuple: The chances of the three kinds.
+        """
+        bullet, super_bullet = self.schedule.chances(scores)
+        return (
+            self.model.bullet_exposure * bullet,
+            self.model.bullet_exposure * super_bullet,
+            self.model.heart_exposure * self.schedule.heart_chance,
+        )
+
+    def draw_hits(self, start, foods):
+        """
+        Draws the hits of a block at the highest chance of each game in the block, thins them to the
+        chance at their tick and adds them to the pending hits.
+
+        Args:
+            start (int): The first tick of the block.
+            foods (BlockFoods): The foods of the block.
+        """
+        rng = self.rng
+        highest = np.maximum(
+            sum(self.hit_chances(self.score)),
+            sum(self.hit_chances(self.score + foods.points)),
+        )
+        candidates = rng.binomial(foods.length, np.minimum(highest, 1.0))
+        game = np.repeat(np.arange(self.running.size), candidates)
+        tick = rng.integers(0, foods.length, game.size)
+        bullet, super_bullet, heart = self.hit_chances(
+            self.score[game] + foods.points_until(game, tick)
+        )
+        draw = rng.random(game.size) * highest[game]
+        kind = np.where(
+            draw < bullet,
+            BULLET,
+            np.where(draw < bullet + super_bullet, SUPER_BULLET, HEART),
+        )
+        hit = draw < bullet + super_bullet + heart
+        game, tick, kind = game[hit], tick[hit], kind[hit]
+        lands = (
+            start + tick + self.delays[kind, rng.integers(self.rows, size=kind.size)]
+        )
+        self.pending.extend(
+            zip(self.running[game].tolist(), lands.tolist(), LIVES_LOST[kind].tolist())
+        )
+
+    def land_hits(self, start, length):
+        """
+        Takes the lives of the hits landing in a block.
+
+        Args:
+            start (int): The first tick of the block.
+            length (int): The number of ticks in the block.
+
+        Returns:
+            list: The tick of the block every running game lost its last life on, length if it did not.
+        """
+        end = start + length
+        landing = [hit for hit in self.pending if hit[1] < end]
+        if not landing:
+            return [length] * self.running.size
+        self.pending = [hit for hit in self.pending if hit[1] >= end]
+        # In order of game and tick, and of drawing within a tick
+        landing.sort(key=itemgetter(0, 1))
+
+        # The running games are in increasing order, so their positions are found by bisection
+        positions = np.searchsorted(self.running, [hit[0] for hit in landing])
+        lives = self.lives.tolist()
+        lost_at = [length] * self.running.size
+        for i, (_, tick, lost) in zip(positions.tolist(), landing):
+            lives[i] = min(lives[i] - lost, MAX_LIVES)
+            if lives[i] <= 0 and lost_at[i] == length:
+                lost_at[i] = tick - start
+        self.lives = np.array(lives, dtype=np.int64)
+        return lost_at
+
+    def play_block(self, start, length):
+        """
+        Samples a block of ticks of the running games and ends the games that are lost in it.
+
+        Args:
+            start (int): The first tick of the block.
+            length (int): The number of ticks in the block.
+        """
+        n = self.running.size
+        local = np.arange(n)
+        foods = BlockFoods(self.rng, self.model, n, length)
+        self.draw_hits(start, foods)
+        end = np.array(self.land_hits(start, length), dtype=np.int64)
+        cause = np.full(n, CAUSES.index(LIVES), dtype=np.int8)
+
+        # Games that reach their threshold run into themselves going for the next food after it
+        crash_food, crashed = foods.food_over(
+            self.thresholds[self.running] - self.score
+        )
+        crash = np.full(n, length)
+        crash[crashed] = foods.keys[crash_food[crashed]] - local[crashed] * length
+        crashed &= crash < end
+        end = np.where(crashed, crash, end)
+        cause[crashed] = CAUSES.index(SELF)
+
+        lost = end < length
+        over = self.running[lost]
+        self.ticks[over] = start + end[lost] + 1
+        self.scores[over] = self.score[lost] + foods.points_until(
+            local[lost], end[lost]
+        )
+        # A snake that runs into itself dies before it eats the food
+        self.scores[self.running[crashed]] = (
+            self.score[crashed]
+            + foods.cumulative[crash_food[crashed]]
+            - foods.cumulative[foods.first[crashed]]
+        )
+        self.causes[over] = cause[lost]
+        if lost.any():
+            over = set(over.tolist())
+            self.pending = [hit for hit in self.pending if hit[0] not in over]
+        kept = ~lost
+        self.running = self.running[kept]
+        self.score = (self.score + foods.points)[kept]
+        self.lives = self.lives[kept]
+
+
+def simulate(
+    schedule,
+    model,
+    games=DIFFICULTY_MODEL_GAMES,
+    max_ticks=TOURNAMENT_MAX_TICKS,
+    seed=None,
+    height=BOARD_HEIGHT,
+    block=DIFFICULTY_BLOCK_TICKS,
+):
+    """
+    Samples games of the model under a schedule, a block of ticks at a time.
+
+    Args:
+        schedule (DifficultySchedule): The difficulty schedule.
+        model (PlayerModel): The player model.
+        games (int): The number of games to sample.
+        max_ticks (int): Ticks after which a game is cut off.
+        seed (int, optional): Seed of the sampling.
+        height (int): Height of the board in pixels, which sets how long objects fall.
+        block (int): Ticks sampled at once.
+
+    Returns:
+        tuple: Arrays of the ticks every game lasted, its score and the index of its cause of death in
+            CAUSES.
+    """
+    sampler = GameSampler(schedule, model, games, max_ticks, seed, height)
+    for start in range(0, max_ticks, block):
+        if not sampler.running.size:
+            break
+        sampler.play_block(start, min(block, max_ticks - start))
+    sampler.scores[sampler.running] = sampler.score
+    return sampler.ticks, sampler.scores, sampler.causes
@@ -0,0 +1,66 @@
+"""
+Statistics of the games the difficulty analyzer samples or plays. See help_functions.difficulty.
+"""
+
+import numpy as np
+
+from help_functions.const import TOURNAMENT_MAX_TICKS
+from help_functions.difficulty_model import CAUSES
+
+# Ticks at which the share of games still running is reported
+SURVIVAL_TICKS = (1000, 2500, 5000, 10000, 20000)
+
+
+def summarize(ticks, scores, causes, max_ticks=TOURNAMENT_MAX_TICKS):
+    """
+    Summarizes sampled or played games.
+
+    Args:
+        ticks (ndarray): The ticks every game lasted.
+        scores (ndarray): The score of every game.
+        causes (ndarray): The index of the cause of death of every game in CAUSES.
+        max_ticks (int): Ticks after which games were cut off.
+
+    Returns:
+        dict: The number of games, the mean score and its 10th, 50th and 90th percentiles, the 10th,
+            50th and 90th percentiles of the ticks to death, the share of games still running at every
+            tick of SURVIVAL_TICKS and the share of games per cause of death.
+    """
+    ticks = np.asarray(ticks)
+    scores = np.asarray(scores)
+    causes = np.asarray(causes)
+    return {
+        "games": int(ticks.size),
+        "mean_score": float(scores.mean()),
+        "score_percentiles": np.percentile(scores, (10, 50, 90)).tolist(),
+        "ticks_percentiles": np.percentile(ticks, (10, 50, 90)).tolist(),
+        "survival": {
+            t: float((ticks > t).mean()) for t in SURVIVAL_TICKS if t < max_ticks
+        },
+        "causes": {
+            cause: float((causes == i).mean()) for i, cause in enumerate(CAUSES)
+        },
+    }
+
+
+def ks_distance(a, b):
+    """
+    Computes the Kolmogorov-Smirnov distance between two samples: the largest difference of their
+    empirical distribution functions.
+
+    Args:
+        a (ndarray): The first sample.
+        b (ndarray): The second sample.
+
+    Returns:
+        float: The distance, between 0 and 1.
+    """
+    a = np.sort(a)
+    b = np.sort(b)
+    values = np.concatenate((a, b))
+    return float(
+        np.abs(
+            np.searchsorted(a, values, side="right") / a.size
+            - np.searchsorted(b, values, side="right") / b.size
+        ).max()
+    )
@@ -0,0 +1,77 @@
+from help_functions.const import TICK_RATE, MAX_CATCH_UP_TICKS
+
+
+class FixedTimestepLoop:
+    """
+    Runs a simulation step at a fixed rate, independent of how often frames are drawn. Frame times are
+    added to an accumulator and whole ticks are taken from it, so a slow frame is made up for with extra
+    ticks in the next one. The leftover fraction of a tick is used to interpolate what is drawn.
+    """
+
+    def __init__(self, step, tick_rate=TICK_RATE, max_catch_up=MAX_CATCH_UP_TICKS):
+        """
+        Initializes the loop.
+
+        Args:
+            step (callable): Runs one simulation tick. Returning False stops the current frame's ticks and
+                drops the accumulated time, e.g. when the game is over.
+            tick_rate (int): Simulation ticks per second.
+            max_catch_up (int): Most ticks run in one frame. Time beyond that is dropped, so a stalled
+                machine slows the game down instead of falling further and further behind.
+        """
+        self.step = step
+        self.tick_duration = 1 / tick_rate
+        self.max_catch_up = max_catch_up
+        self.accumulator = 0.0
+
+    @property
+    def alpha(self):
+        """How far the time is between the last tick and the next one, from 0 to 1."""
+        return min(self.accumulator / self.tick_duration, 1.0)
+
+    def reset(self):
+        """
+        Drops the accumulated time, e.g. while the game is paused.
+        """
+        self.accumulator = 0.0
+
+    def advance(self, dt):
+        """
+        Runs as many ticks as fit into the elapsed time, up to max_catch_up.
+
+        Args:
+            dt (float): The time since the last frame in seconds.
+
+        Returns:
+            int: The number of ticks that were run.
+        """
+        self.accumulator += dt
+        ticks = 0
+        while self.accumulator >= self.tick_duration:
+            if ticks == self.max_catch_up:
+                self.accumulator = 0.0
+                break
+            self.accumulator -= self.tick_duration
+            ticks += 1
+            if self.step() is False:
+                self.accumulator = 0.0
+                break
+        return ticks
+
+
+def get_refresh_rate(window, default=60):
+    """
+    Returns the refresh rate of the screen a window is on.
+
+    Args:
+        window (Window): The pyglet window.
+        default (int): The rate used if the platform does not report one.
+
+    Returns:
+        int: The refresh rate in Hz.
+    """
+    try:
+        rate = window.screen.get_mode().rate
+    except (AttributeError, NotImplementedError):
+        rate = None
+    return rate or default
@@ -0,0 +1,94 @@
+import queue
+import sys
+import threading
+
+import pyglet
+
+from help_functions.const import HIGH_SCORE_QUEUE_SIZE
+
+
+class HighScoreWriter(pyglet.event.EventDispatcher):
+    """
+    Saves scores to a HighScoreStore on a background thread, so a game over never waits for the disk.
+    Scores are passed through a bounded queue and everything queued at once is written as one batch.
+    When a batch is saved, the callbacks of its scores are scheduled on the pyglet clock with the new
+    high scores, so they run on the main thread.
+    """
+
+    def __init__(self, store, max_pending=HIGH_SCORE_QUEUE_SIZE):
+        """
+        Initializes the writer and starts its thread.
+
+        Args:
+            store (HighScoreStore): The store the scores are saved to. Only the writer's thread may use
+                it from now on.
+            max_pending (int): Most scores waiting to be written. submit() blocks while the queue is full.
+        """
+        self.store = store
+        self.queue = queue.Queue(max_pending)
+        self.thread = threading.Thread(
+            target=self._run, name="HighScoreWriter", daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, score, callback=None):
+        """
+        Queues a score to be saved.
+
+        Args:
+            score (int): The score of a finished game.
+            callback (callable, optional): Scheduled on the pyglet clock once the score is saved, called
+                with the time since it was scheduled and the list of high scores, best first.
+        """
+        self.queue.put((score, callback))
+
+    def close(self):
+        """
+        Writes the scores still queued, flushes the store to the disk and stops the thread.
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def _run(self):
+        """
+        Takes batches of scores from the queue and saves them until close() is called.
+        """
+        while True:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            closing = None in batch
+            entries = [entry for entry in batch if entry is not None]
+            if entries:
+                try:
+                    self.store.add_many([score for score, _ in entries])
+                except OSError as error:
+                    print(f"Could not save the high scores: {error}", file=sys.stderr)
+                high_scores = self.store.top()
+                for _, callback in entries:
+                    if callback is not None:
+                        pyglet.app.platform_event_loop.post_event(
+                            self, "on_saved", callback, high_scores
+                        )
+
+            if closing:
+                self.store.sync()
+                return
+
+    def on_saved(self, callback, high_scores):
+        """
+        Schedules the callback of a saved score. Dispatched on the main thread.
+
+        Args:
+            callback (callable): The callback passed to submit().
+            high_scores (list): The high scores after the score was saved.
+        """
+        pyglet.clock.schedule_once(callback, 0, high_scores)
+
+
+HighScoreWriter.register_event_type("on_saved")
@@ -0,0 +1,163 @@
+import heapq
+import json
+import os
+
+from help_functions.const import (
+    HIGH_SCORES_FILE,
+    HIGH_SCORES_INDEX_FILE,
+    HIGH_SCORE_COUNT,
+)
+
+
+class HighScoreStore:
+    """
+    Keeps the best k scores in a bounded min-heap. Every score is still appended to the history file,
+    but the heap is persisted in a small index file together with the byte offset of the history read
+    so far, so loading only parses the lines appended since the index was last written. The first load
+    without an index imports the whole history once.
+    """
+
+    def __init__(
+        self,
+        path=HIGH_SCORES_FILE,
+        index_path=HIGH_SCORES_INDEX_FILE,
+        k=HIGH_SCORE_COUNT,
+    ):
+        """
+        Initializes the store and loads the high scores.
+
+        Args:
+            path (str): The history file with one score per line.
+            index_path (str): The index file with the best scores and the history offset.
+            k (int): The number of high scores kept.
+        """
+        self.path = path
+        self.index_path = index_path
+        self.k = k
+        self.heap = []
+        self.offset = 0
+        self.load()
+
+    def load(self):
+        """
+        Loads the index and reads the part of the history it does not cover yet. A missing or broken
+        index, one kept for a different k, or one ahead of the history file is rebuilt from the whole
+        history.
+        """
+        self.heap = []
+        self.offset = 0
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+            if index["k"] == self.k and index["offset"] <= self._history_size():
+                self.heap = [int(score) for score in index["scores"]]
+                self.offset = int(index["offset"])
+                heapq.heapify(self.heap)
+        except (OSError, ValueError, KeyError, TypeError):
+            self.heap = []
+            self.offset = 0
+
+        if self._catch_up():
+            self.save()
+
+    def _history_size(self):
+        """
+        Returns the size of the history file in bytes, or 0 if there is none.
+        """
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def _catch_up(self):
+        """
+        Pushes the complete lines of the history after the current offset into the heap.
+
+        Returns:
+            bool: True if any lines were read.
+        """
+        if self._history_size() <= self.offset:
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        # A line without its newline may still be being written, it is read next time
+        end = data.rfind(b"\n") + 1
+        if not end:
+            return False
+        for line in data[:end].split(b"\n"):
+            try:
+                self._push(int(line))
+            except ValueError:
+                continue
+        self.offset += end
+        return True
+
+    def _push(self, score):
+        """
+        Adds a score to the heap in O(log k), dropping the lowest score if the heap is full.
+
+        Args:
+            score (int): The score.
+        """
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, score)
+        elif score > self.heap[0]:
+            heapq.heapreplace(self.heap, score)
+
+    def add(self, score):
+        """
+        Appends a score to the history and updates the high scores and the index.
+
+        Args:
+            score (int): The score of a finished game.
+        """
+        self.add_many([score])
+
+    def add_many(self, scores):
+        """
+        Appends several scores to the history with one write and updates the high scores and the
+        index once.
+
+        Args:
+            scores (list): The scores of finished games.
+        """
+        # Lines appended by someone else are picked up together with the new ones. A last line without
+        # its newline is ended first, so the first score is not glued onto it.
+        self._catch_up()
+        torn = self._history_size() > self.offset
+        lines = "".join(f"{score}\n" for score in scores)
+        with open(self.path, "a") as f:
+            f.write("\n" + lines if torn else lines)
+        self._catch_up()
+        self.save()
+
+    def sync(self):
+        """
+        Flushes the history and the index to the disk, e.g. before the game exits.
+        """
+        for path in (self.path, self.index_path):
+            try:
+                with open(path, "rb") as f:
+                    os.fsync(f.fileno())
+            except OSError:
+                continue
+
+    def save(self):
+        """
+        Writes the index file. It is replaced atomically, so a crash leaves either the old or the new
+        index behind.
+        """
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"k": self.k, "offset": self.offset, "scores": self.heap}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def top(self):
+        """
+        Returns the high scores.
+
+        Returns:
+            list: The high scores, best first.
+        """
+        return sorted(self.heap, reverse=True)
@@ -1,6 +1,144 @@
+import numpy as np
 import pyglet
 
 
+class AssetManager:
+    """
+    Central image cache. Every image is decoded once and packed into a shared texture atlas, and all
+    sprites are created from the same texture regions, so creating a sprite never touches the file
+    system or uploads a new texture. Images that are drawn turned can be rotated once into the atlas, so
+    they are drawn without a rotation per sprite.
+    """
+
+    def __init__(self, atlas_size=512):
+        """
+        Initializes an empty cache. The atlas is created on the first load, as it needs a GL context.
+
+        Args:
+            atlas_size (int): Width and height of each atlas texture in pixels.
+        """
+        self.atlas_size = atlas_size
+        self.texture_bin = None
+        self.regions = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_image(self, image_path, centered=False):
+        """
+        Returns the shared texture region of an image, loading it into the atlas on the first request.
+
+        Args:
+            image_path (str): Path to the image file.
+            centered (bool): Whether the anchor of the region is the center of the image.
+
+        Returns:
+            TextureRegion: The region of the image in the atlas.
+        """
+        key = (image_path, centered)
+        region = self.regions.get(key)
+        if region is not None:
+            self.hits += 1
+            return region
+
+        self.misses += 1
+        base = self.regions.get((image_path, not centered))
+        if base is None:
+            base = self.add_to_atlas(pyglet.image.load(image_path))
+            region = base
+        else:
+            # Same pixels, separate region object so the anchors don't interfere
+            region = base.get_region(0, 0, base.width, base.height)
+        if centered:
+            region.anchor_x = region.width // 2
+            region.anchor_y = region.height // 2
+        self.regions[key] = region
+        return region
+
+    def get_rotated_image(self, image_path, rotation):
+        """
+        Returns a centered region of an image turned clockwise by a multiple of 90 degrees. The pixels are
+        rotated once when the region is added to the atlas, and the anchor is turned with them, so the
+        region draws exactly like a sprite of the image with that rotation.
+
+        Args:
+            image_path (str): Path to the image file.
+            rotation (int): Clockwise rotation in degrees, a multiple of 90.
+
+        Returns:
+            TextureRegion: The region of the rotated image in the atlas.
+        """
+        rotation %= 360
+        if rotation == 0:
+            return self.get_image(image_path, centered=True)
+        key = (image_path, True, rotation)
+        region = self.regions.get(key)
+        if region is not None:
+            self.hits += 1
+            return region
+
+        self.misses += 1
+        image = pyglet.image.load(image_path).get_image_data()
+        width, height = image.width, image.height
+        pixels = np.frombuffer(image.get_data("RGBA", width * 4), dtype=np.uint8)
+        # Rows run bottom to top, so turning the array counterclockwise turns the image clockwise
+        pixels = np.rot90(pixels.reshape(height, width, 4), rotation // 90)
+        rotated = pyglet.image.ImageData(
+            pixels.shape[1], pixels.shape[0], "RGBA", pixels.tobytes()
+        )
+        region = self.add_to_atlas(rotated)
+        # The anchor of the unrotated image, turned with its pixels
+        anchor_x, anchor_y = width // 2, height // 2
+        if rotation == 90:
+            anchor_x, anchor_y = anchor_y, width - anchor_x
+        elif rotation == 180:
+            anchor_x, anchor_y = width - anchor_x, height - anchor_y
+        else:
+            anchor_x, anchor_y = height - anchor_y, anchor_x
+        region.anchor_x = anchor_x
+        region.anchor_y = anchor_y
+        self.regions[key] = region
+        return region
+
+    def add_to_atlas(self, image):
+        """
+        Adds an image to the atlas, creating the atlas on the first call.
+
+        Args:
+            image (AbstractImage): The image.
+
+        Returns:
+            TextureRegion: The region of the image in the atlas.
+        """
+        if self.texture_bin is None:
+            self.texture_bin = pyglet.image.atlas.TextureBin(
+                self.atlas_size, self.atlas_size
+            )
+        return self.texture_bin.add(image, border=1)
+
+    def stats(self):
+        """
+        Reports the cache usage.
+
+        Returns:
+            dict: The number of cached images and of rotated copies, atlases and atlas bytes, and the cache
+                hits and misses.
+        """
+        atlases = self.texture_bin.atlases if self.texture_bin is not None else []
+        return {
+            "images": len({key[0] for key in self.regions}),
+            "rotated": sum(len(key) == 3 for key in self.regions),
+            "atlases": len(atlases),
+            "atlas_bytes": sum(
+                atlas.texture.width * atlas.texture.height * 4 for atlas in atlases
+            ),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+assets = AssetManager()
+
+
 def load_image(image_path):
     """
     Helper function to load and center an image.
@@ -9,10 +147,6 @@ def load_image(image_path):
         image_path (str): Path to the image file.
 
     Returns:
-        Image: Pyglet Image object with centered anchor points.
+        TextureRegion: Shared atlas region of the image with centered anchor points.
     """
-    image = pyglet.image.load(image_path)
-    image.anchor_x = image.width // 2
-    image.anchor_y = image.height // 2
-
-    return image
+    return assets.get_image(image_path, centered=True)
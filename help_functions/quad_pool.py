@@ -0,0 +1,122 @@
+import pyglet
+
+QUAD_INDICES = (0, 1, 2, 0, 2, 3)
+
+
+class QuadPool:
+    """
+    Hands out the quads of one vertex list drawn with the default sprite shader, for sprites that are
+    never rotated or scaled. A quad shows a texture region of the group's texture at a position, so
+    images drawn turned have to be rotated in the atlas, see AssetManager.get_rotated_image.
+
+    Released quads are hidden by a scale of zero and handed out again by the next acquire, and the vertex
+    list grows to twice its size when it is full, so a growing and shrinking set of quads rarely
+    allocates a new vertex list.
+    """
+
+    def __init__(self, batch, group, capacity=16):
+        """
+        Initializes an empty pool.
+
+        Args:
+            batch (Batch): The batch the quads are drawn with.
+            group (SpriteGroup): The group the quads are drawn in, which sets their texture.
+            capacity (int): Number of quads of the first vertex list.
+        """
+        self.batch = batch
+        self.group = group
+        self.program = group.program
+        self.vertex_list = None
+        self.capacity = 0
+        self.used = 0
+        self.free = []
+        self.reserve(capacity)
+
+    def reserve(self, capacity):
+        """
+        Recreates the vertex list with room for capacity quads, keeping the quads handed out so far.
+        New quads are hidden.
+
+        Args:
+            capacity (int): The number of quads.
+        """
+        vertex_list = self.program.vertex_list_indexed(
+            4 * capacity,
+            pyglet.gl.GL_TRIANGLES,
+            [4 * quad + index for quad in range(capacity) for index in QUAD_INDICES],
+            self.batch,
+            self.group,
+            position=("f", (0, 0, 0) * 4 * capacity),
+            colors=("Bn", (255, 255, 255, 255) * 4 * capacity),
+            translate=("f", (0, 0, 0) * 4 * capacity),
+            scale=("f", (0, 0) * 4 * capacity),
+            rotation=("f", (0,) * 4 * capacity),
+            tex_coords=("f", (0, 0, 0) * 4 * capacity),
+        )
+        if self.vertex_list is not None:
+            for name in ("position", "translate", "scale", "tex_coords"):
+                old = getattr(self.vertex_list, name)
+                getattr(vertex_list, name)[: len(old)] = old
+            self.vertex_list.delete()
+        self.vertex_list = vertex_list
+        self.capacity = capacity
+
+    def acquire(self, region, x, y):
+        """
+        Returns a visible quad showing a region at a position, reusing a released quad if there is one.
+
+        Args:
+            region (TextureRegion): A region of the group's texture.
+            x: The x coordinate of the region's anchor in pixels.
+            y: The y coordinate of the region's anchor in pixels.
+
+        Returns:
+            int: The index of the quad.
+        """
+        if self.free:
+            quad = self.free.pop()
+        else:
+            if self.used == self.capacity:
+                self.reserve(2 * self.capacity)
+            quad = self.used
+            self.used += 1
+        self.set_region(quad, region)
+        self.set_position(quad, x, y)
+        self.vertex_list.scale[8 * quad : 8 * quad + 8] = (1, 1) * 4
+        return quad
+
+    def release(self, quad):
+        """
+        Hides a quad and returns it to the pool.
+
+        Args:
+            quad (int): A quad acquired from this pool.
+        """
+        self.vertex_list.scale[8 * quad : 8 * quad + 8] = (0, 0) * 4
+        self.free.append(quad)
+
+    def set_region(self, quad, region):
+        """
+        Shows another region on a quad.
+
+        Args:
+            quad (int): The index of the quad.
+            region (TextureRegion): A region of the group's texture.
+        """
+        x1, y1 = -region.anchor_x, -region.anchor_y
+        x2, y2 = x1 + region.width, y1 + region.height
+        corners = (x1, y1, 0, x2, y1, 0, x2, y2, 0, x1, y2, 0)
+        vertex_list = self.vertex_list
+        vertex_list.position[12 * quad : 12 * quad + 12] = corners
+        vertex_list.tex_coords[12 * quad : 12 * quad + 12] = region.tex_coords
+
+    def set_position(self, quad, x, y):
+        """
+        Moves a quad.
+
+        Args:
+            quad (int): The index of the quad.
+            x: The x coordinate of the region's anchor in pixels.
+            y: The y coordinate of the region's anchor in pixels.
+        """
+        self.vertex_list.translate[12 * quad : 12 * quad + 12] = (x, y, 0) * 4
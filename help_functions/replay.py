@@ -0,0 +1,374 @@
+"""
+Replays of games: the seed and settings of a game plus the actions of the player, which is all it takes to
+re-simulate the game exactly.
+
+A replay file starts with a fixed-size header. Every action follows as a varint of the ticks since the
+previous action, shifted left by three bits, with the direction code in the low bits. The end of the game
+is the same kind of record with END in the low bits, followed by a varint of the final score. A game the
+autopilot steered has a record with AUTOPILOT in the low bits on the tick it first did. Files are
+only ever appended to, so a game that crashed leaves a valid replay of everything up to the crash.
+
+Verify replays headless at full speed with:
+
+    python -m help_functions.replay replays/
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+
+from Classes.game_engine import GameEngine
+from help_functions.const import REPLAY_DIR
+
+MAGIC = b"SNKR"
+VERSION = 2
+# Versions that can be loaded; version 1 replays have no autopilot records
+VERSIONS = (1, 2)
+# Magic, version, seed, width, height, the five spawn chances and steps, difficulty score step, compact
+HEADER = struct.Struct("<4sBQII5dIB")
+END = 4  # Low bits of the record ending a game; 0 to 3 are direction codes
+AUTOPILOT = 5  # Low bits of the record of the tick the autopilot first steered on
+CHANCE_SETTINGS = (
+    "bullet_gen_base_chance",
+    "super_bullet_gen_base_chance",
+    "heart_gen_chance",
+    "bullet_difficulty_step",
+    "super_bullet_difficulty_step",
+)
+
+
+def encode_varint(value):
+    """
+    Encodes a non-negative integer in 7-bit groups, least significant first.
+
+    Args:
+        value (int): The integer.
+
+    Returns:
+        bytes: The encoded integer.
+    """
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varint(data, pos):
+    """
+    Decodes an integer written by encode_varint.
+
+    Args:
+        data (bytes): The encoded data.
+        pos (int): The offset of the integer.
+
+    Returns:
+        tuple: The integer and the offset after it.
+
+    Raises:
+        ValueError: If the data ends within the integer.
+    """
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("replay ends within a record")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class ReplayRecorder:
+    """
+    Writes the replay of one game. Set it as the recorder of the engine; the engine calls record() for
+    every action and finish() when the game is over. Every record is written through to the file at once,
+    as actions are rare and a crash must not lose them.
+    """
+
+    def __init__(self, path, seed, settings):
+        """
+        Creates the replay file and writes its header.
+
+        Args:
+            path (str): The replay file.
+            seed (int): The seed of the game, an unsigned 64-bit integer.
+            settings (dict): The engine settings of the game, see GameEngine.settings.
+        """
+        self.path = path
+        self.last_tick = 0
+        self.autopilot = False
+        self.file = open(path, "wb", buffering=0)
+        self.file.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                seed,
+                settings["width"],
+                settings["height"],
+                *(settings[name] for name in CHANCE_SETTINGS),
+                settings["difficulty_score_step"],
+                settings["compact"],
+            )
+        )
+
+    def record(self, tick, action):
+        """
+        Appends an action.
+
+        Args:
+            tick (int): The tick the action is applied on.
+            action (int): The direction code.
+        """
+        self.file.write(encode_varint((tick - self.last_tick) << 3 | action))
+        self.last_tick = tick
+
+    def mark_autopilot(self, tick):
+        """
+        Marks the game as steered by the autopilot, on the first call only.
+
+        Args:
+            tick (int): The tick the autopilot steers on.
+        """
+        if self.autopilot or self.file.closed:
+            return
+        self.autopilot = True
+        self.file.write(encode_varint((tick - self.last_tick) << 3 | AUTOPILOT))
+        self.last_tick = tick
+
+    def finish(self, tick, score):
+        """
+        Appends the end of the game and closes the file.
+
+        Args:
+            tick (int): The number of ticks the game lasted.
+            score (int): The final score.
+        """
+        if self.file.closed:
+            return
+        self.file.write(
+            encode_varint((tick - self.last_tick) << 3 | END) + encode_varint(score)
+        )
+        self.close()
+
+    def close(self):
+        """
+        Closes the file, leaving an unfinished replay if the game is not over.
+        """
+        self.file.close()
+
+
+def start_recording(engine, directory=REPLAY_DIR):
+    """
+    Starts recording the engine's current game to a new file in a directory.
+
+    Args:
+        engine (GameEngine): The engine, right after a reset.
+        directory (str): The directory of the replay files, created if needed.
+
+    Returns:
+        ReplayRecorder: The recorder, which is also set as the engine's recorder.
+    """
+    os.makedirs(directory, exist_ok=True)
+    seed = engine.state.seed
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{seed:016x}.replay"
+    if engine.recorder is not None:
+        engine.recorder.close()
+    engine.recorder = ReplayRecorder(
+        os.path.join(directory, name), seed, engine.settings()
+    )
+    return engine.recorder
+
+
+class Replay:
+    """
+    A loaded replay.
+    """
+
+    def __init__(
+        self, seed, settings, actions, ticks=None, score=None, autopilot_tick=None
+    ):
+        """
+        Initializes a replay.
+
+        Args:
+            seed (int): The seed of the game.
+            settings (dict): The engine settings of the game.
+            actions (list): The (tick, direction code) actions in order.
+            ticks (int, optional): The number of ticks the game lasted, None if it did not finish.
+            score (int, optional): The final score, None if the game did not finish.
+            autopilot_tick (int, optional): The tick the autopilot first steered on, None if it never
+                did.
+        """
+        self.seed = seed
+        self.settings = settings
+        self.actions = actions
+        self.ticks = ticks
+        self.score = score
+        self.autopilot_tick = autopilot_tick
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a replay file.
+
+        Args:
+            path (str): The replay file.
+
+        Returns:
+            Replay: The replay.
+
+        Raises:
+            ValueError: If the file is not a replay or is cut off within a record.
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise ValueError(f"{path} is too short for a replay")
+        magic, version, seed, width, height, *chances, score_step, compact = (
+            HEADER.unpack_from(data)
+        )
+        if magic != MAGIC or version not in VERSIONS:
+            raise ValueError(f"{path} is not a replay of version {VERSIONS}")
+        settings = dict(zip(CHANCE_SETTINGS, chances))
+        settings.update(
+            difficulty_score_step=score_step,
+            width=width,
+            height=height,
+            compact=bool(compact),
+        )
+
+        actions = []
+        tick = 0
+        autopilot_tick = None
+        pos = HEADER.size
+        while pos < len(data):
+            value, pos = decode_varint(data, pos)
+            tick += value >> 3
+            code = value & 7
+            if code == END:
+                score, pos = decode_varint(data, pos)
+                return cls(seed, settings, actions, tick, score, autopilot_tick)
+            if code == AUTOPILOT:
+                autopilot_tick = tick
+            else:
+                actions.append((tick, code))
+        return cls(seed, settings, actions, autopilot_tick=autopilot_tick)
+
+    def simulate(self):
+        """
+        Re-simulates the game headless. An unfinished replay is simulated up to its last action.
+
+        Returns:
+            GameState: The state at the end of the replay.
+        """
+        engine = GameEngine(seed=self.seed, **self.settings)
+        state = engine.state
+        for tick, action in self.actions:
+            if tick > state.tick:
+                engine.run(tick - state.tick)
+            if state.game_over:
+                return state
+            engine.step(action)
+        if self.ticks is not None and self.ticks > state.tick:
+            engine.run(self.ticks - state.tick)
+        return state
+
+    def verify(self):
+        """
+        Checks that re-simulating the game ends it on the recorded tick with the recorded score.
+
+        Returns:
+            bool: True if the replay is finished and matches, False otherwise.
+        """
+        if self.ticks is None:
+            return False
+        state = self.simulate()
+        return (
+            state.game_over
+            and state.tick == self.ticks
+            and state.snake.score == self.score
+        )
+
+
+def replay_paths(paths):
+    """
+    Expands directories into the replay files in them.
+
+    Args:
+        paths (list): Replay files and directories.
+
+    Returns:
+        list: The replay files.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.endswith(".replay")
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "paths", nargs="*", default=[REPLAY_DIR], help="replay files or directories"
+    )
+    parser.add_argument(
+        "--quiet", action="store_true", help="only print replays that fail"
+    )
+    args = parser.parse_args(argv)
+
+    failed = 0
+    files = replay_paths(args.paths)
+    start = time.perf_counter()
+    for path in files:
+        try:
+            replay = Replay.load(path)
+            ok = replay.verify()
+        except (OSError, ValueError) as error:
+            print(f"{path}: unreadable ({error})")
+            failed += 1
+            continue
+        if not ok:
+            failed += 1
+            state = replay.simulate()
+            claimed = (
+                "unfinished"
+                if replay.ticks is None
+                else f"claims score {replay.score} after {replay.ticks} ticks"
+            )
+            print(
+                f"{path}: MISMATCH, {claimed}, simulated score {state.snake.score} "
+                f"after {state.tick} ticks"
+            )
+        elif not args.quiet:
+            steered = (
+                f", autopilot from tick {replay.autopilot_tick}"
+                if replay.autopilot_tick is not None
+                else ""
+            )
+            print(
+                f"{path}: ok, score {replay.score} after {replay.ticks} ticks{steered}"
+            )
+    elapsed = time.perf_counter() - start
+    rate = len(files) / elapsed * 60 if elapsed > 0 else 0.0
+    print(
+        f"{len(files) - failed}/{len(files)} replays verified in {elapsed:.2f} s "
+        f"({rate:,.0f} games per minute)"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
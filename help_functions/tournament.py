@@ -0,0 +1,316 @@
+"""
+Bot tournaments: many seeded games played headless across all CPU cores, to see how a controller and a
+set of spawn chances play out over a large number of games.
+
+Every game is played by a fresh controller in a worker process and reported back as soon as it ends, so
+results stream in while the tournament runs. The same seeds, settings and controller always give the
+same results, however the games are spread over the workers.
+
+Run from the repository root with:
+
+    python -m help_functions.tournament --games 100000 --output results.jsonl
+    python -m help_functions.tournament --games 10000 --bullet-chance 0.006 --score-step 10
+"""
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+
+from Classes.game_engine import GameEngine
+from help_functions.const import (
+    BULLET_GEN_BASE_CHANCE,
+    SUPER_BULLET_GEN_BASE_CHANCE,
+    HEART_GEN_CHANCE,
+    BULLET_DIFFICULTY_STEP,
+    SUPER_BULLET_DIFFICULTY_STEP,
+    DIFFICULTY_SCORE_STEP,
+    BOARD_WIDTH,
+    BOARD_HEIGHT,
+    TOURNAMENT_MAX_TICKS,
+    TOURNAMENT_PROGRESS_INTERVAL,
+)
+
+DEFAULT_CONTROLLER = "Classes.autopilot:Autopilot"
+TIMEOUT = "timeout"  # Cause of death of a game that was cut off at max_ticks
+
+
+def load_controller(spec):
+    """
+    Looks up a controller factory by name.
+
+    Args:
+        spec (str): "module:attribute" of a callable that returns a controller when called without
+            arguments, e.g. a controller class, or "none" to play without a controller.
+
+    Returns:
+        callable: The factory, or None for "none".
+
+    Raises:
+        ValueError: If the name is not of the form module:attribute.
+    """
+    if spec == "none":
+        return None
+    module, _, attribute = spec.partition(":")
+    if not module or not attribute:
+        raise ValueError(f"controller {spec!r} is not of the form module:attribute")
+    return getattr(importlib.import_module(module), attribute)
+
+
+# The engine and controller factory of a worker process, set up once by init_worker
+worker_engine = None
+worker_factory = None
+worker_max_ticks = None
+
+
+def init_worker(factory, engine_args, max_ticks):
+    """
+    Sets up a worker process: one engine that is reset for every game.
+
+    Args:
+        factory (callable): Creates the controller of a game, or None to play without one.
+        engine_args (dict): Keyword arguments of the GameEngine.
+        max_ticks (int): Ticks after which a game is cut off.
+    """
+    global worker_engine, worker_factory, worker_max_ticks
+    worker_engine = GameEngine(**engine_args)
+    worker_factory = factory
+    worker_max_ticks = max_ticks
+
+
+def play_game(seed, objects=None):
+    """
+    Plays one game in a worker process.
+
+    Args:
+        seed (int): The seed of the game.
+        objects (FallingObjects, optional): Empty falling objects to play the game with instead of the
+            engine's, e.g. to count them.
+
+    Returns:
+        dict: The seed, score, ticks survived, lives left and cause of death of the game.
+    """
+    state = worker_engine.reset(seed)
+    if objects is not None:
+        state.objects = objects
+    controller = worker_factory() if worker_factory is not None else None
+    worker_engine.run(worker_max_ticks, controller)
+    return {
+        "seed": seed,
+        "score": state.snake.score,
+        "ticks": state.tick,
+        "lives": state.snake.lives,
+        "cause_of_death": state.cause_of_death if state.game_over else TIMEOUT,
+    }
+
+
+def play_games(
+    seeds,
+    controller=None,
+    engine_args=None,
+    max_ticks=TOURNAMENT_MAX_TICKS,
+    processes=None,
+    chunksize=None,
+    game=None,
+):
+    """
+    Plays seeded games across a pool of worker processes and yields their results as they finish, in
+    no particular order.
+
+    Args:
+        seeds (list): The seeds of the games.
+        controller (callable, optional): Creates the controller of a game when called without arguments,
+            e.g. Autopilot. It is sent to the workers, so it must be importable by name, like a class or a
+            module-level function. Games are played without a controller if not given.
+        engine_args (dict, optional): Keyword arguments of the GameEngine, e.g. the spawn chances.
+        max_ticks (int): Ticks after which a game is cut off.
+        processes (int, optional): Number of worker processes, one per CPU core if not given.
+        chunksize (int, optional): Games sent to a worker at once. By default about 16 chunks per worker,
+            enough to balance games of different lengths.
+        game (callable, optional): Plays a game in a worker given its seed, with the worker_engine and
+            worker_factory set up by init_worker, and returns its result. play_game if not given.
+
+    Yields:
+        dict: The result of a game, see play_game.
+    """
+    seeds = list(seeds)
+    processes = processes or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(seeds) // (16 * processes))
+    with multiprocessing.Pool(
+        processes, init_worker, (controller, engine_args or {}, max_ticks)
+    ) as pool:
+        yield from pool.imap_unordered(game or play_game, seeds, chunksize)
+
+
+class TournamentResults:
+    """
+    Aggregates the results of a tournament as they stream in.
+    """
+
+    def __init__(self):
+        """
+        Initializes empty results.
+        """
+        self.games = 0
+        self.scores = []
+        self.total_ticks = 0
+        self.causes = Counter()
+
+    def add(self, result):
+        """
+        Adds the result of a game.
+
+        Args:
+            result (dict): The result, see play_game.
+        """
+        self.games += 1
+        self.scores.append(result["score"])
+        self.total_ticks += result["ticks"]
+        self.causes[result["cause_of_death"]] += 1
+
+    def summary(self):
+        """
+        Summarizes the results.
+
+        Returns:
+            dict: The number of games, the mean and the 10th, 50th and 90th percentile scores and the
+                best score, the mean ticks survived and the share of games per cause of death.
+        """
+        if not self.games:
+            return {"games": 0}
+        ordered = sorted(self.scores)
+        last = len(ordered) - 1
+        return {
+            "games": self.games,
+            "mean_score": sum(ordered) / self.games,
+            "score_percentiles": {
+                percent: ordered[last * percent // 100] for percent in (10, 50, 90)
+            },
+            "best_score": ordered[-1],
+            "mean_ticks": self.total_ticks / self.games,
+            "causes": {
+                cause: count / self.games for cause, count in self.causes.most_common()
+            },
+        }
+
+
+def run_tournament(seeds, on_result=None, **play_args):
+    """
+    Plays a tournament and aggregates its results.
+
+    Args:
+        seeds (list): The seeds of the games.
+        on_result (callable, optional): Called with the results so far and the result of every game as
+            it comes in, e.g. to report progress or write the results out.
+        **play_args: Arguments of play_games: the controller, engine arguments, max ticks and processes.
+
+    Returns:
+        TournamentResults: The results of all games.
+    """
+    results = TournamentResults()
+    for result in play_games(seeds, **play_args):
+        results.add(result)
+        if on_result is not None:
+            on_result(results, result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--games", type=int, default=1000, help="number of games")
+    parser.add_argument(
+        "--first-seed", type=int, default=0, help="the games use consecutive seeds"
+    )
+    parser.add_argument(
+        "--controller",
+        default=DEFAULT_CONTROLLER,
+        help='module:attribute of the controller factory, or "none"',
+    )
+    parser.add_argument(
+        "--processes", type=int, default=None, help="default: one per CPU core"
+    )
+    parser.add_argument("--max-ticks", type=int, default=TOURNAMENT_MAX_TICKS)
+    parser.add_argument("--bullet-chance", type=float, default=BULLET_GEN_BASE_CHANCE)
+    parser.add_argument(
+        "--super-bullet-chance", type=float, default=SUPER_BULLET_GEN_BASE_CHANCE
+    )
+    parser.add_argument("--heart-chance", type=float, default=HEART_GEN_CHANCE)
+    parser.add_argument("--bullet-step", type=float, default=BULLET_DIFFICULTY_STEP)
+    parser.add_argument(
+        "--super-bullet-step", type=float, default=SUPER_BULLET_DIFFICULTY_STEP
+    )
+    parser.add_argument(
+        "--score-step",
+        type=int,
+        default=DIFFICULTY_SCORE_STEP,
+        help="points per difficulty level",
+    )
+    parser.add_argument("--width", type=int, default=BOARD_WIDTH)
+    parser.add_argument("--height", type=int, default=BOARD_HEIGHT)
+    parser.add_argument(
+        "--output", help="write the result of every game to this JSON lines file"
+    )
+    args = parser.parse_args(argv)
+    try:
+        controller = load_controller(args.controller)
+    except (ImportError, AttributeError, ValueError) as error:
+        parser.error(f"cannot load the controller: {error}")
+
+    engine_args = {
+        "bullet_gen_base_chance": args.bullet_chance,
+        "super_bullet_gen_base_chance": args.super_bullet_chance,
+        "heart_gen_chance": args.heart_chance,
+        "bullet_difficulty_step": args.bullet_step,
+        "super_bullet_difficulty_step": args.super_bullet_step,
+        "difficulty_score_step": args.score_step,
+        "width": args.width,
+        "height": args.height,
+    }
+    seeds = range(args.first_seed, args.first_seed + args.games)
+    output = open(args.output, "w") if args.output else None
+    start = time.perf_counter()
+    last_report = start
+
+    def on_result(results, result):
+        nonlocal last_report
+        if output is not None:
+            output.write(json.dumps(result) + "\n")
+        now = time.perf_counter()
+        if (
+            now - last_report >= TOURNAMENT_PROGRESS_INTERVAL
+            or results.games == args.games
+        ):
+            last_report = now
+            rate = results.games / (now - start)
+            remaining = (args.games - results.games) / rate
+            print(
+                f"{results.games}/{args.games} games, mean score "
+                f"{sum(results.scores) / results.games:.2f}, {rate:,.0f} games/s, "
+                f"{remaining:.0f} s left",
+                file=sys.stderr,
+            )
+
+    try:
+        results = run_tournament(
+            seeds,
+            on_result,
+            controller=controller,
+            engine_args=engine_args,
+            max_ticks=args.max_ticks,
+            processes=args.processes,
+        )
+    finally:
+        if output is not None:
+            output.close()
+    elapsed = time.perf_counter() - start
+    print(json.dumps(dict(results.summary(), seconds=round(elapsed, 2)), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,13 @@
+import time
+
 import pyglet
 from pyglet import shapes, text
-from help_functions.const import WINDOW_WIDTH, WINDOW_HEIGHT
+from help_functions.const import WINDOW_WIDTH, WINDOW_HEIGHT, PROFILER_OVERLAY_INTERVAL
 from help_functions.image import load_image
+from help_functions.high_scores import HighScoreStore
 
 
-def compute_and_center_sprite_text(image, info_text, y_pos, padding):
+def compute_and_center_sprite_text(image, info_text, y_pos, padding, batch=None):
     """
     Calculates the position to center an image and a text horizontally on the screen.
 
@@ -13,23 +16,26 @@ def compute_and_center_sprite_text(image, info_text, y_pos, padding):
         info_text (Label): Pyglet Label to center next to the image.
         y_pos (int): The vertical position where the image and the text should be placed.
         padding (int): The space between the image and the text.
+        batch (Batch, optional): Pyglet batch the sprite is added to.
 
     Returns:
         tuple: A tuple with the image as a sprite and the text label.
     """
     combined_width = image.width + padding + info_text.content_width
     start_pos = (WINDOW_WIDTH - combined_width) // 2
-    sprite = pyglet.sprite.Sprite(image, x=start_pos, y=y_pos)
+    sprite = pyglet.sprite.Sprite(image, x=start_pos, y=y_pos, batch=batch)
     info_text.x = sprite.x + image.width + padding
     return sprite, info_text
 
 
-def init_ui_elements(batch):
+def init_ui_elements(start_batch, game_over_batch):
     """
-    Initializes all the UI elements needed for the game's start and game over screens.
+    Initializes all the UI elements needed for the game's start and game over screens. Each screen
+    gets its own batch, so it is drawn with a single call.
 
     Args:
-        batch (Batch): Pyglet batch to group all the UI elements.
+        start_batch (Batch): Pyglet batch to group the UI elements of the start screen.
+        game_over_batch (Batch): Pyglet batch to group the UI elements of the game over screen.
 
     Returns:
         tuple: A tuple containing all UI elements.
@@ -39,7 +45,7 @@ def init_ui_elements(batch):
 
     shift_up = 45
 
-    high_score_display = HighScoreDisplay(batch)
+    high_score_display = HighScoreDisplay(game_over_batch, y_shift=third_height + 70)
 
     play_button = shapes.Rectangle(
         WINDOW_WIDTH // 2 - 50,
@@ -47,7 +53,7 @@ def init_ui_elements(batch):
         100,
         50,
         color=(129, 180, 69),
-        batch=batch,
+        batch=start_batch,
     )
     play_text = text.Label(
         "Play",
@@ -57,7 +63,7 @@ def init_ui_elements(batch):
         y=third_height + 95 + shift_up,
         anchor_x="center",
         anchor_y="center",
-        batch=batch,
+        batch=start_batch,
     )
 
     restart_button = shapes.Rectangle(
@@ -66,7 +72,7 @@ def init_ui_elements(batch):
         100,
         50,
         color=(211, 122, 105),
-        batch=batch,
+        batch=game_over_batch,
     )
     restart_text = text.Label(
         "Restart",
@@ -76,7 +82,7 @@ def init_ui_elements(batch):
         y=third_height - 25,
         anchor_x="center",
         anchor_y="center",
-        batch=batch,
+        batch=game_over_batch,
     )
 
     food_info_text = text.Label(
@@ -86,11 +92,11 @@ def init_ui_elements(batch):
         y=third_height + 35 + shift_up,
         anchor_x="left",
         anchor_y="center",
-        batch=batch,
+        batch=start_batch,
     )
     food_image = load_image("pictures/food.png")
     food_sprite, food_info_text = compute_and_center_sprite_text(
-        food_image, food_info_text, third_height + 35 + shift_up, padding
+        food_image, food_info_text, third_height + 35 + shift_up, padding, start_batch
     )
 
     super_food_info_text = text.Label(
@@ -100,11 +106,15 @@ def init_ui_elements(batch):
         y=third_height - 15 + shift_up,
         anchor_x="left",
         anchor_y="center",
-        batch=batch,
+        batch=start_batch,
     )
     super_food_image = load_image("pictures/super_food.png")
     super_food_sprite, super_food_info_text = compute_and_center_sprite_text(
-        super_food_image, super_food_info_text, third_height - 15 + shift_up, padding
+        super_food_image,
+        super_food_info_text,
+        third_height - 15 + shift_up,
+        padding,
+        start_batch,
     )
 
     heart_info_text = text.Label(
@@ -114,11 +124,11 @@ def init_ui_elements(batch):
         y=third_height - 65 + shift_up,
         anchor_x="left",
         anchor_y="center",
-        batch=batch,
+        batch=start_batch,
     )
     heart_image = load_image("pictures/heart.png")
     heart_sprite, heart_info_text = compute_and_center_sprite_text(
-        heart_image, heart_info_text, third_height - 65 + shift_up, padding
+        heart_image, heart_info_text, third_height - 65 + shift_up, padding, start_batch
     )
 
     super_bullet_info_text = text.Label(
@@ -128,7 +138,7 @@ def init_ui_elements(batch):
         y=third_height - 115 + shift_up,
         anchor_x="left",
         anchor_y="center",
-        batch=batch,
+        batch=start_batch,
     )
     super_bullet_image = load_image("pictures/super_bullet.png")
     super_bullet_sprite, super_bullet_info_text = compute_and_center_sprite_text(
@@ -136,6 +146,7 @@ def init_ui_elements(batch):
         super_bullet_info_text,
         third_height - 115 + shift_up,
         padding,
+        start_batch,
     )
 
     bullet_info_text = text.Label(
@@ -145,11 +156,15 @@ def init_ui_elements(batch):
         y=third_height - 165 + shift_up,
         anchor_x="left",
         anchor_y="center",
-        batch=batch,
+        batch=start_batch,
     )
     bullet_image = load_image("pictures/bullet.png")
     bullet_sprite, bullet_info_text = compute_and_center_sprite_text(
-        bullet_image, bullet_info_text, third_height - 165 + shift_up, padding
+        bullet_image,
+        bullet_info_text,
+        third_height - 165 + shift_up,
+        padding,
+        start_batch,
     )
 
     snake_info_text = text.Label(
@@ -159,16 +174,23 @@ def init_ui_elements(batch):
         y=third_height - 215 + shift_up,
         anchor_x="left",
         anchor_y="center",
-        batch=batch,
+        batch=start_batch,
     )
     snake_image = load_image("pictures/explosion.png")
     snake_sprite, snake_info_text = compute_and_center_sprite_text(
-        snake_image, snake_info_text, third_height - 215 + shift_up, padding
+        snake_image,
+        snake_info_text,
+        third_height - 215 + shift_up,
+        padding,
+        start_batch,
     )
 
     image = load_image("pictures/snake_ui.png")
     image_sprite = pyglet.sprite.Sprite(
-        image, x=WINDOW_WIDTH // 2, y=WINDOW_HEIGHT // 2 + 140 + shift_up, batch=batch
+        image,
+        x=WINDOW_WIDTH // 2,
+        y=WINDOW_HEIGHT // 2 + 140 + shift_up,
+        batch=start_batch,
     )
 
     return (
@@ -198,14 +220,16 @@ class HighScoreDisplay:
     Class for handling the display of high scores in the game.
     """
 
-    def __init__(self, batch=None, y_shift=0):
+    def __init__(self, batch=None, y_shift=0, store=None):
         """
         Initializer for HighScoreDisplay. Creates text labels for high scores.
 
         Args:
             batch (Batch, optional): Pyglet batch to group all the UI elements.
             y_shift (int, optional): Vertical shift for high score labels.
+            store (HighScoreStore, optional): The store the high scores are kept in.
         """
+        self.store = store if store is not None else HighScoreStore()
         self.high_score_labels = [
             pyglet.text.Label(
                 "",
@@ -223,25 +247,24 @@ class HighScoreDisplay:
 
     def get_high_scores(self):
         """
-        Reads the high scores from a file and returns the top 3.
+        Returns the top 3 high scores from the high score store.
 
         Returns:
             list: The top 3 high scores.
         """
-        try:
-            with open("highscores.txt", "r") as f:
-                scores = f.read().split("\n")
-            scores = [int(score) for score in scores if score]
-            scores.sort(reverse=True)
-            return scores[:3]
-        except FileNotFoundError:
-            return []
+        return self.store.top()[:3]
 
-    def update(self):
+    def update(self, high_scores=None):
         """
         Updates the high score labels with the current high scores.
+
+        Args:
+            high_scores (list, optional): The high scores, best first. Read from the store if not given.
         """
-        high_scores = self.get_high_scores()
+        if high_scores is None:
+            high_scores = self.get_high_scores()
+        else:
+            high_scores = high_scores[:3]
         for i, score in enumerate(
             high_scores[::-1]
         ):  # Enumerate over reversed high_scores
@@ -250,3 +273,55 @@ class HighScoreDisplay:
             ].text = (
                 f"High Score {3 - i}: {score}"  # 3 - i to reverse the order of labels
             )
+
+
+class ProfilerOverlay:
+    """
+    Class for showing the percentiles of a FrameProfiler on top of the game.
+    """
+
+    def __init__(self, profiler):
+        """
+        Initializer for ProfilerOverlay. Creates the label the percentiles are shown in.
+
+        Args:
+            profiler (FrameProfiler): The profiler whose percentiles are shown.
+        """
+        self.profiler = profiler
+        self.label = pyglet.text.Label(
+            "",
+            font_name="Courier New",
+            font_size=9,
+            x=10,
+            y=WINDOW_HEIGHT - 60,
+            width=WINDOW_WIDTH - 20,
+            multiline=True,
+            anchor_y="top",
+            color=(255, 255, 0, 255),
+        )
+        self.last_refresh = None
+
+    def update(self):
+        """
+        Updates the label with the current percentiles.
+        """
+        lines = [f"{'phase':<12}{'p50':>9}{'p95':>9}{'p99':>9}  us"]
+        for phase, percentiles in sorted(self.profiler.stats().items()):
+            lines.append(
+                f"{phase:<12}" + "".join(f"{p / 1000:9.1f}" for p in percentiles)
+            )
+        self.label.text = "\n".join(lines)
+
+    def draw(self):
+        """
+        Draws the overlay, refreshing it at most every PROFILER_OVERLAY_INTERVAL seconds so the label
+        layout does not show up in the profile itself.
+        """
+        now = time.perf_counter()
+        if (
+            self.last_refresh is None
+            or now - self.last_refresh >= PROFILER_OVERLAY_INTERVAL
+        ):
+            self.update()
+            self.last_refresh = now
+        self.label.draw()
@@ -1,23 +1,33 @@
+from time import perf_counter_ns
+
 import pyglet
 from pyglet.window import mouse
 
-from Classes.snake import Snake
-from Classes.food import Food, SuperFood
-from Classes.falling_objects import Bullet, Heart, SuperBullet
+from Classes.game_engine import GameEngine
 from Classes.lifes import Lifes
-from help_functions.const import WINDOW_WIDTH, WINDOW_HEIGHT
-
-import random
-from help_functions.ui import init_ui_elements
+from Classes.autopilot import Autopilot
+from help_functions.const import (
+    WINDOW_WIDTH,
+    WINDOW_HEIGHT,
+    UP,
+    DOWN,
+    LEFT,
+    RIGHT,
+    PROFILER_TRACE_FILE,
+    ATTRACT_MODE,
+)
+
+from help_functions.ui import init_ui_elements, ProfilerOverlay
+from help_functions.game_loop import FixedTimestepLoop, get_refresh_rate
+from help_functions.high_score_writer import HighScoreWriter
+from help_functions.profiler import FrameProfiler
+from help_functions.camera import Camera
+from help_functions.replay import start_recording
 
 start_screen = True
 game_over_screen = False
-batch = pyglet.graphics.Batch()
-
-# Declare the base chance for bullet and super bullet
-bullet_gen_base_chance = 0.004
-super_bullet_gen_base_chance = 0.00025
-
+start_batch = pyglet.graphics.Batch()
+game_over_batch = pyglet.graphics.Batch()
 
 # Initialize UI elements
 (
@@ -39,64 +49,92 @@ super_bullet_gen_base_chance = 0.00025
     super_food_sprite,
     super_food_info_text,
     high_score_display,
-) = init_ui_elements(batch)
+) = init_ui_elements(start_batch, game_over_batch)
+high_score_writer = HighScoreWriter(high_score_display.store)
 score_label = pyglet.text.Label("Score: 0", font_size=20, x=10, y=WINDOW_HEIGHT - 30)
 
 # Initialize Pyglet window
 window = pyglet.window.Window(WINDOW_WIDTH, WINDOW_HEIGHT)
 
-# Create instances of the Snake, Food, SuperFood, and Lifes classes
-snake = Snake()
-food = Food(snake)
-super_food = SuperFood(snake)
-lifes = Lifes(snake)
+# Create the game engine and the Lifes display for its snake
+engine = GameEngine()
+lifes = Lifes(engine.state.snake)
+
+# Follows the snake's head on a board larger than the window
+camera = Camera(WINDOW_WIDTH, WINDOW_HEIGHT, engine.width, engine.height)
+
+# The profiler is attached to the engine while profiling is switched on with F3
+frame_profiler = FrameProfiler()
+profiler_overlay = ProfilerOverlay(frame_profiler)
+
+# A demo game the autopilot plays behind the start screen
+demo_engine = GameEngine() if ATTRACT_MODE else None
+demo_pilot = Autopilot()
+# Steers the player's snake while switched on with A
+autopilot = None
+# Whether the autopilot steered at any point of the current game, which keeps its score off the high
+# scores
+autopilot_steered = False
 
-objects = []
 paused = False
-high_score_labels = []
+pending_action = None
+ticking = False
 
 
 def update_score_label():
     """
     Updates the score label with the current score.
     """
-    score_label.text = f"Score: {snake.score}"
+    score_label.text = f"Score: {engine.state.snake.score}"
 
 
 def restart_game():
     """
     Resets all the game variables to their initial states.
     """
-    global snake, food, super_food, lifes, objects, score_label, high_score_labels
-    snake = Snake()
-    food = Food(snake)
-    super_food = SuperFood(snake)
-    lifes = Lifes(snake)
-    objects = []
+    global lifes, pending_action, autopilot_steered
+    engine.reset()
+    start_recording(engine)
+    lifes = Lifes(engine.state.snake)
+    pending_action = None
+    autopilot_steered = False
     score_label.text = "Score: 0"
 
 
 @window.event
 def on_key_press(symbol, modifiers):
     """
-    Handles key press events. Changes snake direction or pauses the game
-    based on the key pressed.
+    Handles key press events. Changes snake direction, pauses the game, switches the autopilot or
+    profiling on or off or saves a trace based on the key pressed.
 
     Args:
         symbol: The key symbol pressed.
         modifiers: State of the modifier keys.
     """
-    global paused
+    global paused, pending_action, autopilot
     if symbol == pyglet.window.key.UP:
-        snake.change_direction("up")
+        pending_action = UP
     elif symbol == pyglet.window.key.DOWN:
-        snake.change_direction("down")
+        pending_action = DOWN
     elif symbol == pyglet.window.key.LEFT:
-        snake.change_direction("left")
+        pending_action = LEFT
     elif symbol == pyglet.window.key.RIGHT:
-        snake.change_direction("right")
+        pending_action = RIGHT
     elif symbol == pyglet.window.key.P:
         paused = not paused
+        update_schedule()
+    elif symbol == pyglet.window.key.A:
+        autopilot = Autopilot() if autopilot is None else None
+    elif symbol == pyglet.window.key.F3:
+        if engine.profiler is None:
+            frame_profiler.clear()
+            engine.profiler = frame_profiler
+        else:
+            engine.profiler = None
+        if not ticking:
+            request_redraw()
+    elif symbol == pyglet.window.key.F4 and engine.profiler is not None:
+        frame_profiler.dump_trace(PROFILER_TRACE_FILE)
 
 
 @window.event
@@ -105,48 +143,53 @@ def on_draw():
     Draws all game and UI elements based on the game state (start screen, game over screen, or in-game).
     """
     window.clear()
-    global high_score_labels
-
-    if high_score_labels is None:
-        high_score_labels = []
 
     if start_screen:
-        image_sprite.draw()
-        play_button.draw()
-        play_text.draw()
-        heart_sprite.draw()
-        heart_info_text.draw()
-        super_bullet_sprite.draw()
-        super_bullet_info_text.draw()
-        bullet_sprite.draw()
-        bullet_info_text.draw()
-        snake_sprite.draw()
-        snake_info_text.draw()
-        food_sprite.draw()
-        food_info_text.draw()
-        super_food_sprite.draw()
-        super_food_info_text.draw()
+        if demo_engine is not None:
+            draw_game(demo_engine.state)
+        start_batch.draw()
     elif game_over_screen:
-        score_label.text = f"Score: {snake.score}"
         score_label.draw()
-        restart_button.draw()
-        restart_text.draw()
-
-        # Shift high scores and draw them
-        third_height = WINDOW_HEIGHT // 3
-        for i, high_score_label in enumerate(high_score_display.high_score_labels):
-            high_score_label.y = third_height + 70 + i * 30
-            high_score_label.draw()
-
+        game_over_batch.draw()
     else:
-        # Draw the game
-        snake.draw()
-        food.draw()
-        super_food.draw()
+        draw_game(engine.state)
+        profiler = engine.profiler
+        if profiler is not None:
+            start = perf_counter_ns()
         lifes.draw()
-        for obj in objects:
-            obj.draw()
         score_label.draw()
+        if profiler is not None:
+            profiler.record("labels.draw", start)
+
+    if engine.profiler is not None:
+        profiler_overlay.draw()
+
+
+def draw_game(state):
+    """
+    Draws the snake, the foods and the falling objects of a game through the camera.
+
+    Args:
+        state (GameState): The state of the game.
+    """
+    alpha = game_loop.alpha
+    profiler = engine.profiler
+    if profiler is not None:
+        start = perf_counter_ns()
+    snake = state.snake
+    camera.follow(*snake.interpolated_head(alpha))
+    camera.begin(window)
+    snake.draw(alpha, camera.viewport)
+    if profiler is not None:
+        start = profiler.record("snake.draw", start)
+    # Only what is in view is drawn
+    for food in (state.food, state.super_food):
+        if food.position is not None and camera.is_visible(*food.position):
+            food.draw()
+    state.objects.draw(alpha, camera.viewport)
+    camera.end(window)
+    if profiler is not None:
+        profiler.record("objects.draw", start)
 
 
 @window.event
@@ -168,6 +211,8 @@ def on_mouse_press(x, y, button, modifiers):
         ):
             # Clicked Play button
             start_screen = False
+            start_recording(engine)
+            update_schedule()
         elif (
             game_over_screen
             and restart_button.x <= x <= restart_button.x + restart_button.width
@@ -176,77 +221,150 @@ def on_mouse_press(x, y, button, modifiers):
             # Clicked Restart button
             game_over_screen = False
             restart_game()
+            update_schedule()
+
+
+def steer(pilot, state):
+    """
+    Asks an autopilot for the next action. Its decisions are timed with the engine's profiler, so they
+    only show up while profiling is switched on.
+
+    Args:
+        pilot (Autopilot): The autopilot.
+        state (GameState): The state of the game it steers.
+
+    Returns:
+        int: The direction to steer in, or None to keep going.
+    """
+    pilot.profiler = engine.profiler
+    return pilot(state)
+
+
+def tick():
+    """
+    Advances the game engine by one tick and handles game over. On the start screen the demo game is
+    advanced instead, and started over when it is lost.
+
+    Returns:
+        bool: False if the game is not running, True otherwise.
+    """
+    global game_over_screen, pending_action, autopilot_steered
+
+    if paused or game_over_screen:
+        return False
+    if start_screen:
+        if demo_engine is None:
+            return False
+        if demo_engine.step(steer(demo_pilot, demo_engine.state)).game_over:
+            demo_engine.reset()
+        return True
+
+    action = pending_action
+    if autopilot is not None:
+        if not autopilot_steered:
+            autopilot_steered = True
+            if engine.recorder is not None:
+                engine.recorder.mark_autopilot(engine.state.tick)
+        if action is None:
+            action = steer(autopilot, engine.state)
+    state = engine.step(action)
+    pending_action = None
+    # The last tick can score too, so the game over screen shows the score that is saved
+    update_score_label()
+
+    if state.game_over:
+        if not autopilot_steered:
+            high_score_writer.submit(state.snake.score, show_high_scores)
+        game_over_screen = True
+        update_schedule()
+        return False
+    return True
+
+
+def show_high_scores(dt, high_scores):
+    """
+    Shows the high scores once a score was saved by the high score writer.
+
+    Args:
+        dt: The time delta since the callback was scheduled.
+        high_scores: The high scores, best first.
+    """
+    high_score_display.update(high_scores)
+    if not ticking:
+        request_redraw()
+
+
+game_loop = FixedTimestepLoop(tick)
 
 
 def update(dt):
     """
-    Handles game updates. Moves the snake, checks for collision events, generates falling objects, and handles game over.
+    Runs the simulation ticks that fit into the elapsed time, then redraws the window.
 
     Args:
         dt: The time delta since the last update.
     """
-    global objects, paused, game_over_screen, start_screen, high_score_display
-
-    if paused or game_over_screen or start_screen:
-        return
-
-    snake.move()
-
-    if snake.collides_with_food(food):
-        food.eat()
-        snake.grow(1)
-        snake.score += 1
-        if random.random() < 0.05:
-            super_food.position = super_food.generate_position()
-
-    elif snake.collides_with_food(super_food):
-        super_food.eat()
-        snake.grow(5)
-        snake.score += 5
-
-    for obj in objects[:]:  # Loop over a copy of the list as we'll modify it
-        obj.move()
-        if snake.collides_with_object(obj):
-            if isinstance(obj, Bullet):  # If the object is a bullet, decrease life
-                snake.lose_life()
-            elif isinstance(obj, Heart):  # If the object is a heart, increase life
-                if snake.lives < 5:
-                    snake.lives += 1
-            elif isinstance(obj, SuperBullet):
-                for _ in range(3):  # Lose life 3 times
-                    snake.lose_life()
-            objects.remove(obj)
-
-    objects = [obj for obj in objects if not obj.is_off_screen()]
-
-    bullet_gen_chance = bullet_gen_base_chance
-    super_bullet_gen_chance = super_bullet_gen_base_chance
-
-    if snake.score >= 7:
-        difficulty_factor = 1 + ((snake.score - 7) // 7)
-        bullet_gen_chance += difficulty_factor * 0.0015
-        super_bullet_gen_chance += difficulty_factor * 0.0003
-
-    # Generate Bullets, Super Bullets, and Hearts based on the updated chances
-    if random.random() < bullet_gen_chance:
-        objects.append(Bullet())
-    if random.random() < super_bullet_gen_chance:
-        objects.append(SuperBullet())
-    if random.random() < 0.0005:
-        objects.append(Heart())
-    if random.randint(0, 1000) == 1:
-        super_food.position = super_food.generate_position()
-
-    if snake.collides_with_self() or snake.lives <= 0:
-        with open("highscores.txt", "a") as f:
-            f.write(f"{snake.score}\n")
-        high_score_display.update()
-        game_over_screen = True
-        return
+    profiler = engine.profiler
+    if profiler is not None:
+        start = perf_counter_ns()
+    game_loop.advance(dt)
+    window.draw(dt)
+    if profiler is not None:
+        profiler.record("frame", start)
 
-    update_score_label()
 
+def redraw(dt):
+    """
+    Redraws the window once while the game is idle.
+
+    Args:
+        dt: The time delta since the redraw was requested.
+    """
+    window.draw(dt)
+
+
+def request_redraw():
+    """
+    Schedules a single redraw. Several requests before the next frame are merged into one.
+    """
+    pyglet.clock.unschedule(redraw)
+    pyglet.clock.schedule_once(redraw, 0)
+
+
+def update_schedule():
+    """
+    Schedules the update tick while the game or the demo game of the start screen is running and
+    unschedules it while the game is paused or a game over screen is shown. An idle window is only
+    redrawn when something changes, so it does not keep a CPU core busy.
+    """
+    global ticking
+    running = not (paused or game_over_screen or (start_screen and demo_engine is None))
+    if running and not ticking:
+        game_loop.reset()
+        pyglet.clock.schedule_interval(update, 1 / get_refresh_rate(window))
+    elif not running and ticking:
+        pyglet.clock.unschedule(update)
+    ticking = running
+    if not running:
+        request_redraw()
+
+
+@window.event
+def on_expose():
+    """
+    Redraws the window when it was uncovered or restored while the game is idle.
+    """
+    if not ticking:
+        request_redraw()
+
+
+update_schedule()
+
+pyglet.app.run(None)
 
-pyglet.clock.schedule_interval(update, 1 / 90)
+# Keep the replay of a game that was quit before it was over
+if engine.recorder is not None:
+    engine.recorder.close()
 
-pyglet.app.run()
+# Write the scores that are still queued and flush them to the disk
+high_score_writer.close()
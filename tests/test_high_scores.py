@@ -0,0 +1,72 @@
+import json
+
+from help_functions.high_scores import HighScoreStore
+
+
+def make_store(tmp_path, k=3):
+    return HighScoreStore(
+        str(tmp_path / "highscores.txt"), str(tmp_path / "highscores.idx"), k
+    )
+
+
+def test_keeps_the_best_k_scores(tmp_path):
+    store = make_store(tmp_path)
+    store.add_many([5, 1, 9, 3, 7])
+    store.add(2)
+
+    assert store.top() == [9, 7, 5]
+    assert len(store.heap) == 3
+    assert (tmp_path / "highscores.txt").read_text().split() == [
+        "5",
+        "1",
+        "9",
+        "3",
+        "7",
+        "2",
+    ]
+
+
+def test_index_records_the_history_offset(tmp_path):
+    store = make_store(tmp_path)
+    store.add_many([4, 8])
+
+    index = json.loads((tmp_path / "highscores.idx").read_text())
+    assert index["k"] == 3
+    assert index["offset"] == len(b"4\n8\n")
+    assert sorted(index["scores"]) == [4, 8]
+
+
+def test_load_only_reads_the_history_after_the_offset(tmp_path):
+    history = tmp_path / "highscores.txt"
+    history.write_text("1\n2\n")
+    # The index claims a score the history does not have, so it shows whether the lines it covers
+    # are read again
+    (tmp_path / "highscores.idx").write_text(
+        json.dumps({"k": 3, "offset": 4, "scores": [100]})
+    )
+    with open(history, "a") as f:
+        f.write("6\n7")  # The last line is still being written
+
+    store = make_store(tmp_path)
+    assert store.top() == [100, 6]
+    assert store.offset == len(b"1\n2\n6\n")
+
+    store.add(3)
+    assert store.top() == [100, 7, 6]
+    assert history.read_text() == "1\n2\n6\n7\n3\n"
+
+
+def test_rebuilds_an_index_ahead_of_the_history(tmp_path):
+    (tmp_path / "highscores.txt").write_text("1\n2\n")
+    (tmp_path / "highscores.idx").write_text(
+        json.dumps({"k": 3, "offset": 100, "scores": [100]})
+    )
+
+    assert make_store(tmp_path).top() == [2, 1]
+
+
+def test_rebuilds_an_index_kept_for_another_k(tmp_path):
+    (tmp_path / "highscores.txt").write_text("1\n2\n3\n")
+    make_store(tmp_path, k=1)
+
+    assert make_store(tmp_path, k=2).top() == [3, 2]
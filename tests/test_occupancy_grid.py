@@ -0,0 +1,90 @@
+import random
+
+from Classes.occupancy_grid import OccupancyGrid
+from help_functions.const import SEGMENT_SIZE
+
+
+def test_counts_stacked_segments():
+    grid = OccupancyGrid(5 * SEGMENT_SIZE, 5 * SEGMENT_SIZE)
+    grid.add((40, 60))
+    grid.add((40, 60))
+
+    assert grid.count((40, 60)) == 2
+    assert grid.count((45, 79)) == 2  # Any position in the cell
+    grid.remove((40, 60))
+    assert grid.count((40, 60)) == 1
+    assert not grid.is_free((40, 60))
+    grid.remove((40, 60))
+    assert grid.is_free((40, 60))
+
+
+def test_ignores_positions_off_the_board():
+    grid = OccupancyGrid(5 * SEGMENT_SIZE, 5 * SEGMENT_SIZE)
+    grid.add((-SEGMENT_SIZE, 0))
+    grid.add((0, 5 * SEGMENT_SIZE))
+
+    assert grid.count((-SEGMENT_SIZE, 0)) == 0
+    assert grid.count((0, 5 * SEGMENT_SIZE)) == 0
+    assert sum(grid.counts) == 0
+
+
+def cell_position(grid, index):
+    return index % grid.columns * SEGMENT_SIZE, index // grid.columns * SEGMENT_SIZE
+
+
+def check_free_cells(grid):
+    for slot, index in enumerate(grid.free_cells):
+        assert grid.free_slots[index] == slot
+    first = grid.min_sample_row * grid.columns
+    free = {
+        index
+        for index in range(first, grid.columns * grid.rows)
+        if grid.counts[index] == 0
+    }
+    assert sorted(grid.free_cells) == sorted(free)
+
+
+def test_occupied_cell_is_swap_removed_from_the_free_cells():
+    grid = OccupancyGrid(4 * SEGMENT_SIZE, 4 * SEGMENT_SIZE, min_sample_row=0)
+    last = grid.free_cells[-1]
+    grid.add(cell_position(grid, 5))
+
+    # The last free cell takes the slot of the occupied one
+    assert grid.free_cells[5] == last
+    assert grid.free_slots[last] == 5
+    assert grid.free_slots[5] == -1
+    assert len(grid.free_cells) == 15
+    check_free_cells(grid)
+
+
+def test_free_cells_follow_adds_and_removes():
+    rng = random.Random(0)
+    grid = OccupancyGrid(6 * SEGMENT_SIZE, 6 * SEGMENT_SIZE)
+    occupied = []
+    for _ in range(500):
+        if occupied and rng.random() < 0.5:
+            grid.remove(occupied.pop(rng.randrange(len(occupied))))
+        else:
+            position = cell_position(grid, rng.randrange(grid.columns * grid.rows))
+            grid.add(position)
+            occupied.append(position)
+        check_free_cells(grid)
+
+
+def test_sample_free_only_draws_free_cells_above_the_first_rows():
+    rng = random.Random(0)
+    grid = OccupancyGrid(3 * SEGMENT_SIZE, 3 * SEGMENT_SIZE, min_sample_row=1)
+    grid.add((0, SEGMENT_SIZE))
+
+    for _ in range(100):
+        x, y = grid.sample_free(rng)
+        assert y >= SEGMENT_SIZE
+        assert grid.is_free((x, y))
+
+
+def test_sample_free_returns_none_when_the_board_is_full():
+    grid = OccupancyGrid(2 * SEGMENT_SIZE, 2 * SEGMENT_SIZE, min_sample_row=0)
+    for index in range(4):
+        grid.add(cell_position(grid, index))
+
+    assert grid.sample_free(random.Random(0)) is None
@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from Classes.game_engine import GameEngine
+from help_functions.const import UP, RIGHT, DOWN, LEFT
+from help_functions.replay import (
+    HEADER,
+    MAGIC,
+    CHANCE_SETTINGS,
+    END,
+    Replay,
+    encode_varint,
+    decode_varint,
+    start_recording,
+)
+
+
+@pytest.mark.parametrize(
+    "value", [0, 1, 0x7F, 0x80, 0x3FFF, 0x4000, 2**32 - 1, 2**64 - 1]
+)
+def test_varint_round_trip(value):
+    data = b"\x01" + encode_varint(value) + b"\x02"
+
+    assert decode_varint(data, 1) == (value, len(data) - 1)
+
+
+def test_varint_lengths():
+    assert len(encode_varint(0x7F)) == 1
+    assert len(encode_varint(0x80)) == 2
+    assert len(encode_varint(0x3FFF)) == 2
+    assert len(encode_varint(0x4000)) == 3
+
+
+def test_varint_cut_off_within_an_integer():
+    data = encode_varint(0x4000)
+
+    with pytest.raises(ValueError):
+        decode_varint(data[:-1], 0)
+
+
+def play_recorded_game(directory, seed=3, max_ticks=1_000_000):
+    engine = GameEngine(seed=seed)
+    recorder = start_recording(engine, str(directory))
+    rng = random.Random(seed)
+    while not engine.state.game_over and engine.state.tick < max_ticks:
+        if rng.random() < 0.05:
+            engine.step(rng.choice((UP, RIGHT, DOWN, LEFT)))
+        else:
+            engine.step()
+    return engine.state, recorder.path
+
+
+def test_recorded_game_replays_exactly(tmp_path):
+    state, path = play_recorded_game(tmp_path)
+    replay = Replay.load(path)
+
+    assert state.game_over
+    assert replay.ticks == state.tick
+    assert replay.score == state.snake.score
+    assert replay.autopilot_tick is None
+    assert replay.verify()
+
+
+def test_loads_version_1_replays(tmp_path):
+    settings = GameEngine(seed=5).settings()
+    header = HEADER.pack(
+        MAGIC,
+        1,
+        5,
+        settings["width"],
+        settings["height"],
+        *(settings[name] for name in CHANCE_SETTINGS),
+        settings["difficulty_score_step"],
+        settings["compact"],
+    )
+    records = (
+        encode_varint(3 << 3 | RIGHT)
+        + encode_varint(200 << 3 | DOWN)
+        + encode_varint(97 << 3 | END)
+        + encode_varint(12)
+    )
+    path = tmp_path / "old.replay"
+    path.write_bytes(header + records)
+
+    replay = Replay.load(str(path))
+    assert replay.seed == 5
+    assert replay.settings == settings
+    assert replay.actions == [(3, RIGHT), (203, DOWN)]
+    assert (replay.ticks, replay.score) == (300, 12)
+    assert replay.autopilot_tick is None
+
+
+def test_unfinished_replay_has_no_end(tmp_path):
+    state, path = play_recorded_game(tmp_path, max_ticks=50)
+
+    assert not state.game_over
+    replay = Replay.load(path)
+    assert replay.ticks is None and replay.score is None
+    assert not replay.verify()
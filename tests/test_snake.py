@@ -0,0 +1,38 @@
+import random
+
+from Classes.snake import Snake
+from help_functions.const import MOVE_INTERVAL
+
+
+def play(snake, moves):
+    for _ in range(moves * MOVE_INTERVAL):
+        snake.move()
+
+
+def test_grow_adds_segments_behind_the_tail_at_once():
+    snake = Snake(random.Random(0))
+    snake.grow(3)
+
+    assert len(snake.segments) == 4
+    assert snake.growth_due == 3
+
+
+def test_compact_snake_grows_one_segment_per_move():
+    snake = Snake(random.Random(0), compact=True)
+    snake.grow(3)
+
+    assert len(snake.segments) == 1
+    play(snake, 2)
+    assert len(snake.segments) == 3
+
+
+def test_both_bodies_grow_by_the_same_amount():
+    bodies = []
+    for compact in (False, True):
+        snake = Snake(random.Random(0), compact=compact)
+        snake.grow(3)
+        play(snake, 10)
+        bodies.append(list(snake.segments))
+
+    assert len(bodies[0]) == 7
+    assert bodies[0] == bodies[1]
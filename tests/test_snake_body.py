@@ -0,0 +1,84 @@
+import random
+from collections import deque
+
+import pytest
+
+from Classes.snake_body import SnakeBody
+from help_functions.const import SEGMENT_SIZE, MOVE_DICT
+
+WIDTH = HEIGHT = 5 * SEGMENT_SIZE
+
+
+def step(position, direction):
+    dx, dy = MOVE_DICT[direction]
+    return (position[0] + dx) % WIDTH, (position[1] + dy) % HEIGHT
+
+
+def random_walk(rng, body, reference, moves, grow_chance):
+    """Moves body and a deque of the same segments through random turns, checking they match."""
+    direction = 0
+    for _ in range(moves):
+        if rng.random() < 0.3:
+            direction = (direction + rng.choice((1, 3))) % 4
+        head = step(reference[0], direction)
+        body.appendleft(head)
+        reference.appendleft(head)
+        if rng.random() >= grow_chance:
+            assert body.pop() == reference.pop()
+        assert len(body) == len(reference)
+        assert body[0] == reference[0] and body[-1] == reference[-1]
+    assert list(body) == list(reference)
+    assert [body[i] for i in range(len(body))] == list(reference)
+
+
+def test_ring_buffer_wraps_around():
+    rng = random.Random(0)
+    body = SnakeBody((0, 0), WIDTH, HEIGHT, capacity=8)
+    reference = deque([(0, 0)])
+    for _ in range(5):
+        body.appendleft(step(reference[0], 0))
+        reference.appendleft(body.head)
+
+    # A body of a constant length shifts its steps around the ring many times over
+    random_walk(rng, body, reference, 100, grow_chance=0)
+    assert body.capacity == 8
+    assert body.start != 0
+
+
+def test_ring_buffer_grows_when_wrapped():
+    rng = random.Random(1)
+    body = SnakeBody((0, 0), WIDTH, HEIGHT, capacity=8)
+    reference = deque([(0, 0)])
+    random_walk(rng, body, reference, 30, grow_chance=0.1)
+
+    # Growing unrolls the ring, which starts in its middle by now
+    assert body.start != 0
+    random_walk(rng, body, reference, 100, grow_chance=0.6)
+    assert body.capacity > 8
+
+
+def test_positions_wrap_around_the_board():
+    body = SnakeBody((0, 0), WIDTH, HEIGHT)
+    body.appendleft((WIDTH - SEGMENT_SIZE, 0))
+    body.appendleft((WIDTH - SEGMENT_SIZE, HEIGHT - SEGMENT_SIZE))
+
+    assert list(body) == [
+        (WIDTH - SEGMENT_SIZE, HEIGHT - SEGMENT_SIZE),
+        (WIDTH - SEGMENT_SIZE, 0),
+        (0, 0),
+    ]
+    assert body[1] == (WIDTH - SEGMENT_SIZE, 0)
+
+
+def test_rejects_a_head_that_is_not_a_neighbour():
+    body = SnakeBody((0, 0), WIDTH, HEIGHT)
+    with pytest.raises(ValueError):
+        body.appendleft((2 * SEGMENT_SIZE, 0))
+    with pytest.raises(ValueError):
+        body.appendleft((0, 0))
+
+
+def test_pop_keeps_the_last_segment():
+    body = SnakeBody((0, 0), WIDTH, HEIGHT)
+    with pytest.raises(IndexError):
+        body.pop()
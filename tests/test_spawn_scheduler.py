@@ -0,0 +1,76 @@
+import random
+
+from Classes.spawn_scheduler import (
+    SpawnScheduler,
+    BULLET,
+    SUPER_BULLET,
+    HEART,
+    SUPER_FOOD_RELOCATION,
+)
+
+
+def run(scheduler, ticks, start=0):
+    return [list(scheduler.pop_due(tick)) for tick in range(start, start + ticks)]
+
+
+def test_nothing_spawns_without_chances():
+    scheduler = SpawnScheduler(random.Random(0))
+
+    assert run(scheduler, 100) == [[]] * 100
+
+
+def test_certain_and_impossible_kinds():
+    scheduler = SpawnScheduler(random.Random(0))
+    scheduler.set_chances((1.0, 0.0, 1.0, 0.0), 0)
+
+    assert run(scheduler, 5) == [[BULLET, HEART]] * 5
+
+
+def test_spawn_rate_matches_the_chance():
+    scheduler = SpawnScheduler(random.Random(0))
+    scheduler.set_chances((0.02, 0.005, 0.0, 0.0), 0)
+    spawned = [kind for due in run(scheduler, 100_000) for kind in due]
+
+    assert 1800 < spawned.count(BULLET) < 2200
+    assert 400 < spawned.count(SUPER_BULLET) < 600
+
+
+def test_changed_chance_drops_the_old_draw():
+    scheduler = SpawnScheduler(random.Random(0))
+    scheduler.set_chances((1e-9, 0.0, 0.0, 0.0), 0)
+    scheduler.set_chances((1.0, 0.0, 0.0, 0.0), 10)
+
+    # The event drawn with the first chance is still queued, but is skipped when it comes up
+    assert len(scheduler.heap) == 2
+    assert run(scheduler, 10) == [[]] * 10
+    assert run(scheduler, 3, start=10) == [[BULLET]] * 3
+
+    scheduler.set_chances((0.0, 0.0, 0.0, 0.0), 13)
+    assert run(scheduler, 10, start=13) == [[]] * 10
+
+
+def test_scheduled_events_are_due_in_kind_order():
+    scheduler = SpawnScheduler(random.Random(0))
+    scheduler.schedule(SUPER_FOOD_RELOCATION, 2)
+    scheduler.schedule(BULLET, 2, count=3, interval=2)
+    scheduler.schedule(HEART, 3)
+
+    assert run(scheduler, 8) == [
+        [],
+        [],
+        [BULLET, SUPER_FOOD_RELOCATION],
+        [HEART],
+        [BULLET],
+        [],
+        [BULLET],
+        [],
+    ]
+
+
+def test_late_pop_returns_every_missed_event():
+    scheduler = SpawnScheduler(random.Random(0))
+    scheduler.schedule(HEART, 1)
+    scheduler.schedule(BULLET, 4)
+
+    assert list(scheduler.pop_due(10)) == [HEART, BULLET]
+    assert list(scheduler.pop_due(11)) == []